@@ -1,4 +1,13 @@
-from .expert import ExpertApplication
+import typing
+
+
+def __getattr__(name: str) -> typing.Any:
+    # The expert app (with its ipywidgets and matplotlib dependencies) is only
+    # imported when needed, rather than e.g. with the calculator.
+    if name == 'ExpertApplication':
+        from .expert import ExpertApplication
+        return ExpertApplication
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = ['ExpertApplication']
@@ -22,7 +22,7 @@ import tornado.log
 
 from . import markdown_tools
 from . import model_generator
-from .report_generator import ReportGenerator, calculate_report_data, calculate_report_data_minimal
+from .report_generator import ReportGenerator, calculate_report_data, calculate_report_data_adaptive
 from .user import AuthenticatedUser, AnonymousUser
 
 # The calculator version is based on a combination of the model version and the
@@ -162,7 +162,12 @@ class ConcentrationModelJsonResponse(BaseRequestHandler):
             timeout=300,
         )
         #report_data_task = executor.submit(calculate_report_data, form, form.build_model())
-        report_data_task = executor.submit(calculate_report_data_minimal, form, form.build_model())
+        report_data_task = executor.submit(
+            calculate_report_data_adaptive, form,
+            relative_tolerance=self.settings['mc_relative_tolerance'],
+            max_sample_size=self.settings['mc_max_sample_size'],
+            expiration_quadrature_nodes=self.settings['mc_expiration_quadrature_nodes'],
+        )
         report_data: dict = await asyncio.wrap_future(report_data_task)
         await self.finish(report_data)
 
@@ -314,4 +319,19 @@ def make_app(
         report_generation_parallelism=(
             int(os.environ.get('REPORT_PARALLELISM', 0)) or None
         ),
+
+        # Monte-Carlo sampling controls of the report-json responses: batches of samples
+        # are drawn until the standard error of the mean infection probability falls below
+        # the given fraction of it, up to the given maximum number of samples.
+        mc_relative_tolerance=float(
+            os.environ.get('MC_RELATIVE_TOLERANCE', model_generator._DEFAULT_MC_RELATIVE_TOLERANCE)
+        ),
+        mc_max_sample_size=int(
+            os.environ.get('MC_MAX_SAMPLE_SIZE', model_generator._DEFAULT_MC_SAMPLE_SIZE)
+        ),
+        # The number of nodes of the quadrature over the aerosol diameters of the
+        # report-json responses, in place of sampling the diameters (0 to sample them).
+        mc_expiration_quadrature_nodes=(
+            int(os.environ.get('MC_EXPIRATION_QUADRATURE_NODES', 0)) or None
+        ),
     )
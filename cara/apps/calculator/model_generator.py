@@ -1,5 +1,6 @@
 import dataclasses
 import datetime
+import functools
 import html
 import logging
 import typing
@@ -12,9 +13,9 @@ from cara import models
 from cara import data
 import cara.data.weather
 import cara.monte_carlo as mc
+import cara.monte_carlo.data
 from .. import calculator
-from cara.monte_carlo.data import activity_distributions, virus_distributions, mask_distributions, short_range_distances
-from cara.monte_carlo.data import expiration_distribution, expiration_BLO_factors, expiration_distributions, short_range_expiration_distributions
+from cara.monte_carlo.data import expiration_distribution, expiration_BLO_factors
 
 LOG = logging.getLogger(__name__)
 
@@ -24,6 +25,9 @@ minutes_since_midnight = typing.NewType('minutes_since_midnight', int)
 # there should be no default value used.
 _NO_DEFAULT = object()
 _DEFAULT_MC_SAMPLE_SIZE = 250000
+# The relative standard error of the mean infection probability (and expected
+# new cases) at which the adaptive sampling stops drawing samples.
+_DEFAULT_MC_RELATIVE_TOLERANCE = 0.01
 
 
 @dataclasses.dataclass
@@ -235,7 +239,12 @@ class FormData:
             raise ValueError("mechanical_ventilation_type cannot be 'not-applicable' if "
                              "ventilation_type is 'mechanical_ventilation'")
 
-    def build_mc_model(self) -> mc.ExposureModel:
+    def build_mc_model(self, expiration_quadrature_nodes: typing.Optional[int] = None) -> mc.ExposureModel:
+        """
+        Build the Monte-Carlo model of the form. If expiration_quadrature_nodes
+        is given, the aerosol diameters are the nodes of a quadrature (see
+        ``cara.monte_carlo.data.expiration_distribution``) rather than samples.
+        """
         # Initializes room with volume either given directly or as product of area and height
         if self.volume_type == 'room_volume_explicit':
             volume = self.room_volume
@@ -250,16 +259,23 @@ class FormData:
             humidity = float(self.humidity)
         room = models.Room(volume=volume, inside_temp=models.PiecewiseConstant((0, 24), (self.inside_temp,)), humidity=humidity)
 
-        infected_population = self.infected_population()
+        infected_population = self.infected_population(expiration_quadrature_nodes)
         
         short_range = []
         if self.short_range_option == "short_range_yes":
             for interaction in self.short_range_interactions:
+                if expiration_quadrature_nodes is None:
+                    short_range_expiration = cara.monte_carlo.data.short_range_expiration_distributions[interaction['expiration']]
+                else:
+                    short_range_expiration = _expiration_distribution(
+                        expiration_BLO_factors[interaction['expiration']], d_max=100.,
+                        quadrature_nodes=expiration_quadrature_nodes,
+                    )
                 short_range.append(mc.ShortRangeModel(
-                    expiration=short_range_expiration_distributions[interaction['expiration']],
+                    expiration=short_range_expiration,
                     activity=infected_population.activity,
                     presence=self.short_range_interval(interaction),
-                    distance=short_range_distances,
+                    distance=cara.monte_carlo.data.short_range_distances,
                 ))
 
         # Initializes and returns a model with the attributes defined above
@@ -274,8 +290,12 @@ class FormData:
             exposed=self.exposed_population(),
         )
 
-    def build_model(self, sample_size=_DEFAULT_MC_SAMPLE_SIZE) -> models.ExposureModel:
-        return self.build_mc_model().build_model(size=sample_size)
+    def build_model(
+            self,
+            sample_size=_DEFAULT_MC_SAMPLE_SIZE,
+            expiration_quadrature_nodes: typing.Optional[int] = None,
+    ) -> models.ExposureModel:
+        return self.build_mc_model(expiration_quadrature_nodes).build_model(size=sample_size)
 
     def tz_name_and_utc_offset(self) -> typing.Tuple[str, float]:
         """
@@ -296,10 +316,10 @@ class FormData:
         utc_offset_hours = utc_offset_td.total_seconds() / 60 / 60
         return name, utc_offset_hours
 
-    def outside_temp(self) -> models.PiecewiseConstant:
+    def outside_temp(self) -> models.PeriodicPiecewiseConstant:
         """
-        Return the outside temperature as a PiecewiseConstant in the destination
-        timezone.
+        Return the outside temperature as a (daily) PeriodicPiecewiseConstant
+        in the destination timezone.
 
         """
         month = MONTH_NAMES.index(self.event_month) + 1
@@ -318,8 +338,10 @@ class FormData:
             temp_profile,
             npts=24*10,  # 10 steps per hour => 6 min steps
         )
-        outside_temp = models.PiecewiseConstant(
-            tuple(float(t) for t in times), tuple(float(t) for t in temp_profile),
+        # The profile covers a whole day, so there is no need for a closing
+        # transition time at midnight.
+        outside_temp = models.PeriodicPiecewiseConstant(
+            tuple(float(t) for t in times[:-1]), tuple(float(t) for t in temp_profile),
         )
         return outside_temp
 
@@ -384,14 +406,14 @@ class FormData:
         # Initializes the mask type if mask wearing is "continuous", otherwise instantiates the mask attribute as
         # the "No mask"-mask
         if self.mask_wearing_option == 'mask_on':
-            mask = mask_distributions[self.mask_type]
+            mask = cara.monte_carlo.data.mask_distributions[self.mask_type]
         else:
             mask = models.Mask.types['No mask']
         return mask
 
-    def infected_population(self) -> mc.InfectedPopulation:
+    def infected_population(self, expiration_quadrature_nodes: typing.Optional[int] = None) -> mc.InfectedPopulation:
         # Initializes the virus
-        virus = virus_distributions[self.virus_type]
+        virus = cara.monte_carlo.data.virus_distributions[self.virus_type]
 
         scenario_activity_and_expiration = {
             'office': (
@@ -434,8 +456,8 @@ class FormData:
         }
 
         [activity_defn, expiration_defn] = scenario_activity_and_expiration[self.activity_type]
-        activity = activity_distributions[activity_defn]
-        expiration = build_expiration(expiration_defn)
+        activity = cara.monte_carlo.data.activity_distributions[activity_defn]
+        expiration = build_expiration(expiration_defn, expiration_quadrature_nodes)
 
         infected_occupants = self.infected_people
 
@@ -466,7 +488,7 @@ class FormData:
         }
 
         activity_defn = scenario_activity[self.activity_type]
-        activity = activity_distributions[activity_defn]
+        activity = cara.monte_carlo.data.activity_distributions[activity_defn]
 
         infected_occupants = self.infected_people
         # The number of exposed occupants is the total number of occupants
@@ -661,16 +683,34 @@ class FormData:
         )
 
 
-def build_expiration(expiration_definition) -> mc._ExpirationBase:
+def build_expiration(
+        expiration_definition,
+        quadrature_nodes: typing.Optional[int] = None,
+) -> mc._ExpirationBase:
     if isinstance(expiration_definition, str):
-        return expiration_distributions[expiration_definition]
+        if quadrature_nodes is not None:
+            return _expiration_distribution(
+                expiration_BLO_factors[expiration_definition], quadrature_nodes=quadrature_nodes,
+            )
+        return cara.monte_carlo.data.expiration_distributions[expiration_definition]
     elif isinstance(expiration_definition, dict):
         total_weight = sum(expiration_definition.values())
         BLO_factors = np.sum([
             np.array(expiration_BLO_factors[exp_type]) * weight/total_weight
             for exp_type, weight in expiration_definition.items()
             ], axis=0)
-        return expiration_distribution(BLO_factors=tuple(BLO_factors))
+        return _expiration_distribution(tuple(BLO_factors), quadrature_nodes=quadrature_nodes)
+
+
+@functools.lru_cache(maxsize=32)
+def _expiration_distribution(
+        BLO_factors: typing.Tuple[float, float, float],
+        d_max: float = 30.,
+        quadrature_nodes: typing.Optional[int] = None,
+) -> mc.Expiration:
+    # The same expiration distribution is returned for the same BLO factors,
+    # such that models built from variants of a form have common samples.
+    return expiration_distribution(BLO_factors=BLO_factors, d_max=d_max, quadrature_nodes=quadrature_nodes)
 
 
 def baseline_raw_form_data() -> typing.Dict[str, typing.Union[str, float]]:
@@ -14,7 +14,7 @@ import numpy as np
 from cara import models
 from cara.apps.calculator import markdown_tools
 from ... import monte_carlo as mc
-from .model_generator import FormData, _DEFAULT_MC_SAMPLE_SIZE
+from .model_generator import FormData, _DEFAULT_MC_RELATIVE_TOLERANCE, _DEFAULT_MC_SAMPLE_SIZE
 from ... import dataclass_utils
 
 
@@ -99,13 +99,15 @@ def interesting_times(model: models.ExposureModel, approx_n_pts=100) -> typing.L
 
 def concentrations_with_sr_breathing(form: FormData, model: models.ExposureModel, times: typing.List[float], short_range_intervals: typing.List) -> typing.List[float]:
     lower_concentrations = []
-    for time in times:
+    concentrations = model.concentration(np.array(times))
+    long_range_concentrations = model.concentration_model.concentration(np.array(times))
+    for time, concentration, long_range_concentration in zip(times, concentrations, long_range_concentrations):
         for index, (start, stop) in enumerate(short_range_intervals):
             # For visualization issues, add short-range breathing activity to the initial long-range concentrations
             if start <= time <= stop and form.short_range_interactions[index]['expiration'] == 'Breathing':
-                lower_concentrations.append(np.array(model.concentration(float(time))).mean())
+                lower_concentrations.append(np.array(concentration).mean())
                 break
-        lower_concentrations.append(np.array(model.concentration_model.concentration(float(time))).mean())
+        lower_concentrations.append(np.array(long_range_concentration).mean())
     return lower_concentrations
 
 
@@ -115,20 +117,16 @@ def calculate_report_data(form: FormData, model: models.ExposureModel) -> typing
     short_range_expirations = [interaction['expiration'] for interaction in form.short_range_interactions] if form.short_range_option == "short_range_yes" else []
     
     concentrations = [
-        np.array(model.concentration(float(time))).mean()
-        for time in times
+        np.array(concentration).mean()
+        for concentration in model.concentration(np.array(times))
     ]  
     lower_concentrations = concentrations_with_sr_breathing(form, model, times, short_range_intervals)
     highest_const = max(concentrations)
     
-    cumulative_doses = np.cumsum([
-        np.array(model.deposited_exposure_between_bounds(float(time1), float(time2))).mean()
-        for time1, time2 in zip(times[:-1], times[1:])
-    ])
-    long_range_cumulative_doses = np.cumsum([
-        np.array(model.long_range_deposited_exposure_between_bounds(float(time1), float(time2))).mean()
-        for time1, time2 in zip(times[:-1], times[1:])
-    ])
+    # The doses are given at the end of each time interval.
+    cumulative_doses = model.cumulative_deposited_exposure(np.array(times), mean=True)[1:]
+    long_range_cumulative_doses = model.cumulative_long_range_deposited_exposure(
+        np.array(times), mean=True)[1:]
 
     prob = np.array(model.infection_probability()).mean()
     er = np.array(model.concentration_model.infected.emission_rate_when_present()).mean()
@@ -151,20 +149,50 @@ def calculate_report_data(form: FormData, model: models.ExposureModel) -> typing
         "expected_new_cases": expected_new_cases,
     }
 
-def calculate_report_data_minimal(form: FormData, model: models.ExposureModel) -> typing.Dict[str, typing.Any]:
 
-    prob = np.array(model.infection_probability()).mean()
-    er = np.array(model.concentration_model.infected.emission_rate_when_present()).mean()
-    exposed_occupants = model.exposed.number
-    expected_new_cases = np.array(model.expected_new_cases()).mean()
+def calculate_report_data_adaptive(
+        form: FormData,
+        relative_tolerance: float = _DEFAULT_MC_RELATIVE_TOLERANCE,
+        max_sample_size: int = _DEFAULT_MC_SAMPLE_SIZE,
+        expiration_quadrature_nodes: typing.Optional[int] = None,
+) -> typing.Dict[str, typing.Any]:
+    """
+    The mean infection probability, expected new cases and emission rate of
+    the form's scenario, with as many samples as needed for the standard
+    error of the mean infection probability and expected new cases to fall
+    below ``relative_tolerance`` times their mean (up to ``max_sample_size``
+    samples), rather than a fixed number of samples.
+    The aerosol diameters are integrated by quadrature if
+    ``expiration_quadrature_nodes`` is given (see FormData.build_mc_model).
+
+    """
+    mc_model = form.build_mc_model(expiration_quadrature_nodes)
+    statistics = mc_model.adaptive_statistics(
+        {
+            'prob_inf': models.ExposureModel.infection_probability,
+            'expected_new_cases': models.ExposureModel.expected_new_cases,
+            'emission_rate': lambda m: m.concentration_model.infected.emission_rate_when_present(),
+        },
+        relative_tolerance=relative_tolerance,
+        max_size=max_sample_size,
+        converged_quantities=['prob_inf', 'expected_new_cases'],
+    )
+    sample_size = statistics['prob_inf'].count
+    er = float(statistics['emission_rate'].mean)
 
     return {
-        "prob_inf": prob,
+        "prob_inf": float(statistics['prob_inf'].mean),
+        "prob_inf_confidence_interval": [float(bound) for bound in statistics['prob_inf'].confidence_interval()],
         "emission_rate": er,
-        "exposed_occupants": exposed_occupants,
-        "expected_new_cases": expected_new_cases,
+        "exposed_occupants": form.exposed_population().number,
+        "expected_new_cases": float(statistics['expected_new_cases'].mean),
+        "expected_new_cases_confidence_interval": [
+            float(bound) for bound in statistics['expected_new_cases'].confidence_interval()
+        ],
+        "sample_size": sample_size,
     }
 
+
 def generate_permalink(base_url, calculator_prefix, form: FormData):
     form_dict = FormData.to_dict(form, strip_defaults=True)
 
@@ -277,15 +305,21 @@ def manufacture_alternative_scenarios(form: FormData) -> typing.Dict[str, mc.Exp
     return scenarios
 
 
-def scenario_statistics(mc_model: mc.ExposureModel, sample_times: typing.List[float]):
-    model = mc_model.build_model(size=_DEFAULT_MC_SAMPLE_SIZE)
+def scenario_statistics(
+        mc_model: mc.ExposureModel,
+        sample_times: typing.List[float],
+        seed: typing.Optional[np.random.SeedSequence] = None,
+):
+    # Scenarios built with the same seed draw the distributions found at the
+    # same place in each of them from the same stream of random numbers.
+    model = mc_model.build_model(size=_DEFAULT_MC_SAMPLE_SIZE, seed=seed)
 
     return {
         'probability_of_infection': np.mean(model.infection_probability()),
         'expected_new_cases': np.mean(model.expected_new_cases()),
         'concentrations': [
-            np.mean(model.concentration(time))
-            for time in sample_times
+            np.mean(concentration)
+            for concentration in model.concentration(np.array(sample_times))
         ],
     }
 
@@ -296,11 +330,18 @@ def comparison_report(
         executor_factory: typing.Callable[[], concurrent.futures.Executor],
 ):
     statistics = {}
+    # The scenarios are built with common random numbers, such that the
+    # differences between them aren't blurred by sampling noise. These are
+    # given by a shared seed only: each of the scenarios is sampled by its
+    # own worker, but draws the distributions found at the same place in the
+    # others from the same streams, hence the same samples.
+    seed = np.random.SeedSequence()
     with executor_factory() as executor:
         results = executor.map(
             scenario_statistics,
             scenarios.values(),
             [sample_times] * len(scenarios),
+            [seed] * len(scenarios),
             timeout=60,
         )
 
@@ -148,12 +148,9 @@ class ExposureModelResult(View):
         resolution = 600
         ts = np.linspace(sorted(model.concentration_model.infected.presence.transition_times())[0],
                          sorted(model.concentration_model.infected.presence.transition_times())[-1], resolution)
-        concentration = [model.concentration(t) for t in ts]
+        concentration = model.concentration(ts)
         
-        cumulative_doses = np.cumsum([
-            np.array(model.deposited_exposure_between_bounds(float(time1), float(time2))).mean()
-            for time1, time2 in zip(ts[:-1], ts[1:])
-        ])
+        cumulative_doses = model.cumulative_deposited_exposure(ts, mean=True)[1:]
 
         if self.concentration_line is None:
             [self.concentration_line] = self.ax.plot(ts, concentration, color='#3530fe')
@@ -256,14 +253,14 @@ class ExposureComparissonResult(View):
         start, finish = models_start_end(exp_models)
         colors=['blue', 'red', 'orange', 'yellow', 'pink', 'purple', 'green', 'brown', 'black' ]
         ts = np.linspace(start, finish, num=250)
-        concentrations = [[conc_model.concentration_model.concentration(t) for t in ts] for conc_model in exp_models]
+        concentrations = [conc_model.concentration_model.concentration(ts) for conc_model in exp_models]
         for label, concentration, color in zip(labels, concentrations, colors):
             self.ax.plot(ts, concentration, label=label, color=color)
             
-        cumulative_doses = [np.cumsum([
-            np.array(conc_model.deposited_exposure_between_bounds(float(time1), float(time2))).mean()
-            for time1, time2 in zip(ts[:-1], ts[1:])
-        ]) for conc_model in exp_models]
+        cumulative_doses = [
+            conc_model.cumulative_deposited_exposure(ts, mean=True)[1:]
+            for conc_model in exp_models
+        ]
         
         for label, cumulative_dose, color in zip(labels, cumulative_doses, colors):
             self.ax2.plot(ts[:-1], cumulative_dose, label=label, color=color, linestyle="dotted")
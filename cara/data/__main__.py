@@ -0,0 +1,5 @@
+from cara.data.weather import build_wx_store
+
+
+if __name__ == '__main__':
+    build_wx_store()
@@ -1,22 +1,44 @@
 import datetime
 import functools
 import json
+import logging
+import os
 from pathlib import Path
 import typing
 
 import dateutil.tz
 import numpy as np
-from scipy.spatial import cKDTree
-from timezonefinder import TimezoneFinder
 
+if typing.TYPE_CHECKING:
+    from scipy.spatial import cKDTree
+
+
+LOG = logging.getLogger(__name__)
 
 WX_DATA_LOCATION = Path(__file__).absolute().parent
+# The weather data, as a (n_stations, 12, 24) float32 array of the mean
+# temperature (in Celsius) of each station, month and hour (NaN where the
+# source data is missing), and the id and timezone of each station, one per
+# line. See ``build_wx_store``.
+WX_STORE_LOCATION = WX_DATA_LOCATION / 'global_weather_set.npy'
+WX_STORE_INDEX_LOCATION = WX_DATA_LOCATION / 'global_weather_set_stations.txt'
 WxStationIdType = str
 MonthType = str
 # HourlyTempType - 24 temperatures, one for each hour of the day (the average for the given month).
 HourlyTempType = typing.List[float]
 WxStationRecordType = typing.Tuple[WxStationIdType, str, float, float]
 
+# The distance (in degrees) from a weather station within which a location is
+# given the timezone of the station, if the locations within that distance
+# were checked to be in that timezone (see ``_station_timezone_names``).
+STATION_TIMEZONE_RADIUS = 0.1
+# The number of points (per side) of the grid over the square around a station
+# at which its timezone is checked to be the only one.
+_STATION_TIMEZONE_GRID_SIZE = 11
+# The precision (in decimals of a degree) of the locations whose timezone is
+# looked up, for the cache of the lookups.
+_TIMEZONE_COORDINATE_DECIMALS = 4
+
 
 @functools.lru_cache()
 def wx_data() -> typing.Dict[WxStationIdType, typing.Dict[MonthType, HourlyTempType]]:
@@ -25,6 +47,10 @@ def wx_data() -> typing.Dict[WxStationIdType, typing.Dict[MonthType, HourlyTempT
 
     The data is structured by station location, and for each station location, by month.
 
+    This loads the whole of the source data in memory: use
+    ``mean_hourly_temperatures`` to read from the (memory-mapped) weather
+    store instead.
+
     """
     with (WX_DATA_LOCATION / 'global_weather_set.json').open("r") as json_file:
         data = json.load(json_file)
@@ -37,16 +63,94 @@ def wx_data() -> typing.Dict[WxStationIdType, typing.Dict[MonthType, HourlyTempT
     return data
 
 
+def _read_wx_source(
+        source: Path,
+) -> typing.Tuple[typing.List[WxStationIdType], np.ndarray]:
+    with source.open("r") as json_file:
+        data = json.load(json_file)
+
+    temperatures = np.full((len(data), 12, 24), np.nan, dtype=np.float32)
+    for index, station_data in enumerate(data.values()):
+        for month, month_temperatures in station_data.items():
+            # Some months have fewer than 24 (hourly) values, which are left
+            # out as not being usable.
+            if len(month_temperatures) == 24:
+                temperatures[index, int(month) - 1] = month_temperatures
+    return list(data), temperatures
+
+
+def build_wx_store(
+        source: Path = WX_DATA_LOCATION / 'global_weather_set.json',
+        destination: Path = WX_STORE_LOCATION,
+        index_destination: Path = WX_STORE_INDEX_LOCATION,
+) -> None:
+    """
+    Convert the weather data from its source (JSON) format into the weather
+    store read by ``mean_hourly_temperatures``, which can be memory-mapped
+    rather than parsed by each process. This is run as part of the
+    installation (with ``python -m cara.data``), and must be re-run
+    when the source data changes.
+
+    The timezone of each station, where it was checked to be the only one
+    around the station, is stored along with its id, such that the timezone
+    of the locations close to that station doesn't need to be looked up (see
+    ``timezone_at``).
+
+    """
+    station_ids, temperatures = _read_wx_source(source)
+    station_records = _read_station_records()
+    station_timezones = _station_timezone_names([
+        station_records[station_id] for station_id in station_ids if station_id in station_records
+    ])
+    # Write to temporary files first, such that a process reading the store
+    # in the meantime doesn't see it partially written.
+    tmp_suffix = f'.{os.getpid()}.tmp'
+    tmp_index_destination = index_destination.with_name(index_destination.name + tmp_suffix)
+    tmp_index_destination.write_text(''.join(
+        f'{station_id} {station_timezones.get(station_id) or "-"}\n' for station_id in station_ids
+    ))
+    tmp_destination = destination.with_name(destination.name + tmp_suffix)
+    with tmp_destination.open('wb') as file:
+        np.save(file, temperatures)
+    os.replace(tmp_index_destination, index_destination)
+    os.replace(tmp_destination, destination)
+
+
 @functools.lru_cache()
-def wx_station_data() -> typing.Dict[WxStationIdType, WxStationRecordType]:
+def _wx_store() -> typing.Tuple[
+        typing.Dict[WxStationIdType, int],
+        typing.Dict[WxStationIdType, typing.Optional[str]],
+        np.ndarray,
+]:
     """
-    Return a dictionary of ``station-id: station records``, where station records
-    are of the form ``(station-id, station-name, station-latitude, station-longitude)``.
+    Return the index of each station in the weather store, the timezone of
+    each station (if unambiguous, see ``STATION_TIMEZONE_RADIUS``), and the
+    store (see ``WX_STORE_LOCATION``), memory-mapped such that it is only read
+    as needed and shared between the processes using it.
 
-    The stations returned are guaranteed to have valid weather data.
+    If the store hasn't been built (with ``python -m cara.data``), the weather
+    data is read from its source instead, and kept in memory.
 
     """
-    weather_data = wx_data()
+    if not WX_STORE_LOCATION.exists():
+        LOG.warning(
+            "The weather store hasn't been built, and the weather data is read "
+            "from its source instead. Run 'python -m cara.data' to build it."
+        )
+        station_ids, temperatures = _read_wx_source(WX_DATA_LOCATION / 'global_weather_set.json')
+        # The timezones of the stations are then looked up as needed.
+        return {station_id: index for index, station_id in enumerate(station_ids)}, {}, temperatures
+
+    station_indices, station_timezones = {}, {}
+    for index, line in enumerate(WX_STORE_INDEX_LOCATION.read_text().splitlines()):
+        station_id, _, timezone_name = line.partition(' ')
+        station_indices[station_id] = index
+        station_timezones[station_id] = None if timezone_name in ['', '-'] else timezone_name
+    temperatures = np.load(WX_STORE_LOCATION, mmap_mode='r')
+    return station_indices, station_timezones, temperatures
+
+
+def _read_station_records() -> typing.Dict[WxStationIdType, WxStationRecordType]:
     station_data = {}
     fixed_delimits = [0, 12, 13, 44, 51, 60, 69, 90, 91]
     station_file = WX_DATA_LOCATION / 'hadisd_station_fullinfo_v311_202001p.txt'
@@ -54,18 +158,61 @@ def wx_station_data() -> typing.Dict[WxStationIdType, WxStationRecordType]:
     for line in station_file.open('rt'):
         start_end_positions = zip(fixed_delimits[:-1], fixed_delimits[1:])
         split_vals = [line[start:end] for start, end in start_end_positions]
-        station_location = (
+        station_data[split_vals[0]] = (
             split_vals[0], split_vals[2], float(split_vals[3]), float(split_vals[4]),
         )
-        # We only consider stations with weather data, don't include the rest.
-        if split_vals[0] in weather_data:
-            station_data[split_vals[0]] = station_location
     return station_data
 
 
+def _station_timezone_names(
+        station_records: typing.Sequence[WxStationRecordType],
+) -> typing.Dict[WxStationIdType, typing.Optional[str]]:
+    # The timezone of each station, if it is that of the locations within
+    # STATION_TIMEZONE_RADIUS of it: the timezone finder must know it to be
+    # the only timezone of the region ("shortcut") of each point of a grid
+    # over the enclosing square (the corners included). The grid is much
+    # denser than these regions, but this is a check rather than a proof: a
+    # region with another timezone clipping the square between the points of
+    # the grid would be missed. Otherwise (e.g. close to a border or a coast)
+    # the timezone is looked up for each location.
+    offsets = np.linspace(
+        -STATION_TIMEZONE_RADIUS, STATION_TIMEZONE_RADIUS, _STATION_TIMEZONE_GRID_SIZE,
+    )
+    timezones: typing.Dict[WxStationIdType, typing.Optional[str]] = {}
+    for station_id, _, latitude, longitude in station_records:
+        timezone_names = {
+            _timezone_finder().unique_timezone_at(
+                lat=float(np.clip(latitude + lat_offset, -90., 90.)),
+                lng=float((longitude + lng_offset + 180.) % 360. - 180.),
+            )
+            for lat_offset in offsets for lng_offset in offsets
+        }
+        timezones[station_id] = timezone_names.pop() if len(timezone_names) == 1 else None
+    return timezones
+
+
 @functools.lru_cache()
-def _wx_station_kdtree() -> cKDTree:
+def wx_station_data() -> typing.Dict[WxStationIdType, WxStationRecordType]:
+    """
+    Return a dictionary of ``station-id: station records``, where station records
+    are of the form ``(station-id, station-name, station-latitude, station-longitude)``.
+
+    The stations returned are guaranteed to have valid weather data.
+
+    """
+    weather_data, _, _ = _wx_store()
+    # We only consider stations with weather data, don't include the rest.
+    return {
+        station_id: station_record
+        for station_id, station_record in _read_station_records().items()
+        if station_id in weather_data
+    }
+
+
+@functools.lru_cache()
+def _wx_station_kdtree() -> "cKDTree":
     """Build a kd-tree of wx station longitude & latitudes (note the coordinate order)"""
+    from scipy.spatial import cKDTree
     station_data = wx_station_data().values()
     coords = np.array([(stn_record[3], stn_record[2])
                       for stn_record in station_data])
@@ -83,15 +230,65 @@ def mean_hourly_temperatures(wx_station: str, month: int) -> HourlyTempType:
         A list containing 24 temperature values, one for each hour, in kelvin.
         Index 0 of the result corresponds to hour 00:00 (UTC), and index 23 (the last) to 23:00 (UTC).
 
+    Raises a KeyError for an unknown station, and a ValueError if there is
+    no complete data for the given month.
+
     """
-    # Note that the current dataset encodes month number as a string.
-    return wx_data()[wx_station][str(month)]
+    station_indices, _, temperatures = _wx_store()
+    month_temperatures = temperatures[station_indices[wx_station], month - 1]
+    if np.any(np.isnan(month_temperatures)):
+        raise ValueError(
+            f"No complete weather data for the station {wx_station} in month {month}"
+        )
+    return list(273.15 + month_temperatures.astype(np.float64))
+
+
+@functools.lru_cache()
+def _timezone_finder():
+    # Loading the timezone data takes over a second, and is done once for all
+    # of the lookups of the process.
+    from timezonefinder import TimezoneFinder
+    return TimezoneFinder()
+
+
+@functools.lru_cache(maxsize=4096)
+def _timezone_name_at(latitude: float, longitude: float) -> typing.Optional[str]:
+    return _timezone_finder().timezone_at(lat=latitude, lng=longitude)
+
+
+@functools.lru_cache()
+def _wx_station_timezone_names() -> typing.Tuple[typing.Optional[str], ...]:
+    # The timezone of each station (see _wx_store), in the order of the
+    # stations of the kd-tree.
+    _, station_timezones, _ = _wx_store()
+    return tuple(station_timezones.get(station_id) for station_id in wx_station_data())
+
+
+def _station_timezone_name_at(latitude: float, longitude: float) -> typing.Optional[str]:
+    # The timezone of the nearest station, if the location is close enough to
+    # it (see STATION_TIMEZONE_RADIUS).
+    distance, index = _wx_station_kdtree().query((longitude, latitude))
+    if distance > STATION_TIMEZONE_RADIUS:
+        return None
+    return _wx_station_timezone_names()[index]
 
 
 def timezone_at(*, latitude: float, longitude: float) -> datetime.tzinfo:
-    """Find a timezone for the given location, or raise."""
-    tf = TimezoneFinder()
-    tz_name = tf.timezone_at(lat=latitude, lng=longitude)
+    """
+    Find a timezone for the given location, or raise.
+
+    Close to a weather station, the timezone is that of the station, stored
+    with the weather data. Otherwise, it is looked up in the timezone
+    boundaries (the lookups being cached, for the location rounded to
+    ``_TIMEZONE_COORDINATE_DECIMALS`` decimals).
+
+    """
+    tz_name = _station_timezone_name_at(latitude, longitude)
+    if tz_name is None:
+        tz_name = _timezone_name_at(
+            round(latitude, _TIMEZONE_COORDINATE_DECIMALS),
+            round(longitude, _TIMEZONE_COORDINATE_DECIMALS),
+        )
     tz = dateutil.tz.gettz(tz_name)
     if tz_name is None or tz is None:
         raise ValueError(
@@ -147,3 +344,4 @@ def nearest_wx_station(*, longitude: float, latitude: float) -> WxStationRecordT
     station_data = list(wx_station_data().values())
     dd, ii = ktree.query((longitude, latitude), k=[1])
     return station_data[ii[0]]
+
@@ -8,8 +8,11 @@ to allow the user to swap-out and extend its various components. One of the
 major abstractions of the model is the distinction between virus concentration
 (:class:`ConcentrationModel`) and virus exposure (:class:`ExposureModel`).
 
-The concentration component is a recursive (on model time) model and therefore in order
-to optimise its execution certain layers of caching are implemented. This caching
+The concentration component is solved piecewise between the state changes of the
+model: the concentrations and integrated concentrations at each of the state change
+times are computed once, in a single forward pass over model time, and any other time
+is evaluated from the state at the last state change before it. In order to optimise
+its execution certain layers of caching are implemented. This caching
 mandates that the models in this module, once instantiated, are immutable and
 deterministic (i.e. running the same model twice will result in the same answer).
 
@@ -31,36 +34,123 @@ with an array of parameter values. The values must be either scalar, length 1 ar
 or length N arrays, where N is the number of parameterisations to run; N must be
 the same for all parameters of a single model.
 
+The parameter values may also be multi-dimensional arrays, which are broadcast
+together following the usual numpy rules - for instance a room volume of shape
+(M, 1) together with N Monte-Carlo samples of the other parameters evaluates
+the model for M volumes at once, with results of shape (M, N). The last axis
+is always that of the samples: quantities integrated over the aerosol
+diameters (i.e. averaged over the samples) keep the leading axes.
+
 """
 from dataclasses import dataclass
 import typing
 
 import numpy as np
-from scipy.interpolate import interp1d
-
-if not typing.TYPE_CHECKING:
-    from memoization import cached
-else:
-    # Workaround issue https://github.com/lonelyenvoy/python-memoization/issues/18
-    # by providing a no-op cache decorator when type-checking.
-    cached = lambda *cached_args, **cached_kwargs: lambda function: function  # noqa
 
 from .utils import method_cache
 
-from .dataclass_utils import nested_replace
 
 oneoverln2 = 1 / np.log(2)
 # Define types for items supporting vectorisation. In the future this may be replaced
-# by ``np.ndarray[<type>]`` once/if that syntax is supported. Note that vectorization
-# implies 1d arrays: multi-dimensional arrays are not supported.
+# by ``np.ndarray[<type>]`` once/if that syntax is supported. Multi-dimensional
+# arrays are broadcast together, the last axis being that of the samples.
 _VectorisedFloat = typing.Union[float, np.ndarray]
 _VectorisedInt = typing.Union[int, np.ndarray]
 
 Time_t = typing.TypeVar('Time_t', float, int)
+# Times may be given either as a single float, or as a sorted 1d array of times.
+_VectorisedTime = typing.Union[float, np.ndarray]
 BoundaryPair_t = typing.Tuple[Time_t, Time_t]
 BoundarySequence_t = typing.Union[typing.Tuple[BoundaryPair_t, ...], typing.Tuple]
 
 
+def _stack_in_time(values: typing.Sequence[_VectorisedFloat]) -> np.ndarray:
+    """
+    Stack a sequence of per-time values (each of which may be a scalar or a
+    vectorised parameterisation) into a single array whose first axis is time.
+
+    """
+    shape = np.broadcast_shapes(*(np.shape(value) for value in values))
+    stacked = np.empty((len(values),) + shape, dtype=np.result_type(*values) if values else float)
+    for i, value in enumerate(values):
+        stacked[i] = value
+    return stacked
+
+
+def _mean_over_samples(values: _VectorisedFloat) -> _VectorisedFloat:
+    """
+    The mean of a vectorised quantity over its samples, i.e. over its last
+    axis. The leading (parameter) axes of multi-dimensional values are kept,
+    with a length 1 last axis, such that the result broadcasts against the
+    other vectorised quantities.
+
+    """
+    values = np.asarray(values)
+    if values.ndim <= 1:
+        return values.mean()
+    return values.mean(axis=-1, keepdims=True)
+
+
+def _interp(x: _VectorisedFloat, xp: _VectorisedFloat, fp: _VectorisedFloat) -> _VectorisedFloat:
+    """
+    As ``np.interp``, but with the interpolation done along the last axis of
+    multi-dimensional arguments, for each index of their (broadcast) leading
+    axes. With a single known point (scalar ``x`` and ``xp``), the value is
+    ``fp`` itself, which may then have any shape (e.g. a leading time axis).
+
+    """
+    if np.ndim(x) == 0 and np.ndim(xp) == 0:
+        return fp
+    if max(np.ndim(x), np.ndim(xp), np.ndim(fp)) <= 1:
+        return np.interp(x, xp, fp)
+    x, xp, fp = np.atleast_1d(x, xp, fp)
+    leading_shape = np.broadcast_shapes(x.shape[:-1], xp.shape[:-1], fp.shape[:-1])
+    x = np.broadcast_to(x, leading_shape + x.shape[-1:])
+    xp = np.broadcast_to(xp, leading_shape + xp.shape[-1:])
+    fp = np.broadcast_to(fp, leading_shape + fp.shape[-1:])
+    result = np.empty(x.shape, dtype=np.result_type(fp.dtype, np.float32))
+    for index in np.ndindex(*leading_shape):
+        result[index] = np.interp(x[index], xp[index], fp[index])
+    return result
+
+
+def _expand_in_time(values: np.ndarray, ndim: int) -> np.ndarray:
+    """
+    Append axes to an array whose first axis is time, such that it broadcasts
+    (time-wise) against values with ``ndim`` dimensions, e.g. a vectorised
+    parameter or another array of per-time values with ``ndim - 1``
+    dimensions.
+
+    """
+    return values.reshape(values.shape + (1,) * max([ndim - (values.ndim - 1), 0]))
+
+
+def _in_dtype_of(values: np.ndarray, *vectorised: typing.Any) -> np.ndarray:
+    """
+    Cast per-time values computed from plain floats (e.g. temperatures), and
+    thus in double precision, to the dtype of the vectorised values they are
+    combined with, as the plain floats of a single time would be. The values
+    are returned as they are if none of the others is a floating point array.
+
+    """
+    arrays = [value for value in vectorised if isinstance(value, np.ndarray) and value.dtype.kind == 'f']
+    if not arrays:
+        return values
+    return values.astype(np.result_type(*arrays), copy=False)
+
+
+def _when_active(active: typing.Union[bool, np.ndarray], value: _VectorisedFloat) -> _VectorisedFloat:
+    """
+    The given (time-independent) value when active, and zero otherwise. If
+    ``active`` is an array of per-time flags, the result has time as its
+    first axis.
+
+    """
+    if np.ndim(active) == 0:
+        return value if active else 0.
+    return np.where(_expand_in_time(np.asarray(active), np.ndim(value)), value, 0.)
+
+
 @dataclass(frozen=True)
 class Interval:
     """
@@ -78,18 +168,91 @@ class Interval:
     def boundaries(self) -> BoundarySequence_t:
         return ()
 
+    @method_cache
+    def boundaries_array(self) -> np.ndarray:
+        """
+        The boundaries of this interval as a (n, 2) float array of start and
+        end times, sorted and with any overlapping (or touching) boundaries
+        merged, such that the rows are disjoint.
+
+        """
+        return _merge_boundaries(np.array(self.boundaries(), dtype=float).reshape(-1, 2))
+
     def transition_times(self) -> typing.Set[float]:
         transitions = set()
         for start, end in self.boundaries():
             transitions.update([start, end])
         return transitions
 
-    def triggered(self, time: float) -> bool:
-        """Whether the given time falls inside this interval."""
-        for start, end in self.boundaries():
-            if start < time <= end:
-                return True
-        return False
+    @typing.overload
+    def triggered(self, time: float) -> bool: ...
+
+    @typing.overload
+    def triggered(self, time: np.ndarray) -> np.ndarray: ...
+
+    def triggered(self, time: _VectorisedTime) -> typing.Union[bool, np.ndarray]:
+        """
+        Whether the given time falls inside this interval.
+
+        The time may also be an array of times, in which case a boolean array
+        of the same shape is returned.
+        """
+        # The (disjoint) boundaries, flattened, are strictly increasing. A time
+        # is inside the interval if and only if it falls after a start time and
+        # no later than the following end time, i.e. at an odd insertion index.
+        index = np.searchsorted(self.boundaries_array().ravel(), time, side='left')
+        result = index % 2 == 1
+        if np.ndim(result) == 0:
+            return bool(result)
+        return result
+
+    def intersect(self, other: "Interval") -> "SpecificInterval":
+        """
+        The interval during which both this interval and the other one are
+        triggered.
+        """
+        boundaries, other_boundaries = self.boundaries_array(), other.boundaries_array()
+        starts = np.maximum.outer(boundaries[:, 0], other_boundaries[:, 0]).ravel()
+        ends = np.minimum.outer(boundaries[:, 1], other_boundaries[:, 1]).ravel()
+        overlapping = starts < ends
+        return _specific_interval_from_array(
+            np.column_stack([starts[overlapping], ends[overlapping]]))
+
+    def union(self, other: "Interval") -> "SpecificInterval":
+        """
+        The interval during which either this interval or the other one is
+        triggered.
+        """
+        return _specific_interval_from_array(_merge_boundaries(
+            np.concatenate([self.boundaries_array(), other.boundaries_array()])))
+
+
+def _merge_boundaries(boundaries: np.ndarray) -> np.ndarray:
+    """
+    Sort the given (n, 2) array of boundaries, dropping the empty ones and
+    merging those which overlap or touch.
+
+    """
+    boundaries = boundaries[boundaries[:, 0] < boundaries[:, 1]]
+    boundaries = boundaries[np.argsort(boundaries[:, 0], kind='stable')]
+    if len(boundaries) == 0:
+        return boundaries
+    running_end = np.maximum.accumulate(boundaries[:, 1])
+    new_group = np.concatenate([[True], boundaries[1:, 0] > running_end[:-1]])
+    group_index = np.flatnonzero(new_group)
+    return np.column_stack([
+        boundaries[group_index, 0],
+        np.maximum.reduceat(boundaries[:, 1], group_index),
+    ])
+
+
+def _specific_interval_from_array(boundaries: np.ndarray) -> "SpecificInterval":
+    # NOTE: It is important that the time type is float, not np.float, in
+    # order to allow hashability (for caching).
+    return SpecificInterval(present_times=tuple(
+        (float(start), float(end)) for start, end in _merge_boundaries(boundaries)
+    ))
+
 
 @dataclass(frozen=True)
 class SpecificInterval(Interval):
@@ -115,6 +278,7 @@ class PeriodicInterval(Interval):
     #: Time at which the first person (infected or exposed) arrives at the enclosed space.
     start: float = 0.0
 
+    @method_cache
     def boundaries(self) -> BoundarySequence_t:
         if self.period == 0 or self.duration == 0:
             return tuple()
@@ -129,9 +293,6 @@ class PeriodicInterval(Interval):
 @dataclass(frozen=True)
 class PiecewiseConstant:
 
-    # TODO: Implement rather a periodic version (24-hour period), where
-    # transition_times and values have the same length.
-
     #: transition times at which the function changes value (hours).
     transition_times: typing.Tuple[float, ...]
 
@@ -141,23 +302,49 @@ class PiecewiseConstant:
     def __post_init__(self):
         if len(self.transition_times) != len(self.values)+1:
             raise ValueError("transition_times must contain one more element than values")
+        self._validate()
+
+    def _validate(self):
         if tuple(sorted(set(self.transition_times))) != self.transition_times:
             raise ValueError("transition_times must not contain duplicated elements and must be sorted")
         shapes = [np.array(v).shape for v in self.values]
         if not all(shapes[0] == shape for shape in shapes):
             raise ValueError("All values must have the same shape")
 
-    def value(self, time) -> _VectorisedFloat:
-        if time <= self.transition_times[0]:
-            return self.values[0]
-        elif time > self.transition_times[-1]:
-            return self.values[-1]
+    @method_cache
+    def transition_times_array(self) -> np.ndarray:
+        """The transition times, as a float array."""
+        return np.array(self.transition_times, dtype=float)
 
-        for t1, t2, value in zip(self.transition_times[:-1],
-                                 self.transition_times[1:], self.values):
-            if t1 < time <= t2:
-                break
-        return value
+    @method_cache
+    def values_array(self) -> np.ndarray:
+        """The values, as an array with the values index as the first axis."""
+        return np.array(self.values)
+
+    def _value_index(self, time: _VectorisedTime) -> typing.Union[int, np.ndarray]:
+        # The index of the value in effect at the given time(s), i.e. ``i`` such
+        # that ``transition_times[i] < time <= transition_times[i + 1]``, with
+        # the first and last values extended beyond the transition times.
+        index = np.searchsorted(self.transition_times_array(), time, side='left') - 1
+        return np.clip(index, 0, len(self.values) - 1)
+
+    @typing.overload
+    def value(self, time: float) -> _VectorisedFloat: ...
+
+    @typing.overload
+    def value(self, time: np.ndarray) -> np.ndarray: ...
+
+    def value(self, time: _VectorisedTime) -> _VectorisedFloat:
+        """
+        The value of the function at the given time.
+
+        The time may also be a 1d array of times, in which case the result has
+        time as its first axis.
+        """
+        index = self._value_index(time)
+        if np.ndim(index) == 0:
+            return self.values[int(index)]
+        return self.values_array()[index]
 
     def interval(self) -> Interval:
         # Build an Interval object
@@ -173,6 +360,8 @@ class PiecewiseConstant:
         # using a linear interpolation in-between the initial mesh points
         refined_times = np.linspace(self.transition_times[0], self.transition_times[-1],
                                     (len(self.transition_times)-1) * refine_factor+1)
+        # scipy.interpolate is slow to import, and only needed here.
+        from scipy.interpolate import interp1d
         interpolator = interp1d(
             self.transition_times,
             np.concatenate([self.values, self.values[-1:]], axis=0),
@@ -185,6 +374,70 @@ class PiecewiseConstant:
         )
 
 
+@dataclass(frozen=True)
+class PeriodicPiecewiseConstant(PiecewiseConstant):
+    """
+    A piecewise constant function which repeats itself with the given period
+    (typically a day). Unlike :class:`PiecewiseConstant`, ``transition_times``
+    and ``values`` have the same length: ``values[i]`` applies from
+    ``transition_times[i]`` until the next transition time, and the last value
+    until the first transition time of the following period.
+
+    """
+    #: The period of the function (hours).
+    period: float = 24.
+
+    def __post_init__(self):
+        if len(self.transition_times) != len(self.values):
+            raise ValueError("transition_times must contain as many elements as values")
+        if not self.transition_times[-1] - self.transition_times[0] < self.period:
+            raise ValueError("transition_times must all fall within one period")
+        self._validate()
+
+    def _value_index(self, time: _VectorisedTime) -> typing.Union[int, np.ndarray]:
+        # Bring the time(s) back within the period (t0, t0 + period] which
+        # starts at the first transition time, before doing the lookup.
+        transition_times = self.transition_times_array()
+        start = transition_times[0]
+        time_in_period = start + np.mod(np.subtract(time, start), self.period)
+        index = np.searchsorted(transition_times, time_in_period, side='left') - 1
+        return np.mod(index, len(self.values))
+
+    def _period_boundaries(self) -> typing.List[typing.Tuple[float, float]]:
+        # The start and end time of each value, over the first period.
+        end_times = self.transition_times[1:] + (self.transition_times[0] + self.period, )
+        return list(zip(self.transition_times, end_times))
+
+    def interval(self) -> Interval:
+        # Build an Interval object, for the first period.
+        return SpecificInterval(present_times=tuple(
+            (t1, t2) for (t1, t2), value in zip(self._period_boundaries(), self.values)
+            if value
+        ))
+
+    def refine(self, refine_factor=10) -> "PeriodicPiecewiseConstant":
+        # Build a new PeriodicPiecewiseConstant object with a refined mesh,
+        # using a linear (periodic) interpolation in-between the initial
+        # mesh points.
+        closed_times = self.transition_times + (self.transition_times[0] + self.period, )
+        refined_times = np.concatenate([
+            np.linspace(t1, t2, refine_factor, endpoint=False)
+            for t1, t2 in self._period_boundaries()
+        ])
+        from scipy.interpolate import interp1d
+        interpolator = interp1d(
+            closed_times,
+            np.concatenate([self.values, self.values[:1]], axis=0),
+            axis=0)
+        return PeriodicPiecewiseConstant(
+            # NOTE: It is important that the time type is float, not np.float, in
+            # order to allow hashability (for caching).
+            tuple(float(time) for time in refined_times),
+            tuple(interpolator(refined_times)),
+            period=self.period,
+        )
+
+
 @dataclass(frozen=True)
 class Room:
     #: The total volume of the room
@@ -212,17 +465,23 @@ class _VentilationBase:
     def transition_times(self, room: Room) -> typing.Set[float]:
         raise NotImplementedError("Subclass must implement")
 
-    def air_exchange(self, room: Room, time: float) -> _VectorisedFloat:
+    def air_exchange(self, room: Room, time: _VectorisedTime) -> _VectorisedFloat:
         """
         Returns the rate at which air is being exchanged in the given room
         at a given time (in hours).
 
+        The time may also be a sorted 1d array of times (typically the state
+        change times of a model), in which case the result has time as its
+        first axis.
+
         Note that whilst the time is known inside this function, it may not
         be used to vary the result unless the specific time used is declared
         as part of a state change in the interval (e.g. when air_exchange == 0).
 
         """
-        return 0.
+        if np.ndim(time) == 0:
+            return 0.
+        return np.zeros(np.shape(time))
 
 
 @dataclass(frozen=True)
@@ -251,15 +510,26 @@ class MultipleVentilation(_VentilationBase):
             transitions.update(ventilation.transition_times(room))
         return transitions
 
-    def air_exchange(self, room: Room, time: float) -> _VectorisedFloat:
+    def air_exchange(self, room: Room, time: _VectorisedTime) -> _VectorisedFloat:
         """
         Returns the rate at which air is being exchanged in the given room
         at a given time (in hours).
         """
-        return np.array([
+        air_exchanges = [
             ventilation.air_exchange(room, time)
             for ventilation in self.ventilations
-        ]).sum(axis=0)
+        ]
+        if np.ndim(time) != 0:
+            # Each of the per-time results may have a different vectorisation.
+            ndim = max([np.ndim(air_exchange) - 1 for air_exchange in air_exchanges])
+            # Those without samples (e.g. of plain floats) take the dtype of
+            # those with samples.
+            sampled = [air_exchange for air_exchange in air_exchanges if np.ndim(air_exchange) > 1]
+            air_exchanges = [
+                _expand_in_time(_in_dtype_of(np.asarray(air_exchange), *sampled), ndim)
+                for air_exchange in air_exchanges
+            ]
+        return sum(air_exchanges)
 
 
 @dataclass(frozen=True)
@@ -297,14 +567,32 @@ class WindowOpening(Ventilation):
         transitions.update(self.outside_temp.transition_times)
         return transitions
 
-    def air_exchange(self, room: Room, time: float) -> _VectorisedFloat:
+    @method_cache
+    def _opening_factor(self) -> _VectorisedFloat:
+        """
+        The time (and room) independent part of the air exchange through the
+        window(s) when open, i.e. the discharge coefficient times the window
+        area, times the square root of the window height times gravity.
+
+        """
+        window_area = self.window_height * self.opening_length * self.number_of_windows
+        return self.discharge_coefficient * window_area * np.sqrt(9.81 * self.window_height)
+
+    def air_exchange(self, room: Room, time: _VectorisedTime) -> _VectorisedFloat:
+        active = self.active.triggered(time)
         # If the window is shut, no air is being exchanged.
-        if not self.active.triggered(time):
-            return 0.
+        if not np.any(active):
+            return super().air_exchange(room, time)
 
         # Reminder, no dependence on time in the resulting calculation.
         inside_temp: _VectorisedFloat = room.inside_temp.value(time)
         outside_temp: _VectorisedFloat = self.outside_temp.value(time)
+        factor = (3600 / (3 * room.volume)) * self._opening_factor()
+        if np.ndim(time) != 0:
+            # Align the per-time temperatures with the vectorised parameters.
+            ndim = max([np.ndim(factor), np.ndim(inside_temp) - 1, np.ndim(outside_temp) - 1])
+            inside_temp = _expand_in_time(_in_dtype_of(np.asarray(inside_temp), factor), ndim)
+            outside_temp = _expand_in_time(_in_dtype_of(np.asarray(outside_temp), factor), ndim)
 
         # The inside_temperature is forced to be always at least min_deltaT degree
         # warmer than the outside_temperature. Further research needed to
@@ -312,9 +600,10 @@ class WindowOpening(Ventilation):
         # is inverted.
         inside_temp = np.maximum(inside_temp, outside_temp + self.min_deltaT)  # type: ignore
         temp_gradient = (inside_temp - outside_temp) / outside_temp
-        root = np.sqrt(9.81 * self.window_height * temp_gradient)
-        window_area = self.window_height * self.opening_length * self.number_of_windows
-        return (3600 / (3 * room.volume)) * self.discharge_coefficient * window_area * root
+        result = factor * np.sqrt(temp_gradient)
+        if np.ndim(time) == 0:
+            return result
+        return np.where(_expand_in_time(np.asarray(active), np.ndim(result) - 1), result, 0.)
 
 
 @dataclass(frozen=True)
@@ -357,13 +646,10 @@ class HingedWindow(WindowOpening):
         ESFA Output Specification Annex 2F on Ventilation opening areas.
         """
         window_ratio = np.array(self.window_width / self.window_height)
-        coefs = np.empty(window_ratio.shape + (2, ), dtype=np.float64)
-
-        coefs[window_ratio < 0.5] = (0.06, 0.612)
-        coefs[np.bitwise_and(0.5 <= window_ratio, window_ratio < 1)] = (0.048, 0.589)
-        coefs[np.bitwise_and(1 <= window_ratio, window_ratio < 2)] = (0.04, 0.563)
-        coefs[window_ratio >= 2] = (0.038, 0.548)
-        M, cd_max = coefs.T
+        dtype = np.result_type(window_ratio.dtype, np.float32)
+        ratio_ranges = [window_ratio < 0.5, window_ratio < 1, window_ratio < 2]
+        M = np.select(ratio_ranges, list(np.array([0.06, 0.048, 0.04], dtype=dtype)), dtype.type(0.038))
+        cd_max = np.select(ratio_ranges, list(np.array([0.612, 0.589, 0.563], dtype=dtype)), dtype.type(0.548))
 
         window_angle = 2.*np.rad2deg(np.arcsin(self.opening_length/(2.*self.window_height)))
         return cd_max*(1-np.exp(-M*window_angle))
@@ -378,12 +664,10 @@ class HEPAFilter(Ventilation):
     # in m^3/h
     q_air_mech: _VectorisedFloat
 
-    def air_exchange(self, room: Room, time: float) -> _VectorisedFloat:
+    def air_exchange(self, room: Room, time: _VectorisedTime) -> _VectorisedFloat:
         # If the HEPA is off, no air is being exchanged.
-        if not self.active.triggered(time):
-            return 0.
         # Reminder, no dependence on time in the resulting calculation.
-        return self.q_air_mech / room.volume
+        return _when_active(self.active.triggered(time), self.q_air_mech / room.volume)
 
 
 @dataclass(frozen=True)
@@ -395,12 +679,10 @@ class HVACMechanical(Ventilation):
     # in m^3/h
     q_air_mech: _VectorisedFloat
 
-    def air_exchange(self, room: Room, time: float) -> _VectorisedFloat:
+    def air_exchange(self, room: Room, time: _VectorisedTime) -> _VectorisedFloat:
         # If the HVAC is off, no air is being exchanged.
-        if not self.active.triggered(time):
-            return 0.
         # Reminder, no dependence on time in the resulting calculation.
-        return self.q_air_mech / room.volume
+        return _when_active(self.active.triggered(time), self.q_air_mech / room.volume)
 
 
 @dataclass(frozen=True)
@@ -412,13 +694,11 @@ class AirChange(Ventilation):
     # of the room (when switched on)
     air_exch: _VectorisedFloat
 
-    def air_exchange(self, room: Room, time: float) -> _VectorisedFloat:
+    def air_exchange(self, room: Room, time: _VectorisedTime) -> _VectorisedFloat:
         # No dependence on the room volume.
         # If off, no air is being exchanged.
-        if not self.active.triggered(time):
-            return 0.
         # Reminder, no dependence on time in the resulting calculation.
-        return self.air_exch
+        return _when_active(self.active.triggered(time), self.air_exch)
 
 
 @dataclass(frozen=True)
@@ -538,7 +818,7 @@ class Mask:
         intermediate_range1 = np.bitwise_and(0.5 <= d, d < 0.94614)
         intermediate_range2 = np.bitwise_and(0.94614 <= d, d < 3.)
 
-        eta_out = np.empty(d.shape, dtype=np.float64)
+        eta_out = np.empty(d.shape, dtype=np.result_type(d.dtype, np.float32))
 
         eta_out[d < 0.5] = 0.
         eta_out[intermediate_range1] = 0.5893 * d[intermediate_range1] + 0.1546
@@ -574,6 +854,11 @@ class Particle:
     #: diameter of the aerosol in microns
     diameter: typing.Union[None,_VectorisedFloat] = None
 
+    #: Weight of each diameter in the integral over the aerosol diameters,
+    #: relative to equally weighted (i.e. randomly sampled) diameters. Used
+    #: when the diameters are the nodes of a quadrature rule.
+    diameter_weight: _VectorisedFloat = 1.
+
     def settling_velocity(self, evaporation_factor: float=0.3) -> _VectorisedFloat:
         """
         Settling velocity (i.e. speed of deposition on the floor due
@@ -661,14 +946,18 @@ class Expiration(_ExpirationBase):
     # to c_n,i in Eq. (4) of https://doi.org/10.1101/2021.10.14.21264988)
     cn: float = 1.
 
+    #: Weight of each diameter in the integral over the aerosol diameters
+    #: (see :attr:`Particle.diameter_weight`). The aerosol volume at each
+    #: diameter is weighted accordingly.
+    diameter_weight: _VectorisedFloat = 1.
+
     @property
     def particle(self) -> Particle:
         """
         The Particle object representing the aerosol
         """
-        return Particle(diameter=self.diameter)
+        return Particle(diameter=self.diameter, diameter_weight=self.diameter_weight)
 
-    @cached()
     def aerosols(self, mask: Mask):
         """ 
         Total volume of aerosols expired per volume of exhaled air.
@@ -678,16 +967,16 @@ class Expiration(_ExpirationBase):
             return (np.pi * d**3) / 6.
 
         # Final result converted from microns^3/cm3 to mL/cm^3
-        return self.cn * (volume(self.diameter) *
+        return self.cn * self.diameter_weight * (volume(self.diameter) *
                 (1 - mask.exhale_efficiency(self.diameter))) * 1e-12
 
-    @cached()
+    @method_cache
     def jet_origin_concentration(self):
         def volume(d):
             return (np.pi * d**3) / 6.
         
         # Final result converted from microns^3/cm3 to mL/m3
-        return self.cn * volume(self.diameter) * 1e-6
+        return self.cn * self.diameter_weight * volume(self.diameter) * 1e-6
 
 
 @dataclass(frozen=True)
@@ -877,6 +1166,7 @@ class InfectedPopulation(_PopulationWithVirus):
         """
         return self.virus.viable_to_RNA_ratio * (1 - self.host_immunity)
 
+    @method_cache
     def aerosols(self):
         """
         Total volume of aerosols expired per volume of exhaled air (mL/cm^3).
@@ -896,7 +1186,7 @@ class InfectedPopulation(_PopulationWithVirus):
 
         ER = (self.virus.viral_load_in_sputum *
               self.activity.exhalation_rate *
-              10 ** 6)
+              1e6)
 
         return ER * self.number
 
@@ -923,18 +1213,70 @@ class ConcentrationModel:
     def virus(self):
         return self.infected.virus
 
-    def infectious_virus_removal_rate(self, time: float) -> _VectorisedFloat:
+    @method_cache
+    def _deposition_rate(self) -> _VectorisedFloat:
+        """
+        The rate (h^-1) at which the particles deposit on the floor, which
+        does not depend on time.
+        """
         # Equilibrium velocity of particle motion toward the floor
         vg = self.infected.particle.settling_velocity(self.evaporation_factor)
         # Height of the emission source to the floor - i.e. mouth/nose (m)
         h = 1.5
         # Deposition rate (h^-1)
-        k = (vg * 3600) / h
+        return (vg * 3600) / h
+
+    def infectious_virus_removal_rate(self, time: _VectorisedTime) -> _VectorisedFloat:
+        """
+        The rate (h^-1) at which infectious viruses are removed from the air,
+        by deposition, biological decay and ventilation.
+
+        The time may also be a sorted 1d array of times (e.g. the state
+        change times), in which case the result has time as its first axis.
+        """
+        k = self._deposition_rate()
+        inside_temp = self.room.inside_temp.value(time)
+        air_exchange = self.ventilation.air_exchange(self.room, time)
+        if np.ndim(time) != 0:
+            # Align the per-time values with the time-independent ones.
+            ndim = max([np.ndim(k), np.ndim(self.room.humidity),
+                        np.ndim(inside_temp) - 1, np.ndim(air_exchange) - 1])
+            # The per-time values take the dtype of the sampled parameters.
+            sampled = [k, self.room.humidity] + ([air_exchange] if np.ndim(air_exchange) > 1 else [])
+            inside_temp = _expand_in_time(_in_dtype_of(np.asarray(inside_temp), *sampled), ndim)
+            air_exchange = _expand_in_time(_in_dtype_of(np.asarray(air_exchange), *sampled), ndim)
         return (
-            k + self.virus.decay_constant(self.room.humidity, self.room.inside_temp.value(time))
-            + self.ventilation.air_exchange(self.room, time)
+            k + self.virus.decay_constant(self.room.humidity, inside_temp)
+            + air_exchange
         )
 
+    @method_cache
+    def _state_change_removal_rates(self) -> np.ndarray:
+        """
+        The infectious virus removal rate over each of the state change
+        intervals, i.e. at ``state_change_times()[1:]``, evaluated at once
+        with the state change interval as the first axis.
+
+        """
+        state_change_times = np.array(self.state_change_times()[1:])
+        removal_rates = self.infectious_virus_removal_rate(state_change_times)
+        if np.ndim(removal_rates) == 0:
+            # A time-independent removal rate applies to every interval.
+            return np.full(state_change_times.shape, removal_rates)
+        return np.asarray(removal_rates)
+
+    def _removal_rate_at(self, time: float) -> _VectorisedFloat:
+        """
+        The infectious virus removal rate at the given time, looked up in
+        :meth:`_state_change_removal_rates` if it is a state change time.
+
+        """
+        state_change_times = self.state_change_times()
+        index = int(np.searchsorted(state_change_times, time, side='left'))
+        if 0 < index < len(state_change_times) and state_change_times[index] == time:
+            return self._state_change_removal_rates()[index - 1]
+        return self.infectious_virus_removal_rate(time)
+
     @method_cache
     def _normed_concentration_limit(self, time: float) -> _VectorisedFloat:
         """
@@ -949,7 +1291,7 @@ class ConcentrationModel:
         if not self.infected.person_present(time):
             return 0.
         V = self.room.volume
-        IVRR = self.infectious_virus_removal_rate(time)
+        IVRR = self._removal_rate_at(time)
 
         return 1. / (IVRR * V)
 
@@ -1010,6 +1352,56 @@ class ConcentrationModel:
         # calculations for the same time (e.g. at state change times).
         return self._normed_concentration(time)
 
+    @method_cache
+    def _normed_integrated_concentration_table(self) -> typing.Tuple[
+            typing.List[_VectorisedFloat], typing.List[_VectorisedFloat]]:
+        """
+        The integrated long-range concentration, normalized by the emission
+        rate, between t=0 and each of the state change times, along with the
+        normed concentration at each of the state change times.
+
+        The table is built once, in a single forward pass over the state
+        change times, such that an integral over any number of whole state
+        change intervals is a simple difference of two of its entries.
+
+        """
+        state_change_times = self.state_change_times()
+        first_presence_time = self._first_presence_time()
+        removal_rates = self._state_change_removal_rates()
+        integrals: typing.List[_VectorisedFloat] = [0.]
+        concentrations: typing.List[_VectorisedFloat] = [0.]
+        for IVRR, t_last_state_change, next_state_change_time in zip(
+                removal_rates, state_change_times[:-1], state_change_times[1:]):
+            # The concentration is zero until the first presence.
+            if next_state_change_time <= first_presence_time:
+                integrals.append(0.)
+                concentrations.append(0.)
+                continue
+            conc_limit = self._normed_concentration_limit(next_state_change_time)
+            delta_time = next_state_change_time - t_last_state_change
+            fac = np.exp(-IVRR * delta_time)
+            integrals.append(
+                integrals[-1] + conc_limit * delta_time +
+                (conc_limit - concentrations[-1]) * (fac - 1) / IVRR
+            )
+            concentrations.append(conc_limit * (1 - fac) + concentrations[-1] * fac)
+        return integrals, concentrations
+
+    def _state_change_interval(self, time: float) -> int:
+        """
+        The index of the state change interval containing the given time, i.e.
+        the index ``i`` such that ``state_change_times()[i] < time <=
+        state_change_times()[i + 1]``.
+
+        """
+        state_change_times = self.state_change_times()
+        if time > state_change_times[-1]:
+            raise ValueError(
+                f"The requested time ({time}) is greater than last available "
+                f"state change time ({state_change_times[-1]})"
+            )
+        return max([int(np.searchsorted(state_change_times, time, side='left')) - 1, 0])
+
     def _normed_concentration(self, time: float) -> _VectorisedFloat:
         """
         Virus long-range exposure concentration, as a function of time, and
@@ -1021,32 +1413,103 @@ class ConcentrationModel:
         Note that time is not vectorised. You can only pass a single float
         to this method.
         """
-        # The model always starts at t=0, but we avoid running concentration calculations
-        # before the first presence as an optimisation.
         if time <= self._first_presence_time():
             return 0.0
-        next_state_change_time = self._next_state_change(time)
-        IVRR = self.infectious_virus_removal_rate(next_state_change_time)
+        index = self._state_change_interval(time)
+        t_last_state_change, next_state_change_time = self.state_change_times()[index:index + 2]
+        IVRR = self._state_change_removal_rates()[index]
         conc_limit = self._normed_concentration_limit(next_state_change_time)
-
-        t_last_state_change = self.last_state_change(time)
-        conc_at_last_state_change = self._normed_concentration_cached(t_last_state_change)
+        _, concentrations = self._normed_integrated_concentration_table()
+        conc_at_last_state_change = concentrations[index]
 
         delta_time = time - t_last_state_change
         fac = np.exp(-IVRR * delta_time)
         return conc_limit * (1 - fac) + conc_at_last_state_change * fac
 
-    def concentration(self, time: float) -> _VectorisedFloat:
+    def _normed_concentration_sweep(self, times: np.ndarray) -> np.ndarray:
+        """
+        Virus long-range exposure concentration, normalized by the emission
+        rate, at each of the given (sorted) times, with time as the first axis.
+
+        This is the array equivalent of :meth:`_normed_concentration`: a
+        single pass is made over the times, each of which is evaluated from
+        the concentration at the last state change before it, as given by
+        :meth:`_normed_integrated_concentration_table`.
+
+        """
+        times = np.asarray(times, dtype=float)
+        state_change_times = self.state_change_times()
+        if np.any(np.diff(times) < 0):
+            raise ValueError("The requested times must be sorted in increasing order")
+        if len(times) > 0 and times[-1] > state_change_times[-1]:
+            raise ValueError(
+                f"The requested time ({times[-1]}) is greater than last available "
+                f"state change time ({state_change_times[-1]})"
+            )
+
+        # The model always starts at t=0, but the concentration is zero up
+        # until (and including) the first presence.
+        first_presence_time = self._first_presence_time()
+        _, concentrations = self._normed_integrated_concentration_table()
+        removal_rates = self._state_change_removal_rates()
+        indices = np.maximum(np.searchsorted(state_change_times, times, side='left') - 1, 0)
+        normed_concentrations: typing.List[_VectorisedFloat] = []
+        for time, index in zip(times, indices):
+            if time <= first_presence_time:
+                normed_concentrations.append(0.)
+                continue
+            conc_limit = self._normed_concentration_limit(state_change_times[index + 1])
+            fac = np.exp(-removal_rates[index] * (time - state_change_times[index]))
+            normed_concentrations.append(conc_limit * (1 - fac) + concentrations[index] * fac)
+        return _stack_in_time(normed_concentrations)
+
+    @typing.overload
+    def concentration(self, time: float) -> _VectorisedFloat: ...
+
+    @typing.overload
+    def concentration(self, time: np.ndarray) -> np.ndarray: ...
+
+    def concentration(self, time: _VectorisedTime) -> _VectorisedFloat:
         """
         Virus long-range exposure concentration, as a function of time.
 
-        Note that time is not vectorised. You can only pass a single float
-        to this method.
+        The time may either be a single float, or a sorted 1d array of times.
+        In the latter case the result has time as its first axis (i.e. a shape
+        of ``(n_times, n_samples)`` for a vectorised model).
         """
-        return (self._normed_concentration_cached(time) * 
-                self.infected.emission_rate_when_present())
+        if np.ndim(time) == 0:
+            return (self._normed_concentration_cached(time) *
+                    self.infected.emission_rate_when_present())
+
+        emission_rate = self.infected.emission_rate_when_present()
+        normed_concentrations = self._normed_concentration_sweep(np.asarray(time))
+        return _expand_in_time(normed_concentrations, np.ndim(emission_rate)) * emission_rate
+
+    @method_cache(maxsize=8)
+    def _normed_integrated_concentration_partial(self, time: float) -> typing.Tuple[int, _VectorisedFloat]:
+        """
+        The index of the state change interval containing the given time
+        (see :meth:`_state_change_interval`), and the integrated normed
+        concentration between the start of that interval and the time.
+        Times beyond the last state change are clipped to it.
+
+        """
+        if time <= self._first_presence_time():
+            return 0, 0.
+        state_change_times = self.state_change_times()
+        time = min([time, state_change_times[-1]])
+        index = self._state_change_interval(time)
+        IVRR = self._state_change_removal_rates()[index]
+        conc_limit = self._normed_concentration_limit(state_change_times[index + 1])
+        _, concentrations = self._normed_integrated_concentration_table()
+        conc_at_last_state_change = concentrations[index]
+
+        delta_time = time - state_change_times[index]
+        return index, (
+            conc_limit * delta_time +
+            (conc_limit - conc_at_last_state_change) * (np.exp(-IVRR*delta_time)-1) / IVRR
+        )
 
-    @method_cache
     def normed_integrated_concentration(self, start: float, stop: float) -> _VectorisedFloat:
         """
         Get the integrated long-range concentration of viruses in the air  between the times start and stop,
@@ -1054,27 +1517,18 @@ class ConcentrationModel:
         """
         if stop <= self._first_presence_time():
             return 0.0
-        state_change_times = self.state_change_times()
-        req_start, req_stop = start, stop
-        total_normed_concentration = 0.
-        for interval_start, interval_stop in zip(state_change_times[:-1], state_change_times[1:]):
-            if req_start > interval_stop or req_stop < interval_start:
-                continue
-            # Clip the current interval to the requested range.
-            start = max([interval_start, req_start])
-            stop = min([interval_stop, req_stop])
-
-            conc_start = self._normed_concentration_cached(start)
-
-            next_conc_state = self._next_state_change(stop)
-            conc_limit = self._normed_concentration_limit(next_conc_state)
-            IVRR = self.infectious_virus_removal_rate(next_conc_state)
-            delta_time = stop - start
-            total_normed_concentration += (
-                conc_limit * delta_time +
-                (conc_limit - conc_start) * (np.exp(-IVRR*delta_time)-1) / IVRR
-            )
-        return total_normed_concentration
+        start_index, start_partial = self._normed_integrated_concentration_partial(start)
+        stop_index, stop_partial = self._normed_integrated_concentration_partial(stop)
+        if start_index == stop_index:
+            return stop_partial - start_partial
+
+        # The whole state change intervals in between are given by the
+        # cumulative integrals at the state changes.
+        integrals, _ = self._normed_integrated_concentration_table()
+        return (
+            (integrals[stop_index] - integrals[start_index]) +
+            (stop_partial - start_partial)
+        )
 
     def integrated_concentration(self, start: float, stop: float) -> _VectorisedFloat:
         """
@@ -1130,50 +1584,90 @@ class ShortRangeModel:
 
         distances = np.array(self.distance)
 
-        factors = np.empty(distances.shape, dtype=np.float64)
-        factors[distances < xstar] = 2*Cr1*(distances[distances < xstar]
-                                        + x01)/D
-        factors[distances >= xstar] = Sxstar[distances >= xstar]*(1 +
-            Cr2*(distances[distances >= xstar] -
-            xstar[distances >= xstar])/Cr1/(xstar[distances >= xstar]
-            + x01))**3
-        return factors
+        return np.where(
+            distances < xstar,
+            2*Cr1*(distances + x01)/D,
+            Sxstar*(1 + Cr2*(distances - xstar)/Cr1/(xstar + x01))**3,
+        )
+
+    def _normed_concentration_given_long_range(self, concentration_model: ConcentrationModel,
+                                               long_range_concentration: _VectorisedFloat) -> _VectorisedFloat:
+        """
+        Virus short-range exposure concentration normalized by the virus viral
+        load, given the long-range concentration at the same time.
+        """
+        dilution = self.dilution_factor()
+        jet_origin_concentration = self.expiration.jet_origin_concentration()
+        # Long-range concentration normalized by the virus viral load
+        long_range_normed_concentration = (long_range_concentration /
+                                    concentration_model.virus.viral_load_in_sputum)
+
+        # The long-range concentration values are then approximated using interpolation:
+        # The set of points where we want the interpolated values are the short-range particle diameters (given the current expiration); 
+        # The set of points with a known value are the long-range particle diameters (given the initial expiration);
+        # The set of known values are the long-range concentration values normalized by the viral load.
+        # The diameter weights of the long-range values are replaced by those of the short-range diameters.
+        long_range_particle = concentration_model.infected.particle
+        long_range_normed_concentration_interpolated=_interp(self.expiration.particle.diameter, 
+                            long_range_particle.diameter,
+                            long_range_normed_concentration / long_range_particle.diameter_weight,
+                            ) * self.expiration.particle.diameter_weight
+
+        # Short-range concentration formula. The long-range concentration is added in the concentration method (ExposureModel).
+        # based on continuum model proposed by Jia et al (2022) - https://doi.org/10.1016/j.buildenv.2022.109166
+        return ((1/dilution)*(jet_origin_concentration - long_range_normed_concentration_interpolated))
+
+    @typing.overload
+    def _normed_concentration(self, concentration_model: ConcentrationModel, time: float) -> _VectorisedFloat: ...
 
-    def _normed_concentration(self, concentration_model: ConcentrationModel, time: float) -> _VectorisedFloat:
+    @typing.overload
+    def _normed_concentration(self, concentration_model: ConcentrationModel, time: np.ndarray) -> np.ndarray: ...
+
+    def _normed_concentration(self, concentration_model: ConcentrationModel, time: _VectorisedTime) -> _VectorisedFloat:
         """
         Virus short-range exposure concentration, as a function of time.
 
         If the given time falls within a short-range interval it returns the 
         short-range concentration normalized by the virus viral load. Otherwise
         it returns 0.
+        For a sorted array of times, the result has time as its first axis.
         """ 
         start, stop = self.presence.boundaries()[0]
-        # Verifies if the given time falls within a short-range interaction
-        if start <= time <= stop:
-            dilution = self.dilution_factor()
-            jet_origin_concentration = self.expiration.jet_origin_concentration()
-            # Long-range concentration normalized by the virus viral load
-            long_range_normed_concentration = (concentration_model.concentration(time) / 
-                                        concentration_model.virus.viral_load_in_sputum)
-            
-            # The long-range concentration values are then approximated using interpolation:
-            # The set of points where we want the interpolated values are the short-range particle diameters (given the current expiration); 
-            # The set of points with a known value are the long-range particle diameters (given the initial expiration);
-            # The set of known values are the long-range concentration values normalized by the viral load.
-            long_range_normed_concentration_interpolated=np.interp(self.expiration.particle.diameter, 
-                                concentration_model.infected.particle.diameter, long_range_normed_concentration)
-            
-            # Short-range concentration formula. The long-range concentration is added in the concentration method (ExposureModel).
-            # based on continuum model proposed by Jia et al (2022) - https://doi.org/10.1016/j.buildenv.2022.109166
-            return ((1/dilution)*(jet_origin_concentration - long_range_normed_concentration_interpolated))
-        return 0.
-
-    def short_range_concentration(self, concentration_model: ConcentrationModel, time: float) -> _VectorisedFloat:
+        if np.ndim(time) == 0:
+            # Verifies if the given time falls within a short-range interaction
+            if start <= time <= stop:
+                return self._normed_concentration_given_long_range(
+                    concentration_model, concentration_model.concentration(time))
+            return 0.
+
+        # The short-range concentration is evaluated at once for all of the
+        # times within the interaction (the long-range concentration having
+        # time as its first axis), and is zero at the other times.
+        times = np.asarray(time, dtype=float)
+        within = (start <= times) & (times <= stop)
+        normed_concentrations = np.asarray(self._normed_concentration_given_long_range(
+            concentration_model, concentration_model.concentration(times)[within]))
+        result = np.zeros((len(times),) + normed_concentrations.shape[1:], dtype=normed_concentrations.dtype)
+        result[within] = normed_concentrations
+        return result
+
+    @typing.overload
+    def short_range_concentration(self, concentration_model: ConcentrationModel, time: float) -> _VectorisedFloat: ...
+
+    @typing.overload
+    def short_range_concentration(self, concentration_model: ConcentrationModel, time: np.ndarray) -> np.ndarray: ...
+
+    def short_range_concentration(self, concentration_model: ConcentrationModel, time: _VectorisedTime) -> _VectorisedFloat:
         """
         Virus short-range exposure concentration, as a function of time.
         """
-        return (self._normed_concentration(concentration_model, time) * 
-            concentration_model.virus.viral_load_in_sputum)
+        if np.ndim(time) == 0:
+            return (self._normed_concentration(concentration_model, time) * 
+                concentration_model.virus.viral_load_in_sputum)
+        times = np.asarray(time, dtype=float)
+        viral_load = concentration_model.virus.viral_load_in_sputum
+        return (_expand_in_time(self._normed_concentration(concentration_model, times), np.ndim(viral_load)) *
+                viral_load)
 
     @method_cache
     def _normed_short_range_concentration_cached(self, concentration_model: ConcentrationModel, time: float) -> _VectorisedFloat:
@@ -1194,17 +1688,10 @@ class ShortRangeModel:
         if time1>time2:
             raise ValueError("time1 must be less or equal to time2")
 
-        start, stop = self.presence.boundaries()[0]
-        if (stop < time1) or (start > time2):
+        overlap = self.presence.intersect(SpecificInterval(present_times=((time1, time2), )))
+        if not overlap.present_times:
             return (0, 0)
-        elif start <= time1 and time2<= stop:
-            return time1, time2
-        elif start <= time1 and stop < time2:
-            return time1, stop
-        elif time1 < start and time2 <= stop:
-            return start, time2
-        elif time1 <= start and stop < time2:
-            return start, stop
+        return overlap.present_times[0]
 
     def _normed_jet_exposure_between_bounds(self,
                     concentration_model: ConcentrationModel,
@@ -1240,11 +1727,12 @@ class ShortRangeModel:
                 /concentration_model.virus.viral_load_in_sputum
                 /concentration_model.infected.activity.exhalation_rate
                 )
-        normed_int_concentration_interpolated = np.interp(
+        long_range_particle = concentration_model.infected.particle
+        normed_int_concentration_interpolated = _interp(
                 self.expiration.particle.diameter,
-                concentration_model.infected.particle.diameter,
-                normed_int_concentration
-                )
+                long_range_particle.diameter,
+                normed_int_concentration / long_range_particle.diameter_weight,
+                ) * self.expiration.particle.diameter_weight
         return normed_int_concentration_interpolated
 
 
@@ -1269,6 +1757,7 @@ class ExposureModel:
     #: The number of times the exposure event is repeated (default 1).
     repeats: int = 1
 
+    @method_cache
     def long_range_fraction_deposited(self) -> _VectorisedFloat:
         """
         The fraction of particles actually deposited in the respiratory
@@ -1283,42 +1772,67 @@ class ExposureModel:
         The number of virions per meter^3 between any two times, normalized 
         by the emission rate of the infected population
         """
-        exposure = 0.
-        for start, stop in self.exposed.presence.boundaries():
-            if stop < time1:
-                continue
-            elif start > time2:
-                break
-            elif start <= time1 and time2<= stop:
-                exposure += self.concentration_model.normed_integrated_concentration(time1, time2)
-            elif start <= time1 and stop < time2:
-                exposure += self.concentration_model.normed_integrated_concentration(time1, stop)
-            elif time1 < start and time2 <= stop:
-                exposure += self.concentration_model.normed_integrated_concentration(start, time2)
-            elif time1 <= start and stop < time2:
-                exposure += self.concentration_model.normed_integrated_concentration(start, stop)
+        exposure: _VectorisedFloat = 0.
+        bounds = SpecificInterval(present_times=((time1, time2), ))
+        for start, stop in self.exposed.presence.intersect(bounds).boundaries():
+            exposure += self.concentration_model.normed_integrated_concentration(start, stop)
         return exposure
 
-    def concentration(self, time: float) -> _VectorisedFloat:
+    @typing.overload
+    def concentration(self, time: float) -> _VectorisedFloat: ...
+
+    @typing.overload
+    def concentration(self, time: np.ndarray) -> np.ndarray: ...
+
+    def concentration(self, time: _VectorisedTime) -> _VectorisedFloat:
         """
         Virus exposure concentration, as a function of time.
 
         It considers the long-range concentration with the
         contribution of the short-range concentration.
+        The time may either be a single float, or a sorted 1d array of times
+        (see :meth:`ConcentrationModel.concentration`).
         """
-        concentration = self.concentration_model.concentration(time)
-        for interaction in self.short_range:
-            concentration += interaction.short_range_concentration(self.concentration_model, time)
-        return concentration
+        if np.ndim(time) == 0:
+            concentration = self.concentration_model.concentration(time)
+            for interaction in self.short_range:
+                concentration += interaction.short_range_concentration(self.concentration_model, time)
+            return concentration
 
-    def long_range_deposited_exposure_between_bounds(self, time1: float, time2: float) -> _VectorisedFloat:
-        deposited_exposure = 0.
+        times = np.asarray(time, dtype=float)
+        concentrations = self.concentration_model.concentration(times)
+        for interaction in self.short_range:
+            short_range_concentrations = interaction.short_range_concentration(
+                self.concentration_model, times)
+            ndim = max([concentrations.ndim, short_range_concentrations.ndim])
+            concentrations = (_expand_in_time(concentrations, ndim - 1) +
+                              _expand_in_time(short_range_concentrations, ndim - 1))
+        return concentrations
 
-        emission_rate_per_aerosol = self.concentration_model.infected.emission_rate_per_aerosol_when_present()
-        aerosols = self.concentration_model.infected.aerosols()
-        f_inf = self.concentration_model.infected.fraction_of_infectious_virus()
-        fdep = self.long_range_fraction_deposited()
+    @method_cache
+    def _long_range_deposition_factors(self) -> typing.Tuple[_VectorisedFloat, _VectorisedFloat]:
+        """
+        The diameter-dependent and the diameter-independent factors which,
+        applied to the long-range normed exposure, give the long-range
+        deposited exposure (see :meth:`_long_range_deposited_exposure`).
+        """
+        infected = self.concentration_model.infected
+        diameter_dependent = infected.aerosols() * self.long_range_fraction_deposited()
+        # The diameter-independent quantity emission_rate_per_aerosol,
+        # the parameters of the vD equation (i.e. BR_k and n_in), and the
+        # fraction of infectious virus of the vD equation.
+        diameter_independent = (infected.emission_rate_per_aerosol_when_present() *
+                self.exposed.activity.inhalation_rate *
+                (1 - self.exposed.mask.inhale_efficiency()) *
+                infected.fraction_of_infectious_virus())
+        return diameter_dependent, diameter_independent
 
+    def _long_range_deposited_exposure(self, normed_exposure: _VectorisedFloat) -> _VectorisedFloat:
+        """
+        The long-range deposited exposure, given the long-range normed exposure
+        over the same period (see :meth:`_long_range_normed_exposure_between_bounds`).
+        """
+        diameter_dependent, diameter_independent = self._long_range_deposition_factors()
         diameter = self.concentration_model.infected.particle.diameter
 
         if not np.isscalar(diameter) and diameter is not None:
@@ -1326,45 +1840,59 @@ class ExposureModel:
             # to perform properly the Monte-Carlo integration over
             # particle diameters (doing things in another order would
             # lead to wrong results for the probability of infection).
-            dep_exposure_integrated = np.array(self._long_range_normed_exposure_between_bounds(time1, time2) *
-                                                aerosols *
-                                                fdep).mean()
+            dep_exposure_integrated = _mean_over_samples(normed_exposure * diameter_dependent)
         else:
             # In the case of a single diameter or no diameter defined,
             # one should not take any mean at this stage.
-            dep_exposure_integrated = self._long_range_normed_exposure_between_bounds(time1, time2)*aerosols*fdep
+            dep_exposure_integrated = normed_exposure * diameter_dependent
 
-        # Then we multiply by the diameter-independent quantity emission_rate_per_aerosol,
-        # and parameters of the vD equation (i.e. BR_k and n_in).
-        deposited_exposure += (dep_exposure_integrated * emission_rate_per_aerosol * 
-                self.exposed.activity.inhalation_rate * 
-                (1 - self.exposed.mask.inhale_efficiency()))
+        # Then we multiply by the diameter-independent quantities.
+        return dep_exposure_integrated * diameter_independent
 
-        # In the end we multiply the final results by the fraction of infectious virus of the vD equation.
-        return deposited_exposure * f_inf
+    def long_range_deposited_exposure_between_bounds(self, time1: float, time2: float) -> _VectorisedFloat:
+        return self._long_range_deposited_exposure(
+            self._long_range_normed_exposure_between_bounds(time1, time2))
 
-    def deposited_exposure_between_bounds(self, time1: float, time2: float) -> _VectorisedFloat:
+    def _short_range_normed_exposures_between_bounds(
+            self, time1: float, time2: float) -> typing.List[typing.Tuple[_VectorisedFloat, _VectorisedFloat]]:
         """
-        The number of virus per m^3 deposited on the respiratory tract
-        between any two times.
-
-        Considers a contribution between the short-range and long-range exposures:
-        It calculates the deposited exposure given a short-range interaction (if any).
-        Then, the deposited exposure given the long-range interactions is added to the
-        initial deposited exposure. 
+        The normed jet exposure, and the normed interpolated long-range
+        exposure, of each short-range interaction between any two times.
         """
-        deposited_exposure = 0.
-        for interaction in self.short_range:
-            start, stop = interaction.extract_between_bounds(time1, time2)
-            short_range_jet_exposure = interaction._normed_jet_exposure_between_bounds(
-                                        self.concentration_model, start, stop)
-            short_range_lr_exposure = interaction._normed_interpolated_longrange_exposure_between_bounds(
-                                        self.concentration_model, start, stop)
-            dilution = interaction.dilution_factor()
-
-            fdep = interaction.expiration.particle.fraction_deposited(evaporation_factor=1.0)
+        return [
+            (interaction._normed_jet_exposure_between_bounds(self.concentration_model, time1, time2),
+             interaction._normed_interpolated_longrange_exposure_between_bounds(
+                 self.concentration_model, time1, time2))
+            for interaction in self.short_range
+        ]
+
+    @method_cache
+    def _short_range_deposition_factors(self) -> typing.List[typing.Tuple[_VectorisedFloat, _VectorisedFloat]]:
+        """
+        The fraction deposited, and the inhalation rate over the dilution
+        factor, of each short-range interaction.
+        """
+        return [
+            (interaction.expiration.particle.fraction_deposited(evaporation_factor=1.0),
+             interaction.activity.inhalation_rate / interaction.dilution_factor())
+            for interaction in self.short_range
+        ]
+
+    def _deposited_exposure(
+            self, long_range_exposure: _VectorisedFloat,
+            short_range_exposures: typing.Sequence[typing.Tuple[_VectorisedFloat, _VectorisedFloat]],
+    ) -> _VectorisedFloat:
+        """
+        The deposited exposure given the long-range normed exposure, and the
+        short-range normed exposures of each interaction (see
+        :meth:`_short_range_normed_exposures_between_bounds`), all over the
+        same period.
+        """
+        deposited_exposure: _VectorisedFloat = 0.
+        for interaction, (short_range_jet_exposure, short_range_lr_exposure), (fdep, inhalation_factor) in zip(
+                self.short_range, short_range_exposures, self._short_range_deposition_factors()):
             diameter = interaction.expiration.particle.diameter
-            
+
             # Aerosols not considered given the formula for the initial
             # concentration at mouth/nose.
             if diameter is not None and not np.isscalar(diameter):
@@ -1372,9 +1900,9 @@ class ExposureModel:
                 # to perform properly the Monte-Carlo integration over
                 # particle diameters (doing things in another order would
                 # lead to wrong results for the probability of infection).
-                this_deposited_exposure = (np.array(short_range_jet_exposure
-                    * fdep).mean()
-                    - np.array(short_range_lr_exposure * fdep).mean()
+                this_deposited_exposure = (_mean_over_samples(short_range_jet_exposure
+                    * fdep)
+                    - _mean_over_samples(short_range_lr_exposure * fdep)
                     * self.concentration_model.infected.activity.exhalation_rate)
             else:
                 # In the case of a single diameter or no diameter defined,
@@ -1384,21 +1912,83 @@ class ExposureModel:
                     * self.concentration_model.infected.activity.exhalation_rate)
 
             # Multiply by the (diameter-independent) inhalation rate
-            deposited_exposure += (this_deposited_exposure *
-                                   interaction.activity.inhalation_rate
-                                   /dilution)
-
-        # Then we multiply by diameter-independent quantities: viral load
-        # and fraction of infected virions
-        f_inf = self.concentration_model.infected.fraction_of_infectious_virus()
-        deposited_exposure *= (f_inf
-                * self.concentration_model.virus.viral_load_in_sputum
-                * (1 - self.exposed.mask.inhale_efficiency()))
+            deposited_exposure += this_deposited_exposure * inhalation_factor
+
+        if self.short_range:
+            # Then we multiply by diameter-independent quantities: viral load
+            # and fraction of infected virions
+            f_inf = self.concentration_model.infected.fraction_of_infectious_virus()
+            deposited_exposure *= (f_inf
+                    * self.concentration_model.virus.viral_load_in_sputum
+                    * (1 - self.exposed.mask.inhale_efficiency()))
         # Long-range concentration
-        deposited_exposure += self.long_range_deposited_exposure_between_bounds(time1, time2)
+        return deposited_exposure + self._long_range_deposited_exposure(long_range_exposure)
+
+    def deposited_exposure_between_bounds(self, time1: float, time2: float) -> _VectorisedFloat:
+        """
+        The number of virus per m^3 deposited on the respiratory tract
+        between any two times.
 
-        return deposited_exposure
+        Considers a contribution between the short-range and long-range exposures:
+        It calculates the deposited exposure given a short-range interaction (if any).
+        Then, the deposited exposure given the long-range interactions is added to the
+        initial deposited exposure. 
+        """
+        return self._deposited_exposure(
+            self._long_range_normed_exposure_between_bounds(time1, time2),
+            self._short_range_normed_exposures_between_bounds(time1, time2),
+        )
+
+    def _cumulative_deposited_exposure(self, times: np.ndarray, mean: bool,
+                                       short_range: bool) -> np.ndarray:
+        times = np.asarray(times, dtype=float)
+        if np.any(np.diff(times) < 0):
+            raise ValueError("The requested times must be sorted in increasing order")
+
+        # The deposited exposure is linear in the normed exposures, so these
+        # are accumulated in a single pass over the consecutive times (the
+        # first step, from the first time to itself, gives zero).
+        long_range_exposure: _VectorisedFloat = 0.
+        short_range_exposures: typing.List[typing.Tuple[_VectorisedFloat, _VectorisedFloat]] = [
+            (0., 0.) for _ in self.short_range]
+        deposited_exposures: typing.List[_VectorisedFloat] = []
+        for time1, time2 in zip(times[:1].tolist() + times[:-1].tolist(), times.tolist()):
+            long_range_exposure = (long_range_exposure +
+                                   self._long_range_normed_exposure_between_bounds(time1, time2))
+            if short_range:
+                short_range_exposures = [
+                    (jet_exposure + new_jet_exposure, lr_exposure + new_lr_exposure)
+                    for (jet_exposure, lr_exposure), (new_jet_exposure, new_lr_exposure) in zip(
+                        short_range_exposures,
+                        self._short_range_normed_exposures_between_bounds(time1, time2))
+                ]
+                deposited_exposure = self._deposited_exposure(long_range_exposure, short_range_exposures)
+            else:
+                deposited_exposure = self._long_range_deposited_exposure(long_range_exposure)
+            deposited_exposures.append(
+                np.mean(deposited_exposure, axis=-1) if mean and np.ndim(deposited_exposure) else deposited_exposure)
+        return _stack_in_time(deposited_exposures)
+
+    def cumulative_deposited_exposure(self, times: np.ndarray, mean: bool = False) -> np.ndarray:
+        """
+        The number of virus per m^3 deposited on the respiratory tract between
+        the first of the given (sorted) times and each of the times, i.e. the
+        cumulative dose curve (starting at zero), with time as the first axis.
+
+        If ``mean`` is True, only the mean over the samples is kept for each
+        time, which gives a 1d curve without holding every sample at every
+        time.
+        """
+        return self._cumulative_deposited_exposure(times, mean, short_range=True)
 
+    def cumulative_long_range_deposited_exposure(self, times: np.ndarray, mean: bool = False) -> np.ndarray:
+        """
+        As :meth:`cumulative_deposited_exposure`, but only considering the
+        long-range exposure.
+        """
+        return self._cumulative_deposited_exposure(times, mean, short_range=False)
+
+    @method_cache
     def deposited_exposure(self) -> _VectorisedFloat:
         """
         The number of virus per m^3 deposited on the respiratory tract.
@@ -1410,16 +2000,32 @@ class ExposureModel:
 
         return deposited_exposure * self.repeats
 
-    def infection_probability(self) -> _VectorisedFloat:
-        # Viral dose (vD)
-        vD = self.deposited_exposure()
+    def _short_range_jet_deposited_exposure(self) -> _VectorisedFloat:
+        """
+        The part of the deposited exposure which comes from the short-range
+        jet, i.e. the only part which doesn't depend on the emission rate of
+        the infected population.
+        """
+        deposited_exposure: _VectorisedFloat = 0.
+        for start, stop in self.exposed.presence.boundaries():
+            deposited_exposure += self._deposited_exposure(0., [
+                (interaction._normed_jet_exposure_between_bounds(self.concentration_model, start, stop), 0.)
+                for interaction in self.short_range
+            ])
+        return deposited_exposure * self.repeats
 
+    def _infection_probability(self, vD: _VectorisedFloat) -> _VectorisedFloat:
         # oneoverln2 multiplied by ID_50 corresponds to ID_63.
         infectious_dose = oneoverln2 * self.concentration_model.virus.infectious_dose
 
-        # Probability of infection.        
-        return (1 - np.exp(-((vD * (1 - self.exposed.host_immunity))/(infectious_dose * 
-                self.concentration_model.virus.transmissibility_factor)))) * 100
+        # Probability of infection. Note that 1 - exp(-x) is computed with
+        # expm1, which keeps its precision for small probabilities.
+        return -np.expm1(-((vD * (1 - self.exposed.host_immunity))/(infectious_dose * 
+                self.concentration_model.virus.transmissibility_factor))) * 100
+
+    def infection_probability(self) -> _VectorisedFloat:
+        # Viral dose (vD)
+        return self._infection_probability(self.deposited_exposure())
 
     def expected_new_cases(self) -> _VectorisedFloat:
         prob = self.infection_probability()
@@ -1432,13 +2038,16 @@ class ExposureModel:
         cases directly generated by one infected case in a population.
 
         """
-        if self.concentration_model.infected.number == 1:
+        number = self.concentration_model.infected.number
+        if number == 1:
             return self.expected_new_cases()
 
-        # Create an equivalent exposure model but with precisely
-        # one infected case.
-        single_exposure_model = nested_replace(
-            self, {'concentration_model.infected.number': 1}
-        )
+        # The deposited exposure is linear in the emission rate, which is
+        # proportional to the number of infected people - except for the
+        # short-range jet exposure, which doesn't depend on it. The dose
+        # for precisely one infected case is therefore obtained from the
+        # one already computed, rather than from an equivalent model.
+        jet_exposure = self._short_range_jet_deposited_exposure()
+        single_infected_vD = jet_exposure + (self.deposited_exposure() - jet_exposure) / number
 
-        return single_exposure_model.expected_new_cases()
+        return self._infection_probability(single_infected_vD) * self.exposed.number / 100
@@ -1 +1,22 @@
-from .models import *
+import typing
+
+from . import models as _models
+from .models import MCModelBase
+from .sweep import SweepResult, parameter_sweep
+from .solver import Solution, Statistic, solve_for_target
+from .sensitivity import SobolIndices, sobol_indices
+
+
+def __getattr__(name: str) -> typing.Any:
+    # The MC types of the models are generated when first accessed (see
+    # cara.monte_carlo.models).
+    if name in _models._MODEL_CLASSES_BY_NAME:
+        return getattr(_models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = _models.__all__ + [
+    "SweepResult", "parameter_sweep",
+    "Solution", "Statistic", "solve_for_target",
+    "SobolIndices", "sobol_indices",
+]
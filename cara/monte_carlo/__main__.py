@@ -0,0 +1,5 @@
+from cara.monte_carlo.data import build_sample_banks
+
+
+if __name__ == '__main__':
+    build_sample_banks()
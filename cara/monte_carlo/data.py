@@ -1,16 +1,50 @@
+import dataclasses
 from dataclasses import dataclass
+import functools
+import os
+from pathlib import Path
 import typing
 
 import numpy as np
 from scipy import special as sp
-from scipy.stats import weibull_min
 
 import cara.monte_carlo as mc
-from cara.monte_carlo.sampleable import LogCustom, LogNormal,LogCustomKernel,CustomKernel,Uniform, Custom
+from cara.monte_carlo.sampleable import LogCustom, LogNormal,LogCustomKernel,CustomKernel,Uniform, Custom, LogCustomQuadrature
+from cara.monte_carlo.sampleable import SampleBank
 
 sqrt2pi = np.sqrt(2.*np.pi)
 sqrt2 = np.sqrt(2.)
 
+# The sample banks of the predefined distributions, by id of the distribution
+# (such that a distribution used in several models has a single bank).
+_sample_banks: typing.Dict[int, SampleBank] = {}
+
+# The distributions which are expensive to sample (by kernel mixture, or by
+# inverse transform of a tabulated CDF), and thus sampled from a bank. The
+# others are cheaper to draw than to read from a bank.
+_BANKED_DISTRIBUTIONS = (Custom, LogCustom, CustomKernel, LogCustomKernel)
+
+_MCModel = typing.TypeVar('_MCModel')
+
+
+def _with_sample_banks(prefix: str, mc_models: typing.Dict[str, _MCModel]) -> typing.Dict[str, _MCModel]:
+    """
+    Returns the given predefined models, with their expensive distributions
+    sampled from banks of samples (see SampleBank), named after their place
+    in the models.
+    """
+    banked_models = {}
+    for name, mc_model in mc_models.items():
+        changes = {}
+        for field in dataclasses.fields(mc_model):  # type: ignore
+            value = getattr(mc_model, field.name)
+            if isinstance(value, _BANKED_DISTRIBUTIONS):
+                if id(value) not in _sample_banks:
+                    _sample_banks[id(value)] = SampleBank(f'{prefix}.{name}.{field.name}', value)
+                changes[field.name] = _sample_banks[id(value)]
+        banked_models[name] = dataclasses.replace(mc_model, **changes)  # type: ignore
+    return banked_models
+
 
 @dataclass(frozen=True)
 class BLOmodel:
@@ -67,23 +101,29 @@ class BLOmodel:
         return result
 
 
-# From https://doi.org/10.1101/2021.10.14.21264988 and references therein
-activity_distributions = {
-    'Seated': mc.Activity(LogNormal(-0.6872121723362303, 0.10498338229297108),
-                          LogNormal(-0.6872121723362303, 0.10498338229297108)),
+# The predefined distributions below are only built when first accessed (see
+# ``__getattr__``), such that importing this module is fast.
 
-    'Standing': mc.Activity(LogNormal(-0.5742377578494785, 0.09373162411398223),
-                            LogNormal(-0.5742377578494785, 0.09373162411398223)),
 
-    'Light activity': mc.Activity(LogNormal(0.21380242785625422,0.09435378091059601),
-                                  LogNormal(0.21380242785625422,0.09435378091059601)),
+@functools.lru_cache()
+def _activity_distributions():
+    # From https://doi.org/10.1101/2021.10.14.21264988 and references therein
+    return _with_sample_banks('activity', {
+        'Seated': mc.Activity(LogNormal(-0.6872121723362303, 0.10498338229297108),
+                              LogNormal(-0.6872121723362303, 0.10498338229297108)),
 
-    'Moderate activity': mc.Activity(LogNormal(0.551771330362601, 0.1894616357138137),
-                                     LogNormal(0.551771330362601, 0.1894616357138137)),
+        'Standing': mc.Activity(LogNormal(-0.5742377578494785, 0.09373162411398223),
+                                LogNormal(-0.5742377578494785, 0.09373162411398223)),
 
-    'Heavy exercise': mc.Activity(LogNormal(1.1644665696723049, 0.21744554768657565),
-                                  LogNormal(1.1644665696723049, 0.21744554768657565)),
-}
+        'Light activity': mc.Activity(LogNormal(0.21380242785625422,0.09435378091059601),
+                                      LogNormal(0.21380242785625422,0.09435378091059601)),
+
+        'Moderate activity': mc.Activity(LogNormal(0.551771330362601, 0.1894616357138137),
+                                         LogNormal(0.551771330362601, 0.1894616357138137)),
+
+        'Heavy exercise': mc.Activity(LogNormal(1.1644665696723049, 0.21744554768657565),
+                                      LogNormal(1.1644665696723049, 0.21744554768657565)),
+    })
 
 
 # From https://doi.org/10.1101/2021.10.14.21264988 and references therein
@@ -105,12 +145,22 @@ symptomatic_vl_frequencies = LogCustomKernel(
 # Weibull distribution with a shape factor of 3.47 and a scale factor of 7.01.
 # From https://elifesciences.org/articles/65774 and first line of the figure in
 # https://iiif.elifesciences.org/lax:65774%2Felife-65774-fig4-figsupp3-v2.tif/full/1500,/0/default.jpg
-viral_load = np.linspace(weibull_min.ppf(0.01, c=3.47, scale=7.01),
-                weibull_min.ppf(0.99, c=3.47, scale=7.01), 30)
-frequencies_pdf = weibull_min.pdf(viral_load, c=3.47, scale=7.01)
-covid_overal_vl_data = LogCustom(bounds=(2, 10), 
-                        function=lambda d: np.interp(d, viral_load, frequencies_pdf, left=0., right=0.), 
-                        max_function=0.2)
+@functools.lru_cache()
+def _weibull_viral_load():
+    # Importing scipy.stats takes a while, so only do so once needed.
+    from scipy.stats import weibull_min
+    viral_load = np.linspace(weibull_min.ppf(0.01, c=3.47, scale=7.01),
+                    weibull_min.ppf(0.99, c=3.47, scale=7.01), 30)
+    frequencies_pdf = weibull_min.pdf(viral_load, c=3.47, scale=7.01)
+    return viral_load, frequencies_pdf
+
+
+@functools.lru_cache()
+def _covid_overal_vl_data():
+    viral_load, frequencies_pdf = _weibull_viral_load()
+    return LogCustom(bounds=(2, 10),
+                     function=lambda d: np.interp(d, viral_load, frequencies_pdf, left=0., right=0.),
+                     max_function=0.2)
 
 
 # Derived from data in doi.org/10.1016/j.ijid.2020.09.025 and
@@ -122,60 +172,66 @@ viable_to_RNA_ratio_distribution = Uniform(0.01, 0.6)
 infectious_dose_distribution = Uniform(10., 100.)
 
 
-# From https://doi.org/10.1101/2021.10.14.21264988 and refererences therein
-virus_distributions = {
-    'SARS_CoV_2': mc.SARSCoV2(
-                viral_load_in_sputum=covid_overal_vl_data,
-                infectious_dose=infectious_dose_distribution,
-                viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
-                transmissibility_factor=1.,
-                ),
-    'SARS_CoV_2_ALPHA': mc.SARSCoV2(
-                viral_load_in_sputum=covid_overal_vl_data,
-                infectious_dose=infectious_dose_distribution,
-                viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
-                transmissibility_factor=0.78,
-                ),
-    'SARS_CoV_2_BETA': mc.SARSCoV2(
-                viral_load_in_sputum=covid_overal_vl_data,
-                infectious_dose=infectious_dose_distribution,
-                viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
-                transmissibility_factor=0.8,
-                ),
-    'SARS_CoV_2_GAMMA': mc.SARSCoV2(
-                viral_load_in_sputum=covid_overal_vl_data,
-                infectious_dose=infectious_dose_distribution,
-                viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
-                transmissibility_factor=0.72,
-                ),
-    'SARS_CoV_2_DELTA': mc.SARSCoV2(
-                viral_load_in_sputum=covid_overal_vl_data,
-                infectious_dose=infectious_dose_distribution,
-                viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
-                transmissibility_factor=0.51,
-                ),
-    'SARS_CoV_2_OMICRON': mc.SARSCoV2(
-                viral_load_in_sputum=covid_overal_vl_data,
-                infectious_dose=infectious_dose_distribution,
-                viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
-                transmissibility_factor=0.2,
-                ),            
-}
+@functools.lru_cache()
+def _virus_distributions():
+    covid_overal_vl_data = _covid_overal_vl_data()
+    # From https://doi.org/10.1101/2021.10.14.21264988 and refererences therein
+    return _with_sample_banks('virus', {
+        'SARS_CoV_2': mc.SARSCoV2(
+                    viral_load_in_sputum=covid_overal_vl_data,
+                    infectious_dose=infectious_dose_distribution,
+                    viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
+                    transmissibility_factor=1.,
+                    ),
+        'SARS_CoV_2_ALPHA': mc.SARSCoV2(
+                    viral_load_in_sputum=covid_overal_vl_data,
+                    infectious_dose=infectious_dose_distribution,
+                    viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
+                    transmissibility_factor=0.78,
+                    ),
+        'SARS_CoV_2_BETA': mc.SARSCoV2(
+                    viral_load_in_sputum=covid_overal_vl_data,
+                    infectious_dose=infectious_dose_distribution,
+                    viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
+                    transmissibility_factor=0.8,
+                    ),
+        'SARS_CoV_2_GAMMA': mc.SARSCoV2(
+                    viral_load_in_sputum=covid_overal_vl_data,
+                    infectious_dose=infectious_dose_distribution,
+                    viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
+                    transmissibility_factor=0.72,
+                    ),
+        'SARS_CoV_2_DELTA': mc.SARSCoV2(
+                    viral_load_in_sputum=covid_overal_vl_data,
+                    infectious_dose=infectious_dose_distribution,
+                    viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
+                    transmissibility_factor=0.51,
+                    ),
+        'SARS_CoV_2_OMICRON': mc.SARSCoV2(
+                    viral_load_in_sputum=covid_overal_vl_data,
+                    infectious_dose=infectious_dose_distribution,
+                    viable_to_RNA_ratio=viable_to_RNA_ratio_distribution,
+                    transmissibility_factor=0.2,
+                    ),
+    })
 
 
 # From:
 # https://doi.org/10.1080/02786826.2021.1890687
 # https://doi.org/10.1016/j.jhin.2013.02.007
 # https://doi.org/10.4209/aaqr.2020.08.0531
-mask_distributions = {
-    'Type I': mc.Mask(Uniform(0.25, 0.80)),
-    'FFP2': mc.Mask(Uniform(0.83, 0.91)),
-}
+@functools.lru_cache()
+def _mask_distributions():
+    return _with_sample_banks('mask', {
+        'Type I': mc.Mask(Uniform(0.25, 0.80)),
+        'FFP2': mc.Mask(Uniform(0.83, 0.91)),
+    })
 
 
 def expiration_distribution(
         BLO_factors,
         d_max=30.,
+        quadrature_nodes: typing.Optional[int] = None,
 ) -> mc.Expiration:
     """
     Returns an Expiration with an aerosol diameter distribution, defined
@@ -184,15 +240,30 @@ def expiration_distribution(
     the distribution between 0.1 and 30 microns - these boundaries are
     an historical choice based on previous implementations of the model
     (it limits the influence of the O-mode).
+    If quadrature_nodes is given, the diameters are not sampled but are
+    the (weighted) nodes of a Gauss-Legendre quadrature over the log of
+    the diameter, such that the integral over the diameters is deterministic
+    and only the other parameters of the model are Monte-Carlo sampled.
     """
+    blo_model = BLOmodel(BLO_factors)
+    cn = blo_model.integrate(0.1, d_max)
+    if quadrature_nodes is not None:
+        diameters = LogCustomQuadrature(
+            bounds=(np.log10(0.1), np.log10(d_max)),
+            # The distribution vs. the log of the diameter.
+            function=lambda x: blo_model.distribution(10**x) * 10**x,
+            nodes=quadrature_nodes,
+        )
+        return mc.Expiration(diameters, cn=cn, diameter_weight=diameters.sample_weights)
+
     dscan = np.linspace(0.1, d_max, 3000)
     return mc.Expiration(
         CustomKernel(
             dscan,
-            BLOmodel(BLO_factors).distribution(dscan),
+            blo_model.distribution(dscan),
             kernel_bandwidth=0.1,
         ),
-        cn=BLOmodel(BLO_factors).integrate(0.1, d_max),
+        cn=cn,
     )
 
 
@@ -204,21 +275,64 @@ expiration_BLO_factors = {
 }
 
 
-expiration_distributions = {
-    exp_type: expiration_distribution(BLO_factors)
-    for exp_type, BLO_factors in expiration_BLO_factors.items()
-}
+@functools.lru_cache()
+def _expiration_distributions():
+    return _with_sample_banks('expiration', {
+        exp_type: expiration_distribution(BLO_factors)
+        for exp_type, BLO_factors in expiration_BLO_factors.items()
+    })
 
 
-short_range_expiration_distributions = {
-    exp_type: expiration_distribution(BLO_factors, d_max=100)
-    for exp_type, BLO_factors in expiration_BLO_factors.items()
-}
+@functools.lru_cache()
+def _short_range_expiration_distributions():
+    return _with_sample_banks('short_range_expiration', {
+        exp_type: expiration_distribution(BLO_factors, d_max=100)
+        for exp_type, BLO_factors in expiration_BLO_factors.items()
+    })
 
 
 # Derived from Fig 8 a) "stand-stand" in https://www.mdpi.com/1660-4601/17/4/1445/htm
 distances = np.array((0.5,0.6,0.7,0.8,0.9,1,1.1,1.2,1.3,1.4,1.5,1.6,1.7,1.8,1.9,2))
 frequencies = np.array((0.0598036,0.0946154,0.1299152,0.1064905,0.1099066,0.0998209, 0.0845298,0.0479286,0.0406084,0.039795,0.0205997,0.0152316,0.0118155,0.0118155,0.018485,0.0205997))
-short_range_distances = Custom(bounds=(0.5,2.), 
-                            function=lambda x: np.interp(x,distances,frequencies,left=0.,right=0.),
-                            max_function=0.13)
\ No newline at end of file
+
+
+@functools.lru_cache()
+def _short_range_distances():
+    return SampleBank('short_range_distances', Custom(bounds=(0.5,2.),
+                      function=lambda x: np.interp(x,distances,frequencies,left=0.,right=0.),
+                      max_function=0.13))
+
+
+_LAZY_ATTRIBUTES: typing.Dict[str, typing.Callable[[], typing.Any]] = {
+    'activity_distributions': _activity_distributions,
+    'viral_load': lambda: _weibull_viral_load()[0],
+    'frequencies_pdf': lambda: _weibull_viral_load()[1],
+    'covid_overal_vl_data': _covid_overal_vl_data,
+    'virus_distributions': _virus_distributions,
+    'mask_distributions': _mask_distributions,
+    'expiration_distributions': _expiration_distributions,
+    'short_range_expiration_distributions': _short_range_expiration_distributions,
+    'short_range_distances': _short_range_distances,
+}
+
+
+def build_sample_banks(directory: typing.Optional[str] = None) -> None:
+    """
+    Draws the banks of samples of all of the predefined distributions (see
+    SampleBank) into the given directory, by default the one given by the
+    ``CARA_SAMPLE_BANK_DIR`` environment variable, such that they are ready
+    to be memory-mapped (e.g. when building a deployment).
+    """
+    directory = directory or os.environ.get('CARA_SAMPLE_BANK_DIR')
+    if not directory:
+        raise ValueError("No sample bank directory given, and CARA_SAMPLE_BANK_DIR is not set")
+    values = [factory() for factory in _LAZY_ATTRIBUTES.values()]
+    banks = list(_sample_banks.values()) + [value for value in values if isinstance(value, SampleBank)]
+    for bank in banks:
+        bank._load_bank(Path(directory))
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,77 @@
 import copy
 import dataclasses
 import sys
+import threading
 import typing
+import zlib
+
+import numpy as np
 
 import cara.models
 
 from .sampleable import SampleableDistribution, _VectorisedFloatOrSampleable
+from .statistics import RunningStatistics
+
+if typing.TYPE_CHECKING:
+    from scipy.stats import qmc
 
 _ModelType = typing.TypeVar('_ModelType')
 
+# The seed of the random numbers of the samples (None for the global np.random
+# state).
+_SeedType = typing.Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+# The default number of samples evaluated at once by MCModelBase.chunked_statistics.
+_DEFAULT_CHUNK_SIZE = 16_384
+
+# The strategies to draw the samples of MCModelBase.build_model, besides
+# pseudo-random sampling: the points in the unit hypercube (with one
+# dimension per distribution) from which the samples are derived, given the
+# number of dimensions and the seed of the engine.
+_SAMPLING_ENGINES: typing.Dict[str, typing.Callable[[int, typing.Any], "qmc.QMCEngine"]] = {
+    'sobol': lambda dimensions, seed: _qmc().Sobol(dimensions, scramble=True, seed=seed),
+    'lhs': lambda dimensions, seed: _qmc().LatinHypercube(dimensions, seed=seed),
+}
+
+
+def _qmc():
+    # scipy.stats takes a large part of the time to import this package, and
+    # is only needed by the sampling engines.
+    from scipy.stats import qmc
+    return qmc
+
+
+def _seed_sequence(seed: _SeedType) -> typing.Optional[np.random.SeedSequence]:
+    if seed is None or isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, np.random.Generator):
+        # A new child of the seed of the generator, such that successive
+        # uses of a generator give different (but reproducible) samples.
+        return typing.cast(np.random.SeedSequence, seed.bit_generator.seed_seq).spawn(1)[0]
+    return np.random.SeedSequence(seed)
+
+
+def _child_seed_sequence(seed_sequence: np.random.SeedSequence, key: int) -> np.random.SeedSequence:
+    # Unlike SeedSequence.spawn, the child is given by its key rather than by
+    # the number of children spawned so far.
+    return np.random.SeedSequence(seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + (key, ))
+
+
+def _chunk_seed_sequence(
+        seed_sequence: typing.Optional[np.random.SeedSequence], index: int,
+) -> typing.Optional[np.random.SeedSequence]:
+    return None if seed_sequence is None else _child_seed_sequence(seed_sequence, index)
+
+
+def _distribution_generator(
+        seed_sequence: typing.Optional[np.random.SeedSequence], path: str,
+) -> typing.Optional[np.random.Generator]:
+    # The stream of random numbers of the distribution at the given path in
+    # the model, which doesn't depend on the other distributions of the model.
+    if seed_sequence is None:
+        return None
+    return np.random.default_rng(_child_seed_sequence(seed_sequence, zlib.crc32(path.encode())))
+
 
 class MCModelBase(typing.Generic[_ModelType]):
     """
@@ -22,30 +85,197 @@ class MCModelBase(typing.Generic[_ModelType]):
     _base_cls: typing.Type[_ModelType]
 
     @classmethod
-    def _to_vectorized_form(cls, item, size):
+    def _to_vectorized_form(cls, item, size, dtype, samples, path, seed_sequence):
         if isinstance(item, SampleableDistribution):
-            return item.generate_samples(size)
+            rng = _distribution_generator(seed_sequence, path)
+            if samples is None:
+                return np.asarray(item.generate_samples(size, rng), dtype=dtype)
+            # The samples drawn beforehand (see build_model), by place in the
+            # model (the distribution is kept in the key, to keep its id
+            # unique).
+            key = (path, id(item))
+            if key not in samples:
+                samples[key] = (item, np.asarray(item.generate_samples(size, rng), dtype=dtype))
+            return samples[key][1]
         elif isinstance(item, MCModelBase):
-            # Recurse into other MCModelBase instances by calling their
-            # build_model method.
-            return item.build_model(size)
+            # Recurse into other MCModelBase instances by building them.
+            return item._build_model(size, dtype, samples, path, seed_sequence)
         elif isinstance(item, tuple):
-            return tuple(cls._to_vectorized_form(sub, size) for sub in item)
+            return tuple(
+                cls._to_vectorized_form(sub, size, dtype, samples, f'{path}[{index}]', seed_sequence)
+                for index, sub in enumerate(item)
+            )
         else:
             return item
 
-    def build_model(self, size: int) -> _ModelType:
-        """
-        Turn this MCModelBase subclass into a cara.model Model instance
-        from which you can then run the model.
+    @classmethod
+    def _distributions(cls, item, path):
+        # The (path, distribution) of each of the distributions of the model,
+        # in the same order (and with the same paths) as they are sampled by
+        # _to_vectorized_form.
+        if isinstance(item, SampleableDistribution):
+            yield path, item
+        elif isinstance(item, MCModelBase):
+            for field in dataclasses.fields(item._base_cls):
+                yield from cls._distributions(getattr(item, field.name), f'{path}.{field.name}')
+        elif isinstance(item, tuple):
+            for index, sub in enumerate(item):
+                yield from cls._distributions(sub, f'{path}[{index}]')
 
-        """
+    def _build_model(self, size, dtype, samples, path, seed_sequence=None) -> _ModelType:
         kwargs = {}
         for field in dataclasses.fields(self._base_cls):
             attr = getattr(self, field.name)
-            kwargs[field.name] = self._to_vectorized_form(attr, size)
+            kwargs[field.name] = self._to_vectorized_form(
+                attr, size, dtype, samples, f'{path}.{field.name}', seed_sequence,
+            )
         return self._base_cls(**kwargs)  # type: ignore
 
+    def build_model(
+            self,
+            size: int,
+            dtype: typing.Type[np.floating] = np.float64,
+            sampling: str = 'random',
+            seed: _SeedType = None,
+    ) -> _ModelType:
+        """
+        Turn this MCModelBase subclass into a cara.model Model instance
+        from which you can then run the model.
+
+        By default, each distribution is sampled (pseudo-)randomly. With a
+        ``sampling`` of ``'sobol'`` (a scrambled Sobol' sequence, best for a
+        power of 2 samples) or ``'lhs'`` (a Latin hypercube), the samples of
+        all of the distributions are instead derived jointly from a set of
+        points in the unit hypercube, through the inverse CDF of each of the
+        distributions. These spread the samples more evenly than random
+        sampling, such that the statistics of the model converge faster with
+        the number of samples.
+
+        The samples are generated with the given floating point dtype. With
+        ``np.float32``, the samples and all of the intermediate arrays derived
+        from them in the model evaluation are in single precision, which
+        halves their memory footprint. For the same samples, the mean infection
+        probability then typically differs from the one in double precision
+        by less than 1e-6 (relative).
+
+        Without a ``seed``, the samples are drawn from the global ``np.random``
+        state. Given a seed (an int, a ``SeedSequence`` or a ``Generator``),
+        each distribution is sampled from a stream of its own, derived from
+        the seed and the place of the distribution in the model, such that
+        the samples are reproducible, and those of a distribution don't
+        change with the other distributions of the model.
+
+        """
+        seed_sequence = _seed_sequence(seed)
+        if sampling == 'random':
+            return self._build_model(size, dtype, None, '', seed_sequence)
+        if sampling not in _SAMPLING_ENGINES:
+            raise ValueError(f"Unknown sampling strategy {sampling!r}")
+
+        distributions = [
+            (path, item) for path, item in self._distributions(self, '')
+            if not item.deterministic
+        ]
+        samples: typing.Dict[typing.Tuple[str, int], typing.Any] = {}
+        if distributions:
+            engine_seed = (
+                np.random.randint(2 ** 31) if seed_sequence is None
+                else np.random.default_rng(seed_sequence)
+            )
+            points = _SAMPLING_ENGINES[sampling](len(distributions), engine_seed).random(size)
+            for (path, item), quantiles in zip(distributions, points.T):
+                rng = _distribution_generator(seed_sequence, path)
+                samples[(path, id(item))] = (item, np.asarray(item.inverse_cdf(quantiles, rng), dtype=dtype))
+        return self._build_model(size, dtype, samples, '', seed_sequence)
+
+    def chunked_statistics(
+            self,
+            size: int,
+            quantities: typing.Mapping[str, typing.Callable[[_ModelType], cara.models._VectorisedFloat]],
+            bins: typing.Optional[typing.Mapping[str, np.ndarray]] = None,
+            chunk_size: int = _DEFAULT_CHUNK_SIZE,
+            dtype: typing.Type[np.floating] = np.float64,
+            seed: _SeedType = None,
+    ) -> typing.Dict[str, RunningStatistics]:
+        """
+        Evaluate the given quantities (functions of a cara.models Model
+        instance, e.g. ``lambda model: model.infection_probability()``) for
+        ``size`` samples, building the model in successive chunks of at most
+        ``chunk_size`` samples. Only the running statistics of the quantities
+        (with a histogram for those given bins) are kept, and each chunk is
+        discarded once evaluated, such that the memory needed doesn't grow
+        with the sample size.
+
+        Note that the quantities integrated over the aerosol diameters (e.g.
+        the deposited exposure) are integrated over the diameters of each
+        chunk, so diameter distributions are best given as a quadrature
+        (see ``cara.monte_carlo.data.expiration_distribution``).
+
+        Given a ``seed``, each chunk is built with a seed of its own derived
+        from it (see :meth:`build_model`), such that the statistics are
+        reproducible.
+
+        """
+        bins = bins or {}
+        statistics = {name: RunningStatistics(bins.get(name)) for name in quantities}
+        seed_sequence = _seed_sequence(seed)
+        for index, start in enumerate(range(0, size, chunk_size)):
+            chunk = min(chunk_size, size - start)
+            model = self.build_model(chunk, dtype=dtype, seed=_chunk_seed_sequence(seed_sequence, index))
+            for name, quantity in quantities.items():
+                statistics[name].update(quantity(model), chunk)
+            del model
+        return statistics
+
+    def adaptive_statistics(
+            self,
+            quantities: typing.Mapping[str, typing.Callable[[_ModelType], cara.models._VectorisedFloat]],
+            relative_tolerance: float,
+            max_size: int,
+            batch_size: int = _DEFAULT_CHUNK_SIZE,
+            dtype: typing.Type[np.floating] = np.float64,
+            seed: _SeedType = None,
+            converged_quantities: typing.Optional[typing.Collection[str]] = None,
+            min_batches: int = 4,
+    ) -> typing.Dict[str, RunningStatistics]:
+        """
+        As :meth:`chunked_statistics`, but for as many batches of
+        ``batch_size`` samples as needed for the standard error of the mean
+        of each of the quantities to fall below ``relative_tolerance`` times
+        the mean (for all of their values), up to ``max_size`` samples, and
+        for at least ``min_batches`` batches. The number of samples drawn is
+        the ``count`` of the statistics.
+
+        The standard errors (and confidence intervals) are estimated from
+        the means of the batches (see :class:`RunningStatistics`), as the
+        samples of a batch share e.g. the integral over its aerosol
+        diameters.
+
+        If ``converged_quantities`` is given, only the quantities of those
+        names need to converge; the others are accumulated alongside them.
+
+        """
+        statistics = {name: RunningStatistics(batch_means=True) for name in quantities}
+        if converged_quantities is None:
+            converged_quantities = list(quantities)
+        seed_sequence = _seed_sequence(seed)
+        size = 0
+        while size < max_size:
+            batch = min(batch_size, max_size - size)
+            # The batches are all of batch_size samples but the last one.
+            index = size // batch_size
+            model = self.build_model(batch, dtype=dtype, seed=_chunk_seed_sequence(seed_sequence, index))
+            for name, quantity in quantities.items():
+                statistics[name].update(quantity(model), batch)
+            del model
+            size += batch
+            if index + 1 >= min_batches and all(
+                    np.all(statistics[name].standard_error <= relative_tolerance * np.abs(statistics[name].mean))
+                    for name in converged_quantities
+            ):
+                break
+        return statistics
+
 
 def _build_mc_model(model: _ModelType) -> typing.Type[MCModelBase[_ModelType]]:
     """
@@ -115,11 +345,25 @@ _MODEL_CLASSES = [
     if dataclasses.is_dataclass(cls)
 ]
 
+_MODEL_CLASSES_BY_NAME = {_model.__name__: _model for _model in _MODEL_CLASSES}
 
-# Inject the runtime generated MC types into this module.
-for _model in _MODEL_CLASSES:
-    setattr(sys.modules[__name__], _model.__name__, _build_mc_model(_model))
+_BUILD_LOCK = threading.RLock()
+
+
+def __getattr__(name: str) -> typing.Any:
+    # Inject the runtime generated MC types into this module, on their first
+    # access (including through the fields and bases of the other types),
+    # rather than generating all of them at import.
+    if name not in _MODEL_CLASSES_BY_NAME:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _BUILD_LOCK:
+        module = sys.modules[__name__]
+        if name not in vars(module):
+            setattr(module, name, _build_mc_model(_MODEL_CLASSES_BY_NAME[name]))
+        return vars(module)[name]
 
 
 # Make sure that each of the models is imported if you do a ``import *``.
-__all__ = [_model.__name__ for _model in _MODEL_CLASSES] + ["MCModelBase"]
+__all__ = [_model.__name__ for _model in _MODEL_CLASSES] + [
+    "MCModelBase",
+]
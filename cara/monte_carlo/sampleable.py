@@ -1,7 +1,11 @@
+import hashlib
+import os
+from pathlib import Path
+import types
 import typing
 
 import numpy as np
-from sklearn.neighbors import KernelDensity # type: ignore
+from scipy.special import ndtr, ndtri
 
 import cara.models
 
@@ -9,11 +13,114 @@ import cara.models
 # There is no better way to declare this currently, unfortunately.
 float_array_size_n = np.ndarray
 
+# The source of the random numbers of the samples: a Generator, or the global
+# np.random state if None.
+RandomGenerator = typing.Optional[np.random.Generator]
+
+
+def _random(rng: RandomGenerator) -> typing.Any:
+    return np.random if rng is None else rng
+
+
+# The number of intervals of the grid on which the CDF of a Custom or
+# LogCustom distribution is tabulated.
+_CDF_TABLE_SIZE = 2 ** 14
+
+
+class _TabulatedCDF:
+    """
+    The CDF of a distribution following a (not necessarily normalised)
+    custom curve between the given bounds, integrated on a fine grid (once,
+    when first needed), to sample the distribution by inverse transform.
+    """
+    def __init__(self, bounds: typing.Tuple[float, float], function: typing.Callable):
+        self.bounds = bounds
+        self.function = function
+        self._table: typing.Optional[typing.Tuple[np.ndarray, np.ndarray]] = None
+
+    def _tabulate(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        values = np.linspace(*self.bounds, _CDF_TABLE_SIZE + 1)
+        density = np.asarray(self.function(values), dtype=float)
+        cdf = np.concatenate([[0.], np.cumsum((density[1:] + density[:-1]) / 2)])
+        return values, cdf / cdf[-1]
+
+    def inverse_cdf(self, quantiles: float_array_size_n) -> float_array_size_n:
+        if self._table is None:
+            self._table = self._tabulate()
+        values, cdf = self._table
+        return np.interp(quantiles, cdf, values)
+
+
+class _GaussianKernelMixture:
+    """
+    The weighted mixture of Gaussian kernels of a kernel density fit, which
+    is sampled by drawing a kernel (with the probability of its weight) plus
+    Gaussian noise, as in ``sklearn.neighbors.KernelDensity.sample``. Its
+    inverse CDF is interpolated from a table of its CDF, computed once.
+    """
+    def __init__(self, centres: float_array_size_n, weights: float_array_size_n, bandwidth: float):
+        self.centres = np.asarray(centres, dtype=float).ravel()
+        self.cumulative_weights = np.cumsum(weights)
+        self.bandwidth = bandwidth
+        self._cdf_table: typing.Optional[typing.Tuple[np.ndarray, np.ndarray]] = None
+
+    def sample(self, size: int, rng: RandomGenerator) -> float_array_size_n:
+        random = _random(rng)
+        u = random.uniform(0, 1, size=size)
+        kernels = np.searchsorted(self.cumulative_weights, u * self.cumulative_weights[-1])
+        return random.normal(self.centres[kernels], self.bandwidth)
+
+    def _tabulate_cdf(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        # The CDF on a grid finer than the bandwidth, up to where the tails
+        # of the kernels are negligible.
+        lower = self.centres.min() - 8 * self.bandwidth
+        upper = self.centres.max() + 8 * self.bandwidth
+        values = np.linspace(lower, upper, int(np.ceil(8 * (upper - lower) / self.bandwidth)) + 1)
+        weights = np.diff(self.cumulative_weights, prepend=0.) / self.cumulative_weights[-1]
+        cdf = np.empty_like(values)
+        block = 256
+        for start in range(0, len(values), block):
+            cdf[start:start + block] = ndtr(
+                (values[start:start + block, np.newaxis] - self.centres) / self.bandwidth
+            ) @ weights
+        return values, cdf
+
+    def inverse_cdf(self, quantiles: float_array_size_n) -> float_array_size_n:
+        if self._cdf_table is None:
+            self._cdf_table = self._tabulate_cdf()
+        values, cdf = self._cdf_table
+        return np.interp(quantiles, cdf, values)
+
 
 class SampleableDistribution:
-    def generate_samples(self, size: int) -> float_array_size_n:
+    #: Whether the samples are given by a deterministic rule rather than
+    #: drawn at random (in which case they don't depend on the sampling
+    #: strategy).
+    deterministic: bool = False
+
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        """
+        Draw ``size`` samples of the distribution, with the given random
+        number generator (or the global ``np.random`` state if None).
+
+        """
         raise NotImplementedError()
 
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        """
+        The values of the random variable at the given quantiles (between 0
+        and 1), to turn uniformly distributed points (e.g. of a low-discrepancy
+        sequence) into samples of the distribution.
+
+        Without an analytical form, this is the empirical quantile function
+        of as many random samples as there are quantiles.
+
+        """
+        quantiles = np.asarray(quantiles)
+        samples = np.sort(self.generate_samples(quantiles.size, rng))
+        index = np.minimum((quantiles * quantiles.size).astype(int), quantiles.size - 1)
+        return samples[index]
+
 
 class Normal(SampleableDistribution):
     """
@@ -23,8 +130,11 @@ class Normal(SampleableDistribution):
         self.mean = mean
         self.standard_deviation = standard_deviation
 
-    def generate_samples(self, size: int) -> float_array_size_n:
-        return np.random.normal(self.mean, self.standard_deviation, size=size)
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return _random(rng).normal(self.mean, self.standard_deviation, size=size)
+
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        return self.mean + self.standard_deviation * ndtri(quantiles)
 
 
 class Uniform(SampleableDistribution):
@@ -35,8 +145,11 @@ class Uniform(SampleableDistribution):
         self.low = low
         self.high = high
 
-    def generate_samples(self, size: int) -> float_array_size_n:
-        return np.random.uniform(self.low, self.high, size=size)
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return _random(rng).uniform(self.low, self.high, size=size)
+
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        return self.low + (self.high - self.low) * np.asarray(quantiles)
 
 
 class LogNormal(SampleableDistribution):
@@ -51,62 +164,57 @@ class LogNormal(SampleableDistribution):
         self.mean_gaussian = mean_gaussian
         self.standard_deviation_gaussian = standard_deviation_gaussian
 
-    def generate_samples(self, size: int) -> float_array_size_n:
-        return np.random.lognormal(self.mean_gaussian,
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return _random(rng).lognormal(self.mean_gaussian,
                                    self.standard_deviation_gaussian,
                                    size=size)
 
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        return np.exp(self.mean_gaussian + self.standard_deviation_gaussian * ndtri(quantiles))
+
 
 class Custom(SampleableDistribution):
     """
     Defines a distribution which follows a custom curve vs. the random
-    variable. Uses a simple algorithm. This is appropriate for a smooth
-    distribution function.
-    Note: in max_function, a value slightly above the maximum of the distribution 
-    function should be provided.
+    variable. Samples by inverse transform of its CDF, tabulated on a fine
+    grid. This is appropriate for a smooth distribution function.
+    Note: max_function (a value slightly above the maximum of the distribution
+    function) was needed by the former rejection sampling, and is unused.
     """
     def __init__(self, bounds: typing.Tuple[float, float],
-                 function: typing.Callable, max_function: float):
+                 function: typing.Callable, max_function: typing.Optional[float] = None):
         self.bounds = bounds
         self.function = function
         self.max_function = max_function
+        self._cdf = _TabulatedCDF(bounds, function)
 
-    def generate_samples(self, size: int) -> float_array_size_n:
-        fvalue = np.random.uniform(0,self.max_function,size)
-        x = np.random.uniform(*self.bounds,size)
-        invalid = np.where(fvalue>self.function(x))[0]
-        while len(invalid)>0:
-            fvalue[invalid] = np.random.uniform(0,self.max_function,len(invalid))
-            x[invalid] = np.random.uniform(*self.bounds,len(invalid))
-            invalid = np.where(fvalue>self.function(x))[0]
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return self.inverse_cdf(_random(rng).uniform(0, 1, size))
 
-        return x
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        return self._cdf.inverse_cdf(quantiles)
 
 
 class LogCustom(SampleableDistribution):
     """
     Defines a distribution which follows a custom curve vs. the log (in base 10)
-    of the random variable. Uses a simple algorithm. This is appropriate for a smooth
-    distribution function. 
-    Note: in max_function, a value slightly above the maximum of the distribution 
-    function should be provided.
+    of the random variable. Samples by inverse transform of its CDF, tabulated on
+    a fine grid. This is appropriate for a smooth distribution function.
+    Note: max_function (a value slightly above the maximum of the distribution
+    function) was needed by the former rejection sampling, and is unused.
     """
     def __init__(self, bounds: typing.Tuple[float, float],
-                 function: typing.Callable, max_function: float):
+                 function: typing.Callable, max_function: typing.Optional[float] = None):
         self.bounds = bounds
         self.function = function
         self.max_function = max_function
+        self._cdf = _TabulatedCDF(bounds, function)
 
-    def generate_samples(self, size: int) -> float_array_size_n:
-        fvalue = np.random.uniform(0,self.max_function,size)
-        x = np.random.uniform(*self.bounds,size)
-        invalid = np.where(fvalue>self.function(x))[0]
-        while len(invalid)>0:
-            fvalue[invalid] = np.random.uniform(0,self.max_function,len(invalid))
-            x[invalid] = np.random.uniform(*self.bounds,len(invalid))
-            invalid = np.where(fvalue>self.function(x))[0]
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return self.inverse_cdf(_random(rng).uniform(0, 1, size))
 
-        return 10 ** x
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        return 10 ** self._cdf.inverse_cdf(quantiles)
 
 
 class CustomKernel(SampleableDistribution):
@@ -124,13 +232,13 @@ class CustomKernel(SampleableDistribution):
         self.variable = variable
         self.frequencies = frequencies
         self.kernel_bandwidth = kernel_bandwidth
+        self._mixture = _GaussianKernelMixture(variable, frequencies, kernel_bandwidth)
 
-    def generate_samples(self, size: int) -> float_array_size_n:
-        kde_model = KernelDensity(kernel='gaussian',
-                                  bandwidth=self.kernel_bandwidth)
-        kde_model.fit(self.variable.reshape(-1, 1),
-                      sample_weight=self.frequencies)
-        return kde_model.sample(n_samples=size)[:, 0]
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return self._mixture.sample(size, rng)
+
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        return self._mixture.inverse_cdf(quantiles)
 
 
 class LogCustomKernel(SampleableDistribution):
@@ -148,13 +256,209 @@ class LogCustomKernel(SampleableDistribution):
         self.log_variable = log_variable
         self.frequencies = frequencies
         self.kernel_bandwidth = kernel_bandwidth
+        self._mixture = _GaussianKernelMixture(log_variable, frequencies, kernel_bandwidth)
+
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return 10 ** self._mixture.sample(size, rng)
+
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        return 10 ** self._mixture.inverse_cdf(quantiles)
+
+
+class Quadrature(SampleableDistribution):
+    """
+    Defines a deterministic quadrature rule over the distribution of the
+    random variable, i.e. a set of nodes and their weights, to be used in
+    place of random samples. The nodes are spread (in order) over the
+    samples, and :attr:`sample_weights` gives the weight of each sample,
+    normalised such that the mean of any function of the samples times
+    their weights is the quadrature of that function.
+    """
+    deterministic = True
+
+    def __init__(self, nodes: float_array_size_n, weights: float_array_size_n):
+        self.nodes = np.asarray(nodes, dtype=float)
+        self.weights = np.asarray(weights, dtype=float) / np.sum(weights)
+
+    def _repeats(self, size: int) -> np.ndarray:
+        n_nodes = len(self.nodes)
+        if size < n_nodes:
+            raise ValueError(
+                f"The sample size must be at least the number of nodes ({n_nodes})"
+            )
+        # The number of samples given to each node, as even as possible.
+        return np.diff(np.arange(n_nodes + 1) * size // n_nodes)
+
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return np.repeat(self.nodes, self._repeats(size))
+
+    def generate_sample_weights(self, size: int) -> float_array_size_n:
+        repeats = self._repeats(size)
+        return np.repeat(self.weights * size / repeats, repeats)
+
+    @property
+    def sample_weights(self) -> SampleableDistribution:
+        """
+        The weights of the samples generated from this quadrature, as a
+        distribution of their own.
+        """
+        return _QuadratureSampleWeights(self)
+
+
+class _QuadratureSampleWeights(SampleableDistribution):
+    deterministic = True
+
+    def __init__(self, quadrature: Quadrature):
+        self.quadrature = quadrature
+
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        return self.quadrature.generate_sample_weights(size)
+
+
+class LogCustomQuadrature(Quadrature):
+    """
+    Defines a Gauss-Legendre quadrature over the log (in base 10) of the
+    random variable, whose distribution follows a custom curve vs. the log
+    of the random variable, between the given bounds. This is appropriate
+    for a smooth distribution function spanning several orders of magnitude.
+    """
+    def __init__(self, bounds: typing.Tuple[float, float],
+                 function: typing.Callable, nodes: int):
+        x, w = np.polynomial.legendre.leggauss(nodes)
+        log_variable = (bounds[0] + bounds[1]) / 2 + (bounds[1] - bounds[0]) / 2 * x
+        super().__init__(10 ** log_variable, w * function(log_variable))
+
+
+# The types of the module level values read by functions which are data (e.g.
+# tabulated values), rather than modules, classes or other functions.
+_DIGESTED_GLOBAL_TYPES = (np.ndarray, int, float, complex, str, bytes, tuple, list)
+
+
+def _global_names(code: types.CodeType) -> typing.Set[str]:
+    # The names of the globals (and attributes) read by the given code,
+    # including by the functions defined within it.
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _update_digest(digest: typing.Any, value: typing.Any) -> None:
+    """
+    Feeds the parameters of the given value (e.g. a distribution) to the given
+    hash object, recursing into its public attributes, its containers and the
+    code, defaults and closures of its functions, as well as the module level
+    data which they read, such that distributions with different parameters
+    have different digests.
+    """
+    if isinstance(value, np.ndarray):
+        digest.update(f'{value.dtype}{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (tuple, list)):
+        digest.update(f'{type(value).__name__}{len(value)}'.encode())
+        for item in value:
+            _update_digest(digest, item)
+    elif isinstance(value, types.MethodType):
+        _update_digest(digest, value.__self__)
+        _update_digest(digest, value.__func__)
+    elif isinstance(value, types.FunctionType):
+        digest.update(value.__qualname__.encode())
+        _update_digest(digest, value.__code__)
+        _update_digest(digest, value.__defaults__ or ())
+        _update_digest(digest, [cell.cell_contents for cell in value.__closure__ or ()])
+        for name in sorted(_global_names(value.__code__)):
+            global_value = value.__globals__.get(name)
+            if isinstance(global_value, _DIGESTED_GLOBAL_TYPES):
+                digest.update(name.encode())
+                _update_digest(digest, global_value)
+    elif isinstance(value, types.CodeType):
+        digest.update(value.co_code)
+        _update_digest(digest, value.co_consts)
+        _update_digest(digest, value.co_names)
+    elif hasattr(value, '__dict__'):
+        digest.update(type(value).__qualname__.encode())
+        for name, attribute in sorted(vars(value).items()):
+            # Private attributes are derived from the public ones (e.g. tables).
+            if not name.startswith('_'):
+                digest.update(name.encode())
+                _update_digest(digest, attribute)
+    else:
+        digest.update(repr(value).encode())
+
+
+class SampleBank(SampleableDistribution):
+    """
+    Draws the samples of a distribution from a bank of ``bank_size``
+    samples of it, drawn once and saved as a ``.npy`` file in the directory
+    given by the ``CARA_SAMPLE_BANK_DIR`` environment variable, named after
+    a digest of the parameters of the distribution (such that a bank is
+    never reused for a distribution which has since changed). The
+    bank is drawn with the given seed, or by default with a seed derived
+    from its name and digest, such that no two banks are drawn from the
+    same stream of random numbers. The bank is memory-mapped, and the samples are a contiguous
+    window of it, starting at random, without copy: the processes sampling
+    the same bank share its pages in memory, and sampling costs next to
+    nothing.
+
+    The samples of successive windows overlap, so the bank should be much
+    larger than the sample size, and a bank only pays off for distributions
+    which are expensive to sample. Without ``CARA_SAMPLE_BANK_DIR``, or for
+    more samples than the bank, the distribution is sampled as usual.
+    """
+    def __init__(self, name: str, distribution: SampleableDistribution,
+                 bank_size: int = 2 ** 20, seed: typing.Optional[int] = None):
+        self.name = name
+        self.distribution = distribution
+        self.bank_size = bank_size
+        self.seed = seed
+        self.deterministic = distribution.deterministic
+        self._bank: typing.Optional[np.ndarray] = None
+
+    def __getstate__(self):
+        # Each process maps the bank of its own, rather than receiving a copy.
+        return dict(self.__dict__, _bank=None)
+
+    def _digest(self) -> str:
+        digest = hashlib.sha256()
+        _update_digest(digest, self.distribution)
+        return digest.hexdigest()
+
+    def _bank_seed(self, digest: str) -> int:
+        if self.seed is not None:
+            return self.seed
+        return int.from_bytes(hashlib.sha256(f'{self.name}-{digest}'.encode()).digest()[:8], 'little')
+
+    def _bank_path(self, directory: Path) -> Path:
+        # The name of the bank may not be a portable file name.
+        digest = self._digest()
+        bank_digest = hashlib.sha256(f'{digest}-{self._bank_seed(digest)}-{self.bank_size}'.encode())
+        return directory / f'{bank_digest.hexdigest()[:32]}.npy'
+
+    def _load_bank(self, directory: Path) -> np.ndarray:
+        path = self._bank_path(directory)
+        if not path.exists():
+            directory.mkdir(parents=True, exist_ok=True)
+            seed = self._bank_seed(self._digest())
+            samples = self.distribution.generate_samples(self.bank_size, np.random.default_rng(seed))
+            # Write the bank atomically, as other processes may be drawing it too.
+            temporary_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            with temporary_path.open('wb') as file:
+                np.save(file, np.asarray(samples, dtype=float))
+            os.replace(temporary_path, path)
+        return np.load(path, mmap_mode='r')
+
+    def generate_samples(self, size: int, rng: RandomGenerator = None) -> float_array_size_n:
+        directory = os.environ.get('CARA_SAMPLE_BANK_DIR')
+        if not directory or size > self.bank_size:
+            return self.distribution.generate_samples(size, rng)
+        if self._bank is None:
+            self._bank = self._load_bank(Path(directory))
+        start = int(_random(rng).uniform(0, self.bank_size - size + 1))
+        return self._bank[start:start + size]
 
-    def generate_samples(self, size: int) -> float_array_size_n:
-        kde_model = KernelDensity(kernel='gaussian',
-                                  bandwidth=self.kernel_bandwidth)
-        kde_model.fit(self.log_variable.reshape(-1, 1),
-                      sample_weight=self.frequencies)
-        return 10 ** kde_model.sample(n_samples=size)[:, 0]
+    def inverse_cdf(self, quantiles: float_array_size_n, rng: RandomGenerator = None) -> float_array_size_n:
+        return self.distribution.inverse_cdf(quantiles, rng)
 
 
 _VectorisedFloatOrSampleable = typing.Union[
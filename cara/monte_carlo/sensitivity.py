@@ -0,0 +1,117 @@
+import dataclasses
+import typing
+
+import numpy as np
+
+import cara.models
+
+from .models import MCModelBase, _SeedType, _chunk_seed_sequence, _seed_sequence
+
+# The fields whose samples the model integrates over (the aerosol diameters,
+# over which the exposure is averaged), rather than being one input value
+# per sample. They are kept the same in all of the sample matrices.
+_INTEGRATED_FIELDS = ('diameter', 'diameter_weight')
+
+
+@dataclasses.dataclass(frozen=True)
+class SobolIndices:
+    """
+    The first-order and total Sobol indices of each of the uncertain inputs
+    of a model, with their bootstrap confidence intervals.
+
+    """
+    #: The path of each of the inputs in the model (as accepted by ``nested_replace``).
+    names: typing.Tuple[str, ...]
+
+    #: The first-order index of each input: the fraction of the variance of
+    #: the quantity due to the input alone.
+    first_order: np.ndarray
+
+    #: The total index of each input: the fraction of the variance of the
+    #: quantity due to the input, including its interactions with the others.
+    total: np.ndarray
+
+    #: The (lower, upper) bounds of the confidence interval of the first-order
+    #: index of each input.
+    first_order_confidence: np.ndarray
+
+    #: The (lower, upper) bounds of the confidence interval of the total index
+    #: of each input.
+    total_confidence: np.ndarray
+
+
+def _indices(f_A: np.ndarray, f_B: np.ndarray, f_AB: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # The estimators of Saltelli et al. (2010) for the first-order index, and
+    # of Jansen (1999) for the total index, along the last axis.
+    variance = np.var(np.concatenate([f_A, f_B], axis=-1), axis=-1)
+    first_order = np.mean(f_B * (f_AB - f_A), axis=-1) / variance
+    total = 0.5 * np.mean((f_A - f_AB) ** 2, axis=-1) / variance
+    return first_order, total
+
+
+def sobol_indices(
+        mc_model: MCModelBase,
+        size: int,
+        quantity: typing.Callable[[typing.Any], cara.models._VectorisedFloat] = cara.models.ExposureModel.infection_probability,
+        n_bootstrap: int = 100,
+        confidence_level: float = 0.95,
+        seed: _SeedType = None,
+) -> SobolIndices:
+    """
+    Estimate the Sobol indices of ``quantity`` (by default the infection
+    probability) for each of the sampled distributions of the given model,
+    with the scheme of Saltelli et al., "Variance based sensitivity analysis
+    of model output" (2010).
+
+    The model is built, with ``size`` samples each, for two independent sets
+    of samples A and B, and for each input i for the samples of A with those
+    of the input i taken from B, each evaluation being vectorised over the
+    samples. The confidence intervals are estimated by bootstrapping these
+    evaluations ``n_bootstrap`` times.
+
+    The aerosol diameters aren't an input here: the exposure is integrated
+    over the diameter samples, which are the same for all of the evaluations.
+
+    Given a ``seed``, the samples of A and B and the bootstrap resamples are
+    derived from it (see :meth:`MCModelBase.build_model`), such that the
+    indices are reproducible.
+
+    """
+    seed_sequence = _seed_sequence(seed)
+    samples_A: typing.Dict[typing.Tuple[str, int], typing.Any] = {}
+    f_A = np.asarray(quantity(mc_model._build_model(
+        size, np.float64, samples_A, '', _chunk_seed_sequence(seed_sequence, 0),
+    )))
+
+    inputs = [key for key in samples_A if key[0].rsplit('.', 1)[-1] not in _INTEGRATED_FIELDS]
+    samples_B = {key: value for key, value in samples_A.items() if key not in inputs}
+    f_B = np.asarray(quantity(mc_model._build_model(
+        size, np.float64, samples_B, '', _chunk_seed_sequence(seed_sequence, 1),
+    )))
+
+    f_AB = np.empty((len(inputs), size))
+    for index, key in enumerate(inputs):
+        samples_AB = dict(samples_A)
+        samples_AB[key] = samples_B[key]
+        f_AB[index] = quantity(mc_model._build_model(size, np.float64, samples_AB, ''))
+
+    first_order, total = _indices(f_A, f_B, f_AB)
+
+    bootstrap_first_order = np.empty((len(inputs), n_bootstrap))
+    bootstrap_total = np.empty((len(inputs), n_bootstrap))
+    bootstrap_seed_sequence = _chunk_seed_sequence(seed_sequence, 2)
+    rng: typing.Any = np.random if bootstrap_seed_sequence is None else np.random.default_rng(bootstrap_seed_sequence)
+    for sample in range(n_bootstrap):
+        resample = rng.choice(size, size=size)
+        bootstrap_first_order[:, sample], bootstrap_total[:, sample] = _indices(
+            f_A[resample], f_B[resample], f_AB[:, resample],
+        )
+    percentiles = [50 * (1 - confidence_level), 50 * (1 + confidence_level)]
+
+    return SobolIndices(
+        names=tuple(path.lstrip('.') for path, _ in inputs),
+        first_order=first_order,
+        total=total,
+        first_order_confidence=np.percentile(bootstrap_first_order, percentiles, axis=-1).T,
+        total_confidence=np.percentile(bootstrap_total, percentiles, axis=-1).T,
+    )
@@ -0,0 +1,131 @@
+import dataclasses
+import typing
+
+import numpy as np
+
+import cara.models
+from cara import dataclass_utils
+
+from .models import MCModelBase
+
+_ModelType = typing.TypeVar('_ModelType')
+
+
+@dataclasses.dataclass(frozen=True)
+class Statistic:
+    """
+    A statistic over the samples of a quantity of an exposure model: its mean,
+    or the given percentile of its samples.
+
+    """
+    #: The name of the method of cara.models.ExposureModel giving the quantity.
+    quantity: str = 'infection_probability'
+
+    #: The percentile (between 0 and 100) of the samples, or None for their mean.
+    percentile: typing.Optional[float] = None
+
+    def __post_init__(self):
+        if self.quantity not in ('infection_probability', 'expected_new_cases'):
+            raise ValueError(f"Unsupported quantity {self.quantity!r}")
+
+    def __call__(self, model: cara.models.ExposureModel) -> float:
+        samples = getattr(model, self.quantity)()
+        if self.percentile is None:
+            return float(np.mean(samples))
+        return float(np.percentile(samples, self.percentile))
+
+
+@dataclasses.dataclass(frozen=True)
+class Solution:
+    #: The value of the parameter found.
+    value: float
+
+    #: The value of the statistic for that value of the parameter.
+    statistic: float
+
+    #: The number of evaluations of the model.
+    evaluations: int
+
+
+def solve_for_target(
+        mc_model: MCModelBase[_ModelType],
+        parameter: typing.Union[str, typing.Callable[[_ModelType, typing.Any], _ModelType]],
+        target: float,
+        bounds: typing.Tuple[float, float],
+        size: int,
+        statistic: typing.Callable[[typing.Any], float] = Statistic(),
+        integer: bool = False,
+        tolerance: typing.Optional[float] = None,
+        max_evaluations: int = 100,
+) -> Solution:
+    """
+    Find the value of a parameter of the scenario, within ``bounds``, at which
+    ``statistic`` (by default the mean infection probability) reaches the
+    ``target``, i.e. the minimum ventilation, or the maximum occupancy or
+    duration, for which the statistic doesn't exceed the target.
+
+    ``parameter`` is either the dotted path of the parameter in the model (as
+    accepted by ``nested_replace``, e.g.
+    ``'concentration_model.ventilation.air_exch'``), or a function returning
+    the model with the given value of the parameter, e.g. for the duration of
+    the presence of the exposed people::
+
+        lambda model, duration: nested_replace(
+            model, {'exposed.presence': SpecificInterval(((8., 8. + duration), ))},
+        )
+
+    The statistic must be monotonic in the parameter. The scenario is built
+    once, with ``size`` samples, and the bounds are then bisected (by steps of
+    one if ``integer``, e.g. for ``'exposed.number'``) until they are closer
+    than ``tolerance`` (by default a ten-thousandth of the range), each step
+    re-evaluating the model for the same samples. The value returned is the
+    bound of the last bracket for which the statistic doesn't exceed the
+    target.
+
+    """
+    model = mc_model.build_model(size)
+    if isinstance(parameter, str):
+        path = parameter
+        parameter = lambda model, value: dataclass_utils.nested_replace(model, {path: value})  # noqa: E731
+    cast = int if integer else float
+
+    evaluations = 0
+
+    def evaluate(value):
+        nonlocal evaluations
+        evaluations += 1
+        return statistic(parameter(model, cast(value)))  # type: ignore
+
+    low, high = bounds
+    if integer:
+        tolerance = max(tolerance or 1, 1)
+    elif tolerance is None:
+        tolerance = (high - low) * 1e-4
+    low_statistic, high_statistic = evaluate(low), evaluate(high)
+    if low_statistic > target and high_statistic > target:
+        raise ValueError(
+            f"The target {target} is exceeded throughout the bounds {bounds} "
+            f"(the statistic is {low_statistic} and {high_statistic} at the bounds)"
+        )
+    if low_statistic <= target and high_statistic <= target:
+        # The target is met throughout the bounds: the answer is the bound
+        # at which the statistic is the closest to the target.
+        if low_statistic > high_statistic:
+            return Solution(cast(low), low_statistic, evaluations)
+        return Solution(cast(high), high_statistic, evaluations)
+
+    # Bisect, keeping the bound meeting the target as ``safe``.
+    if low_statistic <= target:
+        safe, safe_statistic, unsafe = low, low_statistic, high
+    else:
+        safe, safe_statistic, unsafe = high, high_statistic, low
+    while abs(unsafe - safe) > tolerance:
+        if evaluations >= max_evaluations:
+            raise RuntimeError(f"No solution found within {max_evaluations} evaluations")
+        middle = (safe + unsafe) // 2 if integer else (safe + unsafe) / 2
+        middle_statistic = evaluate(middle)
+        if middle_statistic <= target:
+            safe, safe_statistic = middle, middle_statistic
+        else:
+            unsafe = middle
+    return Solution(cast(safe), safe_statistic, evaluations)
@@ -0,0 +1,144 @@
+import typing
+
+import numpy as np
+from scipy.special import ndtri, stdtrit
+
+import cara.models
+
+
+class RunningStatistics:
+    """
+    The statistics of a (vectorised) quantity, accumulated over successive
+    chunks of Monte-Carlo samples without keeping the samples themselves:
+    their count, mean, variance and, if bins are given, their histogram.
+
+    The samples are along the last axis of the values of the quantity (the
+    leading axes, e.g. time, being kept), and the variance of successive
+    chunks is combined as in Chan et al., "Updating Formulae and a Pairwise
+    Algorithm for Computing Sample Variances" (1979).
+
+    With ``batch_means``, the standard error of the mean is estimated from
+    the spread of the means of the chunks (the batch means method) rather
+    than from the spread of the samples, which would ignore the noise
+    shared by the samples of a chunk (e.g. of a quantity integrated over
+    the aerosol diameters of the chunk).
+
+    """
+    def __init__(self, bins: typing.Optional[np.ndarray] = None, batch_means: bool = False):
+        #: The edges of the histogram bins (None for no histogram).
+        self.bins = None if bins is None else np.asarray(bins, dtype=float)
+
+        #: Whether the standard error is estimated from the means of the chunks.
+        self.batch_means = batch_means
+
+        #: The number of samples accumulated so far.
+        self.count = 0
+
+        #: The number of chunks accumulated so far.
+        self.chunk_count = 0
+
+        self._mean: np.ndarray = np.zeros(())
+        self._m2: np.ndarray = np.zeros(())
+        # The part of _m2 due to the spread of the means of the chunks.
+        self._chunk_means_m2: np.ndarray = np.zeros(())
+        self._histogram: typing.Optional[np.ndarray] = None
+
+    def update(self, values: cara.models._VectorisedFloat, size: int) -> None:
+        """
+        Accumulate the values of the quantity for a chunk of ``size``
+        samples. Values which aren't vectorised over the samples are taken
+        as being the same for all of them.
+
+        """
+        samples = np.asarray(values)
+        if samples.shape[-1:] != (size, ):
+            samples = np.broadcast_to(samples[..., np.newaxis], samples.shape + (size, ))
+
+        chunk_mean = np.mean(samples, axis=-1, dtype=np.float64)
+        chunk_m2 = np.sum(np.square(samples - chunk_mean[..., np.newaxis], dtype=np.float64), axis=-1)
+
+        count = self.count + size
+        delta = chunk_mean - self._mean
+        chunk_means_m2 = delta ** 2 * self.count * size / count
+        self._mean = self._mean + delta * size / count
+        self._m2 = self._m2 + chunk_m2 + chunk_means_m2
+        self._chunk_means_m2 = self._chunk_means_m2 + chunk_means_m2
+        self.count = count
+        self.chunk_count += 1
+
+        if self.bins is not None:
+            histogram = self._chunk_histogram(samples)
+            self._histogram = histogram if self._histogram is None else self._histogram + histogram
+
+    def _chunk_histogram(self, samples: np.ndarray) -> np.ndarray:
+        assert self.bins is not None
+        n_bins = len(self.bins) - 1
+        rows = samples.reshape(-1, samples.shape[-1])
+        # As for np.histogram, the last bin includes its right edge, and the
+        # values outside of the bins are ignored.
+        bin_index = np.searchsorted(self.bins, rows, side='right') - 1
+        bin_index[rows == self.bins[-1]] = n_bins - 1
+        in_bins = (bin_index >= 0) & (bin_index < n_bins)
+        row_index = np.broadcast_to(np.arange(len(rows))[:, np.newaxis], rows.shape)
+        counts = np.bincount(
+            (row_index * n_bins + bin_index)[in_bins], minlength=len(rows) * n_bins,
+        )
+        return counts.reshape(samples.shape[:-1] + (n_bins, ))
+
+    @property
+    def mean(self) -> cara.models._VectorisedFloat:
+        return self._mean[()]
+
+    @property
+    def variance(self) -> cara.models._VectorisedFloat:
+        """
+        The (population) variance of the samples, as given by ``np.var``.
+        """
+        return (self._m2 / max(self.count, 1))[()]
+
+    @property
+    def standard_deviation(self) -> cara.models._VectorisedFloat:
+        return np.sqrt(self.variance)
+
+    @property
+    def standard_error(self) -> cara.models._VectorisedFloat:
+        """
+        The standard error of the mean of the samples. With ``batch_means``,
+        it is infinite until at least two chunks are accumulated.
+        """
+        if not self.batch_means:
+            return self.standard_deviation / np.sqrt(max(self.count, 1))
+        if self.chunk_count < 2:
+            return np.full_like(self._mean, np.inf)[()]
+        # The chunks of n_i samples, with means m_i, give the variance of a
+        # sample as sum(n_i * (m_i - mean) ** 2) / (chunk_count - 1).
+        return np.sqrt(self._chunk_means_m2 / (self.chunk_count - 1) / self.count)[()]
+
+    def confidence_interval(self, confidence_level: float = 0.95) -> typing.Tuple[
+            cara.models._VectorisedFloat, cara.models._VectorisedFloat]:
+        """
+        The (lower, upper) bounds of the confidence interval of the mean of
+        the samples, from the normal approximation of its distribution (or,
+        with ``batch_means``, from the Student t distribution of the means of
+        the chunks).
+        """
+        if not self.batch_means:
+            quantile = ndtri(0.5 + confidence_level / 2)
+        elif self.chunk_count < 2:
+            quantile = np.inf
+        else:
+            quantile = stdtrit(self.chunk_count - 1, 0.5 + confidence_level / 2)
+        half_width = quantile * self.standard_error
+        return self.mean - half_width, self.mean + half_width
+
+    @property
+    def histogram(self) -> np.ndarray:
+        """
+        The number of samples in each of the bins, for each of the values
+        along the leading axes of the quantity.
+        """
+        if self.bins is None:
+            raise ValueError("No bins were given for the histogram")
+        if self._histogram is None:
+            return np.zeros(len(self.bins) - 1, dtype=int)
+        return self._histogram
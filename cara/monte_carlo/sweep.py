@@ -0,0 +1,206 @@
+import concurrent.futures
+import dataclasses
+import itertools
+import numbers
+import os
+import typing
+
+import numpy as np
+
+import cara.models
+from cara import dataclass_utils
+from cara.utils import method_cache
+
+from .models import MCModelBase
+
+_ModelType = typing.TypeVar('_ModelType')
+
+
+def mean_infection_probability(model: cara.models.ExposureModel) -> cara.models._VectorisedFloat:
+    """The default quantity of a :func:`parameter_sweep`."""
+    return model.infection_probability()
+
+
+@dataclasses.dataclass(frozen=True)
+class SweepResult:
+    """
+    The result of a :func:`parameter_sweep`: the mean of the quantity over
+    the samples, at each point of the grid of the swept parameters.
+
+    """
+    #: The name (dotted path) of the parameter along each axis of the values.
+    names: typing.Tuple[str, ...]
+
+    #: The values taken by the parameter along each axis of the values.
+    coordinates: typing.Tuple[np.ndarray, ...]
+
+    #: The mean of the quantity, with one axis per parameter, in the order of
+    #: the names.
+    values: np.ndarray
+
+    def value_at(self, **point) -> np.ndarray:
+        """
+        The value at the given point of the grid, given by the name of each
+        parameter (as a keyword, with "." replaced by "__").
+
+        """
+        names = [name.replace('.', '__') for name in self.names]
+        if sorted(point) != sorted(names):
+            raise ValueError(f"The point must give a value for each of {names}")
+        index = []
+        for name, indices in zip(names, self._coordinate_indices()):
+            if point[name] not in indices:
+                raise ValueError(f"{point[name]!r} is not one of the values of {name}")
+            index.append(indices[point[name]])
+        return self.values[tuple(index)]
+
+    @method_cache
+    def _coordinate_indices(self) -> typing.Tuple[typing.Dict[typing.Any, int], ...]:
+        # The index of each of the values along each axis (the first one, for
+        # repeated values).
+        indices: typing.List[typing.Dict[typing.Any, int]] = []
+        for coordinates in self.coordinates:
+            axis_indices: typing.Dict[typing.Any, int] = {}
+            for index, value in enumerate(coordinates):
+                axis_indices.setdefault(value, index)
+            indices.append(axis_indices)
+        return tuple(indices)
+
+
+def _coordinates(values: typing.Sequence) -> np.ndarray:
+    if all(isinstance(value, numbers.Real) for value in values):
+        return np.asarray(values)
+    # Keep the other values (e.g. intervals) as they are, in an array of
+    # objects.
+    coordinates = np.empty(len(values), dtype=object)
+    for index, value in enumerate(values):
+        coordinates[index] = value
+    return coordinates
+
+
+def _field_type(model, path: str):
+    *parents, name = path.split('.')
+    for parent in parents:
+        model = getattr(model, parent)
+    for field in dataclasses.fields(model):
+        if field.name == name:
+            return field.type
+    raise AttributeError(f"{type(model).__name__} has no field {name!r}")
+
+
+def _is_vectorisable(model, path: str, values: np.ndarray) -> bool:
+    return (
+        _field_type(model, path) is cara.models._VectorisedFloat
+        and values.dtype.kind in 'fiu'
+    )
+
+
+def _evaluate_grid_point(
+        model: _ModelType,
+        replacements: typing.Dict[str, typing.Any],
+        quantity: typing.Callable[[_ModelType], cara.models._VectorisedFloat],
+) -> np.ndarray:
+    values = np.asarray(quantity(dataclass_utils.nested_replace(model, replacements)))
+    # The samples are along the last axis (absent if the quantity doesn't
+    # depend on them).
+    return np.mean(values, axis=-1) if values.ndim else values
+
+
+def _evaluate_grid_points(
+        model: _ModelType,
+        replacements: typing.Sequence[typing.Dict[str, typing.Any]],
+        quantity: typing.Callable[[_ModelType], cara.models._VectorisedFloat],
+) -> typing.List[np.ndarray]:
+    # A batch of grid points, such that the model (with all of its samples)
+    # is sent to the executor once per batch rather than once per point.
+    return [_evaluate_grid_point(model, point_replacements, quantity) for point_replacements in replacements]
+
+
+def parameter_sweep(
+        mc_model: MCModelBase[_ModelType],
+        axes: typing.Mapping[str, typing.Sequence],
+        size: int,
+        quantity: typing.Callable[[typing.Any], cara.models._VectorisedFloat] = mean_infection_probability,
+        executor_factory: typing.Optional[typing.Callable[[], concurrent.futures.Executor]] = None,
+        vectorise: bool = True,
+        dtype: typing.Type[np.floating] = np.float64,
+) -> SweepResult:
+    """
+    Evaluate the mean over the samples of ``quantity`` (a function giving
+    one value per sample of the model, by default the infection
+    probability) for the given scenario, over the grid of the
+    values of the given parameters (``axes`` maps the dotted path of each
+    parameter, as accepted by ``nested_replace``, to its values). For
+    example, for a grid of room volumes and air changes::
+
+        parameter_sweep(
+            exposure_model,
+            {'concentration_model.room.volume': [50., 100., 200.],
+             'concentration_model.ventilation.air_exch': [0.5, 1., 3., 6.]},
+            size=50_000,
+        )
+
+    The scenario is built once (with ``size`` samples, of the given dtype),
+    such that the sampled distributions are the same at all of the points
+    of the grid. The parameters which are vectorised floats in the model
+    are swept at once, along leading axes of their values (unless
+    ``vectorise`` is false, as the memory needed grows with the size of
+    their grid); the points of the grid of the other parameters (e.g. the
+    number of exposed people, or the presence intervals) are evaluated in
+    the processes of the executor given by ``executor_factory`` (by default
+    a ``ProcessPoolExecutor``). ``quantity`` must therefore be picklable.
+
+    """
+    if not axes:
+        raise ValueError("At least one axis must be given for the sweep")
+    model = mc_model.build_model(size, dtype=dtype)
+
+    names = tuple(axes)
+    coordinates = tuple(_coordinates(axes[name]) for name in names)
+    vectorised = [
+        vectorise and _is_vectorisable(model, name, values)
+        for name, values in zip(names, coordinates)
+    ]
+
+    # The vectorised parameters take each a leading axis of their own, in
+    # front of the sample axis.
+    vectorised_names = [name for name, is_vectorised in zip(names, vectorised) if is_vectorised]
+    vectorised_replacements = {}
+    for axis, name in enumerate(vectorised_names):
+        shape = [1] * (len(vectorised_names) + 1)
+        shape[axis] = -1
+        values = coordinates[names.index(name)].astype(np.result_type(dtype, np.float32))
+        vectorised_replacements[name] = values.reshape(shape)
+
+    looped_names = [name for name, is_vectorised in zip(names, vectorised) if not is_vectorised]
+    looped_points = list(itertools.product(*(axes[name] for name in looped_names)))
+    replacements = [
+        dict(zip(looped_names, point), **vectorised_replacements) for point in looped_points
+    ]
+
+    if len(replacements) == 1:
+        results = [_evaluate_grid_point(model, replacements[0], quantity)]
+    else:
+        # The grid points are split into (contiguous) batches, one per CPU.
+        n_batches = min([len(replacements), os.cpu_count() or 1])
+        bounds = np.linspace(0, len(replacements), n_batches + 1).astype(int)
+        batches = [replacements[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+        with (executor_factory or concurrent.futures.ProcessPoolExecutor)() as executor:
+            results = list(itertools.chain.from_iterable(executor.map(
+                _evaluate_grid_points,
+                itertools.repeat(model, len(batches)),
+                batches,
+                itertools.repeat(quantity, len(batches)),
+            )))
+
+    # The results have the looped axes first (in the order of the grid
+    # points), then the vectorised ones, which are reordered as given. A
+    # vectorised parameter on which the quantity doesn't depend leaves its
+    # axis of length one, hence the broadcast.
+    vectorised_shape = tuple(len(axes[name]) for name in vectorised_names)
+    values = np.stack([np.broadcast_to(result, vectorised_shape) for result in results]).reshape(
+        tuple(len(axes[name]) for name in looped_names) + vectorised_shape,
+    )
+    order = looped_names + vectorised_names
+    values = np.moveaxis(values, [order.index(name) for name in names], range(len(names)))
+    return SweepResult(names=names, coordinates=coordinates, values=values)
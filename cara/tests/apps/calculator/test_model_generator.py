@@ -10,6 +10,7 @@ from cara.apps.calculator import model_generator
 from cara.apps.calculator.model_generator import _hours2timestring
 from cara.apps.calculator.model_generator import minutes_since_midnight
 from cara import models
+from cara.monte_carlo import sampleable
 from cara.monte_carlo.data import expiration_distributions
 
 
@@ -502,3 +503,14 @@ def test_form_timezone(baseline_form_data, longitude, latitude, month, expected_
     name, offset = form.tz_name_and_utc_offset()
     assert name == expected_tz_name
     assert offset == expected_offset
+
+
+@retry(tries=10)
+def test_build_mc_model_expiration_quadrature(baseline_form: model_generator.FormData):
+    mc_model = baseline_form.build_mc_model(expiration_quadrature_nodes=48)
+    assert isinstance(mc_model.concentration_model.infected.expiration.diameter, sampleable.LogCustomQuadrature)
+
+    # The quadrature needs a fraction of the samples for the same result.
+    model = baseline_form.build_model(25_000, expiration_quadrature_nodes=48)
+    expected = np.mean(baseline_form.build_model(250_000).infection_probability())
+    npt.assert_allclose(np.mean(model.infection_probability()), expected, rtol=0.05)
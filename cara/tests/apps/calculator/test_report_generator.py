@@ -88,3 +88,17 @@ def test_interesting_times_w_temp(exposure_model_w_outside_temp_changes):
         5., 5.4, 5.8, 6.2, 6.6, 7., 7.4, 7.8, 8.
     ]
     np.testing.assert_allclose(result, expected)
+
+
+def test_alternative_scenarios_common_random_numbers(baseline_form):
+    # The alternative scenarios are each built by a worker of their own, from
+    # a common seed, such that they still share the samples of their common
+    # distributions.
+    scenarios = list(rep_gen.manufacture_alternative_scenarios(baseline_form).values())
+    seed = np.random.SeedSequence()
+    models = [scenario.build_model(1000, seed=seed) for scenario in scenarios]
+    for model in models[1:]:
+        numpy.testing.assert_array_equal(
+            model.concentration_model.infected.virus.viral_load_in_sputum,
+            models[0].concentration_model.infected.virus.viral_load_in_sputum,
+        )
@@ -29,3 +29,8 @@ class TestCalculatorJsonResponse(tornado.testing.AsyncHTTPTestCase):
         data = json.loads(response.body)
         self.assertIsInstance(data['prob_inf'], float)
         self.assertIsInstance(data['expected_new_cases'], float)
+        self.assertIsInstance(data['sample_size'], int)
+        for name in ['prob_inf', 'expected_new_cases']:
+            lower, upper = data[f'{name}_confidence_interval']
+            self.assertLessEqual(lower, data[name])
+            self.assertLessEqual(data[name], upper)
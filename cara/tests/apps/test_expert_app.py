@@ -1,6 +1,9 @@
 import pytest
 
 import cara.apps
+import cara.apps.expert
+from cara import models
+from cara.dataclass_utils import nested_replace
 
 
 @pytest.fixture
@@ -20,3 +23,19 @@ def test_new_scenario_changes_tab(expert_app):
     assert expert_app.multi_model_view.widget.selected_index == 0
     expert_app.add_scenario("Another scenario")
     assert expert_app.multi_model_view.widget.selected_index == 1
+
+
+def test_textual_result_reuses_the_deposited_exposure():
+    # The reproduction number should be derived from the deposited exposure
+    # already computed for the infection probability, rather than from a
+    # whole new model with a single infected person.
+    model = nested_replace(
+        cara.apps.expert.baseline_model, {'concentration_model.infected.number': 2},
+    )
+    integrated_concentration = models.ConcentrationModel._normed_integrated_concentration_table
+    integrated_concentration.cache_clear()
+    model.deposited_exposure()
+    misses = integrated_concentration.cache_info().misses
+
+    cara.apps.expert.ExposureModelResult().update_textual_result(model)
+    assert integrated_concentration.cache_info().misses == misses
@@ -1,4 +1,5 @@
 import datetime
+import json
 
 import dateutil.tz
 import numpy as np
@@ -18,6 +19,78 @@ def test_nearest_wx_station():
     assert station_name == 'MELBOURNE ESSENDON'
 
 
+def test_build_wx_store(tmp_path):
+    source = tmp_path / 'weather.json'
+    source.write_text(json.dumps({
+        'station-1': {'1': list(range(24)), '2': [0.] * 8},
+        'station-2': {str(month): [float(month)] * 24 for month in range(1, 13)},
+    }))
+    wx.build_wx_store(source, tmp_path / 'weather.npy', tmp_path / 'stations.txt')
+
+    # These stations have no known location, hence no timezone.
+    assert (tmp_path / 'stations.txt').read_text().splitlines() == ['station-1 -', 'station-2 -']
+    temperatures = np.load(tmp_path / 'weather.npy', mmap_mode='r')
+    assert temperatures.shape == (2, 12, 24)
+    assert temperatures.dtype == np.float32
+    np.testing.assert_array_equal(temperatures[0, 0], range(24))
+    # The months with missing (or non-hourly) data are NaN.
+    assert np.all(np.isnan(temperatures[0, 1:]))
+    np.testing.assert_array_equal(temperatures[1, :, 0], range(1, 13))
+
+
+def test_mean_hourly_temperatures():
+    geneva_station = wx.nearest_wx_station(longitude=6.14275, latitude=46.20833)[0]
+    temperatures = wx.mean_hourly_temperatures(geneva_station, 6)
+    assert len(temperatures) == 24
+    np.testing.assert_allclose(temperatures, wx.wx_data()[geneva_station]['6'], atol=1e-5)
+
+
+def test_wx_store__not_built(tmp_path, monkeypatch):
+    # Without the store, the source data is read (rather than the store being
+    # built on the fly), and the timezones are looked up as needed.
+    monkeypatch.setattr(wx, 'WX_STORE_LOCATION', tmp_path / 'weather.npy')
+    monkeypatch.setattr(wx, 'build_wx_store', lambda *args: pytest.fail("Unexpected build"))
+    wx._wx_store.cache_clear()
+    try:
+        station_indices, station_timezones, temperatures = wx._wx_store()
+    finally:
+        wx._wx_store.cache_clear()
+    assert not (tmp_path / 'weather.npy').exists()
+    assert station_timezones == {}
+    assert temperatures.shape == (len(station_indices), 12, 24)
+
+
+def test_mean_hourly_temperatures__incomplete():
+    # The data of this station is for January only.
+    with pytest.raises(ValueError, match='No complete weather data'):
+        wx.mean_hourly_temperatures('036880-99999', 2)
+
+
+def test_timezone_at__station(monkeypatch):
+    alice_springs_station = wx.nearest_wx_station(longitude=133.902, latitude=-23.807)[0]
+    assert wx._wx_store()[1][alice_springs_station] == 'Australia/Darwin'
+    # Geneva is too close to the French border for its station to have a timezone.
+    geneva_station = wx.nearest_wx_station(longitude=6.14275, latitude=46.20833)[0]
+    assert wx._wx_store()[1][geneva_station] is None
+    # The timezones are also held in the order of the stations of the kd-tree.
+    station_ids = list(wx.wx_station_data())
+    assert wx._wx_station_timezone_names()[station_ids.index(alice_springs_station)] == 'Australia/Darwin'
+
+    # Close to the station, its timezone is used without a lookup.
+    def timezone_name_at(latitude, longitude):
+        raise AssertionError("Unexpected timezone lookup")
+    monkeypatch.setattr(wx, '_timezone_name_at', timezone_name_at)
+    assert wx.timezone_at(latitude=-23.85, longitude=133.95) == dateutil.tz.gettz('Australia/Darwin')
+
+
+def test_timezone_at__cached():
+    wx.timezone_at(latitude=-30.123456, longitude=-120.)
+    hits = wx._timezone_name_at.cache_info().hits
+    # The lookups are cached for the location rounded to 4 decimals.
+    assert wx.timezone_at(latitude=-30.12346, longitude=-120.) == dateutil.tz.gettz('Etc/GMT+8')
+    assert wx._timezone_name_at.cache_info().hits == hits + 1
+
+
 def test_refine():
     source_times = [0, 3, 6, 9, 12, 15, 18, 21]
     data = [0, 30, 60, 90, 120, 90, 60, 30]
@@ -66,6 +139,9 @@ def test_timezone_at__out_of_range():
         [6.14275, 46.20833, 'Europe/Zurich'],  # Geneva
         [144.96751, -37.81739, "Australia/Melbourne"],  # Melbourne
         [-176.433333, -44.033333, 'Pacific/Chatham'],  # Chatham Islands
+        # Close to stations, but across a border from them.
+        [-55.9689, -27.2902, 'America/Asuncion'],
+        [-71.61, -45.93, 'America/Argentina/Catamarca'],
     ]
 )
 def test_timezone_at__expected(latitude, longitude, expected_tz_name):
@@ -1,3 +1,4 @@
+import dataclasses
 import re
 
 import numpy as np
@@ -137,3 +138,154 @@ def test_integrated_concentration(simple_conc_model):
     c3 = simple_conc_model.integrated_concentration(1, 2)
     assert c1 != 0
     npt.assert_almost_equal(c1, c2 + c3, decimal=15)
+
+
+def test_concentration_vectorised_in_time(simple_conc_model):
+    times = np.array([0., 0.25, 0.5, 0.75, 1., 1.05, 1.1, 1.5, 2., 2.5, 3.])
+    concentrations = simple_conc_model.concentration(times)
+    assert concentrations.shape == times.shape
+    npt.assert_allclose(
+        concentrations,
+        [simple_conc_model.concentration(float(time)) for time in times],
+        rtol=1e-14,
+    )
+
+
+def test_concentration_vectorised_in_time_and_samples(simple_conc_model):
+    model = dataclasses.replace(
+        simple_conc_model, room=models.Room(np.array([50., 75., 100.])),
+    )
+    times = np.linspace(0., 3., 31)
+    concentrations = model.concentration(times)
+    assert concentrations.shape == (31, 3)
+    npt.assert_allclose(
+        concentrations,
+        [np.broadcast_to(model.concentration(float(time)), (3,)) for time in times],
+        rtol=1e-14,
+    )
+
+
+def test_concentration_vectorised_in_time_unsorted(simple_conc_model):
+    with pytest.raises(ValueError, match="must be sorted"):
+        simple_conc_model.concentration(np.array([1., 0.5]))
+
+
+def test_concentration_vectorised_in_time_out_of_range(simple_conc_model):
+    with pytest.raises(
+            ValueError,
+            match=re.escape("The requested time (3.1) is greater than last available state change time (3.0)")
+    ):
+        simple_conc_model.concentration(np.array([1., 3.1]))
+
+
+@pytest.mark.parametrize(
+    "start, stop", [
+        [0., 3.],
+        [0.2, 0.7],
+        [0.6, 0.9],
+        [0.75, 1.05],
+        [1.05, 1.08],
+        [0.5, 2.5],
+        [1.1, 2.],
+        [2.9, 3.5],
+    ]
+)
+def test_normed_integrated_concentration(simple_conc_model, start, stop):
+    times = np.linspace(start, min([stop, 3.]), 20001)
+    npt.assert_allclose(
+        simple_conc_model.normed_integrated_concentration(start, stop),
+        np.trapz(simple_conc_model._normed_concentration_sweep(times), times),
+        rtol=1e-6,
+    )
+
+
+def test_normed_integrated_concentration_many_state_changes(simple_conc_model):
+    # Well beyond the recursion limit, were the state changes handled recursively.
+    n_steps = 5000
+    model = dataclasses.replace(
+        simple_conc_model,
+        ventilation=models.SlidingWindow(
+            active=models.PeriodicInterval(period=120, duration=60),
+            outside_temp=models.PiecewiseConstant(
+                tuple(np.linspace(0., 3., n_steps + 1)), tuple(280. + 5 * np.sin(np.arange(n_steps))),
+            ),
+            window_height=1.6,
+            opening_length=0.6,
+        ),
+    )
+    assert len(model.state_change_times()) > n_steps
+    times = np.linspace(0., 3., 20001)
+    npt.assert_allclose(
+        model.normed_integrated_concentration(0., 3.),
+        np.trapz(model._normed_concentration_sweep(times), times),
+        rtol=1e-6,
+    )
+    npt.assert_allclose(model.concentration(float(times[-1001])), model.concentration(times)[-1001], rtol=1e-14)
+
+
+def test_infectious_virus_removal_rate_vectorised_in_time(simple_conc_model):
+    model = dataclasses.replace(
+        simple_conc_model,
+        room=models.Room(75, models.PiecewiseConstant((0., 1., 24.), (290., 293.)), np.array([0.3, 0.5, 0.7])),
+    )
+    times = np.array(model.state_change_times())
+    removal_rates = model.infectious_virus_removal_rate(times)
+    assert removal_rates.shape == (len(times), 3)
+    npt.assert_allclose(
+        removal_rates,
+        [np.broadcast_to(model.infectious_virus_removal_rate(float(time)), (3, )) for time in times],
+        rtol=1e-14,
+    )
+
+
+def test_infectious_virus_removal_rate_vectorised_in_time_dtype(simple_conc_model):
+    # The per-time temperatures and air exchanges (of plain floats) don't
+    # promote single precision samples to double precision.
+    outside_temp = models.PiecewiseConstant((0., 1., 24.), (283., 288.))
+    model = dataclasses.replace(
+        simple_conc_model,
+        room=models.Room(75, models.PiecewiseConstant((0., 1., 24.), (290., 293.)), np.array([0.3, 0.5], dtype=np.float32)),
+        ventilation=models.MultipleVentilation((
+            models.SlidingWindow(
+                active=models.SpecificInterval(((0.5, 2.), )), outside_temp=outside_temp,
+                window_height=np.array([1., 1.5], dtype=np.float32), opening_length=0.6,
+            ),
+            models.HVACMechanical(active=models.SpecificInterval(((1., 3.), )), q_air_mech=500.),
+        )),
+    )
+    times = np.array(model.state_change_times())
+    removal_rates = model.infectious_virus_removal_rate(times)
+    assert removal_rates.dtype == np.float32
+    npt.assert_allclose(
+        removal_rates,
+        [np.broadcast_to(model.infectious_virus_removal_rate(float(time)), (2, )) for time in times],
+        rtol=1e-5,
+    )
+    assert model._state_change_removal_rates().dtype == np.float32
+
+
+def test_removal_rate_evaluated_once_over_state_changes(simple_conc_model, monkeypatch):
+    model = dataclasses.replace(
+        simple_conc_model,
+        room=models.Room(75, models.PiecewiseConstant((0., 1., 24.), (290., 293.)), np.array([0.3, 0.5, 0.7])),
+    )
+    times = model.state_change_times()
+    npt.assert_allclose(
+        model._state_change_removal_rates(),
+        [np.broadcast_to(model.infectious_virus_removal_rate(time), (3, )) for time in times[1:]],
+        rtol=1e-14,
+    )
+
+    requested_times = []
+    removal_rate = models.ConcentrationModel.infectious_virus_removal_rate
+
+    def recording_removal_rate(self, time):
+        requested_times.append(time)
+        return removal_rate(self, time)
+
+    monkeypatch.setattr(models.ConcentrationModel, 'infectious_virus_removal_rate', recording_removal_rate)
+    model = dataclasses.replace(model)
+    model.normed_integrated_concentration(0., 3.)
+    model.concentration(np.linspace(0., 3., 31))
+    assert len(requested_times) == 1
+    npt.assert_array_equal(requested_times[0], times[1:])
@@ -19,7 +19,7 @@ class KnownNormedconcentration(models.ConcentrationModel):
     """
     normed_concentration_function: typing.Callable = lambda x: 0
 
-    def infectious_virus_removal_rate(self, time: float) -> models._VectorisedFloat:
+    def infectious_virus_removal_rate(self, time: models._VectorisedTime) -> models._VectorisedFloat:
         # Very large decay constant -> same as constant concentration
         return 1.e50
 
@@ -225,3 +225,37 @@ def test_infectious_dose_vectorisation(sr_model):
     inf_probability = model.infection_probability()
     assert isinstance(inf_probability, np.ndarray)
     assert inf_probability.shape == (3, )
+
+
+def test_cumulative_deposited_exposure(conc_model, sr_model):
+    population = models.Population(
+        10, models.SpecificInterval(((0.5, 1.005), (12., 13.))), models.Mask.types['Type I'],
+        models.Activity.types['Standing'], 0.,
+    )
+    model = ExposureModel(conc_model, sr_model, population)
+    times = np.linspace(0., 14., 57)
+    cumulative_exposure = model.cumulative_deposited_exposure(times)
+    assert cumulative_exposure.shape == times.shape
+    assert cumulative_exposure[0] == 0.
+    np.testing.assert_allclose(
+        cumulative_exposure[1:],
+        np.cumsum([
+            model.deposited_exposure_between_bounds(float(time1), float(time2))
+            for time1, time2 in zip(times[:-1], times[1:])
+        ]),
+        rtol=1e-12,
+    )
+    np.testing.assert_allclose(cumulative_exposure[-1], model.deposited_exposure(), rtol=1e-12)
+    np.testing.assert_allclose(
+        model.cumulative_long_range_deposited_exposure(times, mean=True), cumulative_exposure, rtol=1e-12,
+    )
+
+
+def test_cumulative_deposited_exposure_unsorted(conc_model, sr_model):
+    population = models.Population(
+        10, models.SpecificInterval(((0., 1.), )), models.Mask.types['Type I'],
+        models.Activity.types['Standing'], 0.,
+    )
+    model = ExposureModel(conc_model, sr_model, population)
+    with pytest.raises(ValueError, match="must be sorted"):
+        model.cumulative_deposited_exposure(np.array([1., 0.5]))
@@ -0,0 +1,53 @@
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from cara import models
+
+
+@pytest.mark.parametrize(
+    "interval, expected_boundaries", [
+        [models.SpecificInterval(()), np.empty((0, 2))],
+        [models.SpecificInterval(((1., 2.), (3., 4.))), [[1., 2.], [3., 4.]]],
+        [models.SpecificInterval(((1., 2.), (2., 4.), (5., 5.))), [[1., 4.]]],
+        [models.PeriodicInterval(120, 15), [[2 * i, 2 * i + 0.25] for i in range(12)]],
+        [models.PeriodicInterval(120, 180), [[0., 25.]]],
+        [models.PeriodicInterval(120, 0), np.empty((0, 2))],
+    ]
+)
+def test_boundaries_array(interval, expected_boundaries):
+    npt.assert_array_equal(interval.boundaries_array(), expected_boundaries)
+
+
+@pytest.mark.parametrize(
+    "interval", [
+        models.SpecificInterval(()),
+        models.SpecificInterval(((1., 2.), (2., 4.), (6.5, 7.))),
+        models.PeriodicInterval(60, 10, start=0.5),
+        models.PeriodicInterval(120, 180),
+    ]
+)
+def test_triggered_vectorised(interval):
+    times = np.linspace(-1., 25., 313)
+    expected = [
+        any(start < time <= end for start, end in interval.boundaries())
+        for time in times
+    ]
+    npt.assert_array_equal(interval.triggered(times), expected)
+    assert [interval.triggered(float(time)) for time in times] == expected
+
+
+def test_intersect():
+    interval = models.SpecificInterval(((1., 3.), (5., 6.), (8., 10.)))
+    other = models.SpecificInterval(((2., 5.), (5.5, 9.)))
+    assert interval.intersect(other) == models.SpecificInterval(
+        ((2., 3.), (5.5, 6.), (8., 9.)))
+    assert other.intersect(interval) == interval.intersect(other)
+    assert interval.intersect(models.SpecificInterval(((3., 5.), ))).present_times == ()
+
+
+def test_union():
+    interval = models.SpecificInterval(((1., 3.), (5., 6.), (8., 10.)))
+    other = models.SpecificInterval(((3., 4.), (5.5, 9.)))
+    assert interval.union(other) == models.SpecificInterval(((1., 4.), (5., 10.)))
+    assert interval.union(models.SpecificInterval(())) == interval
@@ -32,3 +32,10 @@ def test_mask_exhale(diameter, factor_exhale, expected_exhale_efficiency):
     mask = models.Mask(η_inhale=0.3, factor_exhale=factor_exhale)
     npt.assert_almost_equal(mask.exhale_efficiency(diameter),
                             expected_exhale_efficiency)
+
+
+def test_mask_exhale_multi_dimensional():
+    mask = models.Mask(η_inhale=0.3)
+    diameters = np.array([[0.3, 0.7], [1., 4.]])
+    npt.assert_almost_equal(mask.exhale_efficiency(diameters),
+                            [[0., 0.56711], [0.7149, 0.8167]])
@@ -83,3 +83,63 @@ def test_piecewiseconstant_vs_interval(time):
 def test_piecewiseconstant_transition_times():
     outside_temp = data.GenevaTemperatures['Jan']
     assert set(outside_temp.transition_times) == outside_temp.interval().transition_times()
+
+
+def test_piecewiseconstant_vectorised_in_time():
+    transition_times = (0, 8, 16, 24)
+    values = (np.array([2, 3]), np.array([5, 7]), np.array([8, 9]))
+    fun = models.PiecewiseConstant(transition_times, values)
+    times = np.array([-1, 0, 4, 8, 8.5, 16, 20, 24, 25])
+    result = fun.value(times)
+    assert result.shape == (9, 2)
+    np.testing.assert_array_equal(result, [fun.value(float(time)) for time in times])
+
+
+@pytest.mark.parametrize(
+    "time, expected_value",
+    [
+        [0, 8],
+        [0.5, 2],
+        [8, 2],
+        [10, 5],
+        [20.5, 8],
+        [24, 8],
+        [24.5, 2],
+        [-1, 8],
+        [-14, 5],
+        [58, 5],
+    ],
+)
+def test_periodic_piecewiseconstant(time, expected_value):
+    fun = models.PeriodicPiecewiseConstant((0, 8, 16), (2, 5, 8))
+    assert fun.value(time) == expected_value
+    assert fun.value(np.array([time]))[0] == expected_value
+
+
+def test_periodic_piecewiseconstant_shifted():
+    # A profile which doesn't start at midnight behaves as the same profile
+    # rotated to start at midnight.
+    fun = models.PeriodicPiecewiseConstant((6., 12., 18., 20.), (1, 2, 3, 4))
+    rotated = models.PiecewiseConstant((0., 6., 12., 18., 20., 24.), (4, 1, 2, 3, 4))
+    times = np.linspace(0.05, 24, 480)
+    np.testing.assert_array_equal(fun.value(times), rotated.value(times))
+
+
+def test_periodic_piecewiseconstant_wrongarguments():
+    with pytest.raises(ValueError, match="as many elements as values"):
+        models.PeriodicPiecewiseConstant((0, 8, 16, 24), (2, 5, 8))
+    with pytest.raises(ValueError, match="within one period"):
+        models.PeriodicPiecewiseConstant((0, 8, 24), (2, 5, 8))
+    with pytest.raises(ValueError, match="must be sorted"):
+        models.PeriodicPiecewiseConstant((8, 0, 16), (2, 5, 8))
+
+
+def test_periodic_piecewiseconstant_interval():
+    fun = models.PeriodicPiecewiseConstant((0, 8, 16), (0, 1, 1))
+    assert fun.interval().boundaries() == ((8, 16), (16, 24))
+
+
+def test_periodic_piecewiseconstant_interp():
+    refined_fun = models.PeriodicPiecewiseConstant((0, 8, 16), (2, 5, 8)).refine(refine_factor=2)
+    assert refined_fun.transition_times == (0, 4, 8, 12, 16, 20)
+    assert refined_fun.values == (2, 3.5, 5, 6.5, 8, 5)
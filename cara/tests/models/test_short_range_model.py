@@ -3,7 +3,7 @@ import typing
 import numpy as np
 import pytest
 
-from cara import models
+from cara import dataclass_utils, models
 import cara.monte_carlo as mc_models
 from cara.apps.calculator.model_generator import build_expiration
 from cara.monte_carlo.data import short_range_expiration_distributions,\
@@ -153,3 +153,102 @@ def test_short_range_exposure_with_ndarray_mask():
             e_model.deposited_exposure()[0]*np.array([1., 0.7, 0.5]),
             rtol=1e-8)
 
+
+def test_short_range_concentration_vectorised_in_time(concentration_model, short_range_model):
+    e_model = mc_models.ExposureModel(
+        concentration_model=concentration_model,
+        short_range=(short_range_model,),
+        exposed=mc_models.Population(
+            number=1,
+            presence=models.SpecificInterval(present_times=((8.5, 12.5), (13.5, 17.5))),
+            mask=models.Mask.types['No mask'],
+            activity=models.Activity.types['Light activity'],
+            host_immunity=0.,
+        ),
+    ).build_model(1000)
+    times = np.linspace(8.5, 12.5, 41)
+    concentrations = e_model.concentration(times)
+    assert concentrations.shape == (41, 1000)
+    np.testing.assert_allclose(
+        concentrations,
+        [e_model.concentration(float(time)) for time in times],
+        rtol=1e-12,
+    )
+
+
+def test_cumulative_deposited_exposure_with_short_range(concentration_model, short_range_model):
+    e_model = mc_models.ExposureModel(
+        concentration_model=concentration_model,
+        short_range=(short_range_model,),
+        exposed=mc_models.Population(
+            number=1,
+            presence=models.SpecificInterval(present_times=((8.5, 12.5), (13.5, 17.5))),
+            mask=models.Mask.types['No mask'],
+            activity=models.Activity.types['Light activity'],
+            host_immunity=0.,
+        ),
+    ).build_model(1000)
+    times = np.linspace(8., 17.5, 39)
+    pairs = list(zip(times[:-1].tolist(), times[1:].tolist()))
+
+    cumulative_exposure = e_model.cumulative_deposited_exposure(times)
+    assert cumulative_exposure.shape == (39, 1000)
+    np.testing.assert_allclose(
+        cumulative_exposure[1:],
+        np.cumsum([e_model.deposited_exposure_between_bounds(*pair) for pair in pairs], axis=0),
+        rtol=1e-12,
+    )
+    np.testing.assert_allclose(
+        e_model.cumulative_deposited_exposure(times, mean=True), cumulative_exposure.mean(axis=1),
+        rtol=1e-12,
+    )
+    np.testing.assert_allclose(
+        e_model.cumulative_long_range_deposited_exposure(times)[1:],
+        np.cumsum([e_model.long_range_deposited_exposure_between_bounds(*pair) for pair in pairs], axis=0),
+        rtol=1e-12,
+    )
+
+
+def test_reproduction_number_with_short_range(concentration_model, short_range_model):
+    e_model = mc_models.ExposureModel(
+        concentration_model=concentration_model,
+        short_range=(short_range_model,),
+        exposed=mc_models.Population(
+            number=10,
+            presence=models.SpecificInterval(present_times=((8.5, 12.5), (13.5, 17.5))),
+            mask=models.Mask.types['No mask'],
+            activity=models.Activity.types['Light activity'],
+            host_immunity=0.,
+        ),
+    ).build_model(1000)
+    multiple_infected = dataclass_utils.nested_replace(
+        e_model, {'concentration_model.infected.number': 3},
+    )
+    np.testing.assert_allclose(
+        multiple_infected.reproduction_number(), e_model.expected_new_cases(),
+        rtol=1e-12,
+    )
+
+
+def test_short_range_exposure_multi_dimensional(concentration_model, short_range_model):
+    # A sweep over the room volume, as a leading axis of the parameters.
+    volumes = np.array([50., 75., 150.])
+    e_model = mc_models.ExposureModel(
+        concentration_model=concentration_model,
+        short_range=(short_range_model,),
+        exposed=mc_models.Population(
+            number=1,
+            presence=models.SpecificInterval(present_times=((8.5, 12.5), (13.5, 17.5))),
+            mask=models.Mask.types['No mask'],
+            activity=models.Activity.types['Light activity'],
+            host_immunity=0.,
+        ),
+    ).build_model(1000)
+    sweep = dataclass_utils.nested_replace(
+        e_model, {'concentration_model.room.volume': volumes[:, np.newaxis]},
+    )
+    assert sweep.infection_probability().shape == (3, 1000)
+    assert sweep.concentration(np.array([10.75, 11.5])).shape == (2, 3, 1000)
+    for volume, infection_probability in zip(volumes, sweep.infection_probability()):
+        model = dataclass_utils.nested_replace(e_model, {'concentration_model.room.volume': volume})
+        np.testing.assert_allclose(infection_probability, model.infection_probability(), rtol=1e-12)
@@ -10,10 +10,11 @@ from retry import retry
 
 import cara.monte_carlo as mc
 from cara import models,data
+from cara.dataclass_utils import nested_replace
 from cara.utils import method_cache
 from cara.models import _VectorisedFloat,Interval,SpecificInterval
 from cara.monte_carlo.sampleable import LogNormal
-from cara.monte_carlo.data import (expiration_distributions,
+from cara.monte_carlo.data import (expiration_distribution, expiration_distributions,
         expiration_BLO_factors,short_range_expiration_distributions,
         short_range_distances,virus_distributions,activity_distributions)
 
@@ -817,3 +818,77 @@ def test_exposure_with_shortrange_and_distributions(expo_sr_model_distr,
         rtol=0.03
         )
 
+
+
+# With a quadrature over the aerosol diameters, an order of magnitude
+# fewer samples are needed to reach the same accuracy.
+QUADRATURE_SAMPLE_SIZE = SAMPLE_SIZE // 10
+
+
+def quadrature_expiration(expiration: str, d_max: float = 30.) -> mc.Expiration:
+    return expiration_distribution(expiration_BLO_factors[expiration],
+                                   d_max=d_max, quadrature_nodes=48)
+
+
+@pytest.fixture
+def expo_sr_model_quadrature(expo_sr_model) -> mc.ExposureModel:
+    return nested_replace(expo_sr_model, {
+        'concentration_model.infected.expiration': quadrature_expiration('Breathing'),
+        'short_range': (
+            nested_replace(expo_sr_model.short_range[0],
+                           {'expiration': quadrature_expiration('Speaking', d_max=100.)}),
+            nested_replace(expo_sr_model.short_range[1],
+                           {'expiration': quadrature_expiration('Breathing', d_max=100.)}),
+        ),
+    })
+
+
+@pytest.fixture
+def expo_sr_model_distr_quadrature(expo_sr_model_distr) -> mc.ExposureModel:
+    return nested_replace(expo_sr_model_distr, {
+        'concentration_model.infected.expiration': quadrature_expiration('Breathing'),
+        'short_range': (
+            nested_replace(expo_sr_model_distr.short_range[0],
+                           {'expiration': quadrature_expiration('Breathing', d_max=100.)}),
+            nested_replace(expo_sr_model_distr.short_range[1],
+                           {'expiration': quadrature_expiration('Speaking', d_max=100.)}),
+        ),
+    })
+
+
+@pytest.mark.parametrize(
+    "time", [10.75, 14.75, 16.]
+)
+def test_concentration_with_shortrange_quadrature(expo_sr_model_quadrature,
+                                                  simple_expo_sr_model,time):
+    npt.assert_allclose(
+        expo_sr_model_quadrature.build_model(QUADRATURE_SAMPLE_SIZE).concentration(time).mean(),
+        simple_expo_sr_model.total_concentration(time).mean(), rtol=1e-3
+        )
+
+
+def test_exposure_with_shortrange_quadrature(expo_sr_model_quadrature,
+                                             simple_expo_sr_model):
+    model = expo_sr_model_quadrature.build_model(QUADRATURE_SAMPLE_SIZE)
+    npt.assert_allclose(
+        model.deposited_exposure().mean(),
+        simple_expo_sr_model.dose().mean(), rtol=1e-3
+        )
+    npt.assert_allclose(
+        model.infection_probability().mean(),
+        simple_expo_sr_model.probability_infection().mean(), rtol=1e-3
+        )
+
+
+def test_exposure_with_shortrange_and_distributions_quadrature(
+        expo_sr_model_distr_quadrature, simple_expo_sr_model_distr):
+    model = expo_sr_model_distr_quadrature.build_model(QUADRATURE_SAMPLE_SIZE)
+    npt.assert_allclose(
+        model.deposited_exposure().mean(),
+        simple_expo_sr_model_distr.dose().mean(), rtol=0.05
+        )
+    npt.assert_allclose(
+        model.infection_probability().mean(),
+        simple_expo_sr_model_distr.probability_infection().mean(),
+        rtol=0.03
+        )
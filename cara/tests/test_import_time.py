@@ -0,0 +1,30 @@
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+import cara
+
+# Dependencies which are slow to import, and are only imported when used
+# (e.g. when first accessing the predefined distributions).
+SLOW_MODULES = {
+    'scipy.interpolate', 'scipy.spatial', 'scipy.stats', 'timezonefinder',
+    'matplotlib', 'ipywidgets',
+}
+
+
+@pytest.mark.parametrize(
+    "module", [
+        "cara.data",
+        "cara.monte_carlo.data",
+        "cara.apps.calculator",
+    ]
+)
+def test_slow_modules_not_imported(module):
+    # Import in a fresh interpreter, as e.g. a new worker process would.
+    result = subprocess.run(
+        [sys.executable, '-c', f'import sys; import {module}; print(*sys.modules)'],
+        cwd=Path(cara.__file__).parent.parent, capture_output=True, text=True, check=True,
+    )
+    assert not SLOW_MODULES & set(result.stdout.split())
@@ -1,4 +1,7 @@
+import concurrent.futures
 import dataclasses
+import os
+import tracemalloc
 
 import numpy as np
 import pytest
@@ -6,6 +9,8 @@ import pytest
 import cara.models
 import cara.monte_carlo.models as mc_models
 import cara.monte_carlo.sampleable
+from cara.dataclass_utils import nested_replace
+from cara.monte_carlo.data import activity_distributions, expiration_distributions, mask_distributions, virus_distributions
 
 MODEL_CLASSES = [
     cls for cls in vars(cara.models).values()
@@ -95,3 +100,415 @@ def test_build_exposure_model(baseline_mc_exposure_model: cara.monte_carlo.Expos
     prob = model.deposited_exposure()
     assert isinstance(prob, np.ndarray)
     assert prob.shape == (7, )
+
+
+def test_build_concentration_model_vectorised_in_time(baseline_mc_concentration_model: cara.monte_carlo.ConcentrationModel):
+    model = baseline_mc_concentration_model.build_model(7)
+    conc = model.concentration(np.linspace(0., 8., 5))
+    assert isinstance(conc, np.ndarray)
+    assert conc.shape == (5, 7)
+
+
+@pytest.fixture
+def mc_exposure_model_with_distributions(baseline_mc_exposure_model) -> cara.monte_carlo.ExposureModel:
+    infected = baseline_mc_exposure_model.concentration_model.infected
+    return nested_replace(baseline_mc_exposure_model, {
+        'concentration_model.room.volume': 75.,
+        'concentration_model.infected': cara.monte_carlo.InfectedPopulation(
+            number=infected.number,
+            virus=virus_distributions['SARS_CoV_2_DELTA'],
+            presence=infected.presence,
+            mask=infected.mask,
+            activity=activity_distributions['Light activity'],
+            expiration=expiration_distributions['Speaking'],
+            host_immunity=infected.host_immunity,
+        ),
+    })
+
+
+def test_build_exposure_model_float32(mc_exposure_model_with_distributions):
+    # Build the same samples in double and in single precision.
+    random_state = np.random.get_state()
+    model = mc_exposure_model_with_distributions.build_model(10_000)
+    np.random.set_state(random_state)
+    model_float32 = mc_exposure_model_with_distributions.build_model(10_000, dtype=np.float32)
+
+    assert model_float32.concentration_model.infected.virus.viral_load_in_sputum.dtype == np.float32
+    for result in [model_float32.concentration(2.), model_float32.deposited_exposure(),
+                   model_float32.infection_probability()]:
+        assert result.dtype == np.float32
+        assert result.shape == (10_000, )
+        assert np.all(np.isfinite(result))
+    np.testing.assert_allclose(
+        np.mean(model_float32.infection_probability(), dtype=np.float64),
+        model.infection_probability().mean(), rtol=1e-6,
+    )
+
+
+def test_build_exposure_model_float32_memory(mc_exposure_model_with_distributions):
+    # A benchmark of the memory used to build and evaluate a model.
+    def peak_memory(dtype) -> int:
+        tracemalloc.start()
+        try:
+            mc_exposure_model_with_distributions.build_model(50_000, dtype=dtype).infection_probability()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    assert peak_memory(np.float32) < 0.55 * peak_memory(np.float64)
+
+
+def test_chunked_statistics(mc_exposure_model_with_distributions):
+    times = np.linspace(0., 8., 5)
+    probabilities = []
+
+    def infection_probability(model):
+        probabilities.append(model.infection_probability())
+        return probabilities[-1]
+
+    statistics = mc_exposure_model_with_distributions.chunked_statistics(
+        10_000,
+        {'probability': infection_probability, 'concentration': lambda model: model.concentration(times)},
+        bins={'probability': np.linspace(0., 100., 11)},
+        chunk_size=3_000,
+    )
+    assert [len(chunk) for chunk in probabilities] == [3_000, 3_000, 3_000, 1_000]
+    samples = np.concatenate(probabilities)
+    assert statistics['probability'].count == 10_000
+    np.testing.assert_allclose(statistics['probability'].mean, samples.mean(), rtol=1e-12)
+    np.testing.assert_allclose(statistics['probability'].variance, samples.var(), rtol=1e-10)
+    np.testing.assert_array_equal(
+        statistics['probability'].histogram, np.histogram(samples, np.linspace(0., 100., 11))[0],
+    )
+    assert statistics['concentration'].mean.shape == (5, )
+
+
+def test_chunked_statistics_memory(mc_exposure_model_with_distributions):
+    # The memory needed doesn't depend on the number of samples.
+    def peak_memory(size) -> int:
+        tracemalloc.start()
+        try:
+            mc_exposure_model_with_distributions.chunked_statistics(
+                size, {'probability': lambda model: model.infection_probability()},
+                chunk_size=5_000,
+            )
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    assert peak_memory(50_000) < 1.2 * peak_memory(10_000)
+
+
+def test_build_models_common_seed(mc_exposure_model_with_distributions):
+    # Common random numbers: models built with the same seed share the
+    # samples of the distributions found at the same place in each of them.
+    activity = mc_exposure_model_with_distributions.concentration_model.infected.activity
+    exposed = mc_exposure_model_with_distributions.exposed
+    mc_model = nested_replace(mc_exposure_model_with_distributions, {
+        'exposed': cara.monte_carlo.Population(
+            number=exposed.number, presence=exposed.presence, mask=exposed.mask,
+            activity=activity, host_immunity=exposed.host_immunity,
+        ),
+    })
+    variant = nested_replace(mc_model, {'concentration_model.infected.mask': mask_distributions['Type I']})
+    seed = np.random.SeedSequence(42)
+    model, variant_model = (mc.build_model(1000, seed=seed) for mc in [mc_model, variant])
+
+    np.testing.assert_array_equal(
+        variant_model.concentration_model.infected.virus.viral_load_in_sputum,
+        model.concentration_model.infected.virus.viral_load_in_sputum,
+    )
+    np.testing.assert_array_equal(variant_model.exposed.activity.inhalation_rate, model.exposed.activity.inhalation_rate)
+    # The same distribution at different places in a model is still sampled independently.
+    assert not np.array_equal(model.exposed.activity.inhalation_rate,
+                              model.concentration_model.infected.activity.inhalation_rate)
+    assert np.all(variant_model.infection_probability() < model.infection_probability())
+
+
+@pytest.mark.parametrize("vectorise", [True, False])
+def test_parameter_sweep(mc_exposure_model_with_distributions, vectorise):
+    axes = {
+        'concentration_model.room.volume': [50., 100., 200.],
+        'exposed.number': [2, 10],
+        'concentration_model.ventilation.window_height': [0.5, 1.6],
+    }
+    random_state = np.random.get_state()
+    result = cara.monte_carlo.parameter_sweep(
+        mc_exposure_model_with_distributions, axes, 1000,
+        executor_factory=concurrent.futures.ThreadPoolExecutor, vectorise=vectorise,
+    )
+    assert result.names == tuple(axes)
+    assert result.values.shape == (3, 2, 2)
+
+    # The same samples are used at each point of the grid.
+    np.random.set_state(random_state)
+    model = mc_exposure_model_with_distributions.build_model(1000)
+    point = {
+        'concentration_model.room.volume': 100.,
+        'exposed.number': 10,
+        'concentration_model.ventilation.window_height': 0.5,
+    }
+    expected = np.mean(nested_replace(model, point).infection_probability())
+    np.testing.assert_allclose(result.values[1, 1, 0], expected, rtol=1e-12)
+    np.testing.assert_allclose(
+        result.value_at(**{name.replace('.', '__'): value for name, value in point.items()}),
+        expected, rtol=1e-12,
+    )
+    # The infection probability of each exposed person doesn't depend on their number.
+    np.testing.assert_allclose(result.values[:, 0], result.values[:, 1], rtol=1e-12)
+    assert np.all(np.diff(result.values, axis=0) < 0)
+    assert np.all(np.diff(result.values, axis=2) < 0)
+
+
+def test_parameter_sweep_batches(mc_exposure_model_with_distributions, monkeypatch):
+    # The model is sent to the executor once per batch of grid points, not
+    # once per point.
+    submitted_batches = []
+
+    class RecordingExecutor(concurrent.futures.ThreadPoolExecutor):
+        def map(self, fn, *iterables):
+            models, batches, quantities = (list(iterable) for iterable in iterables)
+            submitted_batches.extend(batches)
+            return super().map(fn, models, batches, quantities)
+
+    monkeypatch.setattr(os, 'cpu_count', lambda: 3)
+    axes = {'exposed.number': [1, 2, 3, 4, 5, 6, 7]}
+    result = cara.monte_carlo.parameter_sweep(
+        mc_exposure_model_with_distributions, axes, 100, executor_factory=RecordingExecutor,
+    )
+    assert [len(batch) for batch in submitted_batches] == [2, 2, 3]
+    assert [point['exposed.number'] for batch in submitted_batches for point in batch] == axes['exposed.number']
+    assert result.values.shape == (7, )
+    np.testing.assert_allclose(result.value_at(exposed__number=4), result.values[3])
+
+
+def test_parameter_sweep_value_at_unknown_value(mc_exposure_model_with_distributions):
+    result = cara.monte_carlo.parameter_sweep(
+        mc_exposure_model_with_distributions, {'concentration_model.room.volume': [50., 100.]}, 100,
+    )
+    with pytest.raises(ValueError, match="75.0 is not one of the values"):
+        result.value_at(concentration_model__room__volume=75.)
+
+
+@pytest.fixture
+def mc_exposure_model_with_air_changes(mc_exposure_model_with_distributions):
+    return nested_replace(mc_exposure_model_with_distributions, {
+        'concentration_model.ventilation': cara.models.AirChange(
+            active=cara.models.PeriodicInterval(period=120, duration=120), air_exch=1.,
+        ),
+    })
+
+
+def test_solve_for_minimum_air_changes(mc_exposure_model_with_air_changes):
+    random_state = np.random.get_state()
+    solution = cara.monte_carlo.solve_for_target(
+        mc_exposure_model_with_air_changes, 'concentration_model.ventilation.air_exch',
+        target=15., bounds=(0., 20.), size=2000, tolerance=1e-3,
+    )
+    assert solution.statistic <= 15.
+    assert solution.evaluations < 20
+
+    # The solution is for the same samples throughout.
+    np.random.set_state(random_state)
+    model = mc_exposure_model_with_air_changes.build_model(2000)
+
+    def mean_infection_probability(air_exch):
+        return np.mean(nested_replace(
+            model, {'concentration_model.ventilation.air_exch': air_exch},
+        ).infection_probability())
+
+    assert mean_infection_probability(solution.value) == pytest.approx(solution.statistic, rel=1e-12)
+    assert mean_infection_probability(solution.value - 1e-3) > 15.
+
+
+def test_solve_for_maximum_occupancy(mc_exposure_model_with_air_changes):
+    solution = cara.monte_carlo.solve_for_target(
+        mc_exposure_model_with_air_changes, 'exposed.number', target=1.,
+        bounds=(1, 1000), size=2000, integer=True,
+        statistic=cara.monte_carlo.Statistic('expected_new_cases', percentile=95),
+    )
+    assert isinstance(solution.value, int)
+    probability = np.percentile(
+        mc_exposure_model_with_air_changes.build_model(2000).infection_probability(), 95,
+    ) / 100
+    # The expected new cases are proportional to the number of exposed people.
+    assert solution.value == pytest.approx(1 / probability, rel=0.1)
+
+
+def test_solve_for_maximum_duration(mc_exposure_model_with_air_changes):
+    solution = cara.monte_carlo.solve_for_target(
+        mc_exposure_model_with_air_changes,
+        lambda model, duration: nested_replace(model, {
+            'exposed.presence': cara.models.SpecificInterval(((0., duration), )),
+        }),
+        target=10., bounds=(0.5, 8.), size=2000,
+    )
+    assert 0.5 < solution.value < 8.
+    assert solution.statistic == pytest.approx(10., rel=1e-2)
+
+
+def test_solve_for_target_not_bracketed(mc_exposure_model_with_air_changes):
+    with pytest.raises(ValueError, match="is exceeded throughout the bounds"):
+        cara.monte_carlo.solve_for_target(
+            mc_exposure_model_with_air_changes, 'concentration_model.ventilation.air_exch',
+            target=1e-6, bounds=(0., 1.), size=100,
+        )
+
+
+def test_sobol_indices_additive_model():
+    room = cara.monte_carlo.Room(
+        volume=cara.monte_carlo.sampleable.Uniform(0., 1.),
+        inside_temp=cara.models.PiecewiseConstant((0., 24.), (293,)),
+        humidity=cara.monte_carlo.sampleable.Uniform(0., 1.),
+    )
+    # The variance of 2 * volume + humidity is 4/5 due to the volume and
+    # 1/5 to the humidity, without interactions.
+    indices = cara.monte_carlo.sobol_indices(
+        room, 50_000, quantity=lambda room: 2 * room.volume + room.humidity, seed=2022,
+    )
+    assert indices.names == ('volume', 'humidity')
+    np.testing.assert_allclose(indices.first_order, [0.8, 0.2], atol=0.03)
+    np.testing.assert_allclose(indices.total, [0.8, 0.2], atol=0.03)
+    assert np.all(indices.first_order_confidence[:, 0] <= indices.first_order)
+    assert np.all(indices.first_order <= indices.first_order_confidence[:, 1])
+    assert np.all(indices.total_confidence[:, 0] <= indices.total)
+    assert np.all(indices.total <= indices.total_confidence[:, 1])
+
+
+def test_sobol_indices_exposure_model(mc_exposure_model_with_distributions):
+    indices = cara.monte_carlo.sobol_indices(mc_exposure_model_with_distributions, 5000, n_bootstrap=20)
+    names = list(indices.names)
+    # The diameters are integrated over, rather than being an input.
+    assert not any(name.endswith('diameter') for name in names)
+    assert names[np.argmax(indices.total)] == 'concentration_model.infected.virus.viral_load_in_sputum'
+    # The inhalation rate of the infected people plays no part.
+    assert indices.total[names.index('concentration_model.infected.activity.inhalation_rate')] == 0.
+
+
+@pytest.mark.parametrize("sampling", ['sobol', 'lhs'])
+def test_build_model_sampling(mc_exposure_model_with_distributions, sampling):
+    model = mc_exposure_model_with_distributions.build_model(1024, dtype=np.float32, sampling=sampling)
+    viral_load = model.concentration_model.infected.virus.viral_load_in_sputum
+    assert viral_load.shape == (1024, )
+    assert viral_load.dtype == np.float32
+    assert model.infection_probability().shape == (1024, )
+
+
+def test_build_model_unknown_sampling(mc_exposure_model_with_distributions):
+    with pytest.raises(ValueError, match="Unknown sampling strategy 'halton'"):
+        mc_exposure_model_with_distributions.build_model(10, sampling='halton')
+
+
+def test_build_model_sampling_standard_error(mc_exposure_model_with_distributions):
+    # A benchmark of the standard error of the mean infection probability
+    # vs. the sample size, for each of the sampling strategies, for a virus
+    # with analytical distributions. E.g. for 4096 samples, the standard
+    # error with the Sobol' sequence is about half of that with random
+    # sampling.
+    mc_model = nested_replace(mc_exposure_model_with_distributions, {
+        'concentration_model.infected.virus': cara.monte_carlo.SARSCoV2(
+            viral_load_in_sputum=cara.monte_carlo.sampleable.LogNormal(6 * np.log(10), np.log(10)),
+            infectious_dose=cara.monte_carlo.sampleable.Uniform(10., 100.),
+            viable_to_RNA_ratio=cara.monte_carlo.sampleable.Uniform(0.01, 0.6),
+            transmissibility_factor=1.,
+        ),
+    })
+    sample_sizes = [256, 1024, 4096]
+    random_state = np.random.get_state()
+    np.random.seed(2022)
+    standard_error = {
+        sampling: [
+            np.std([
+                np.mean(mc_model.build_model(size, sampling=sampling).infection_probability())
+                for _ in range(20)
+            ])
+            for size in sample_sizes
+        ]
+        for sampling in ['random', 'lhs', 'sobol']
+    }
+    np.random.set_state(random_state)
+
+    for sampling, errors in standard_error.items():
+        assert errors[-1] < errors[0], sampling
+    assert standard_error['sobol'][-1] < 0.75 * standard_error['random'][-1]
+    assert standard_error['lhs'][-1] < standard_error['random'][-1]
+
+
+def test_adaptive_statistics(mc_exposure_model_with_distributions):
+    quantities = {'probability': lambda model: model.infection_probability()}
+    statistics = mc_exposure_model_with_distributions.adaptive_statistics(
+        quantities, relative_tolerance=0.05, max_size=100_000, batch_size=1000,
+    )
+    probability = statistics['probability']
+    assert probability.count < 100_000
+    assert probability.count % 1000 == 0
+    assert probability.standard_error <= 0.05 * probability.mean
+
+    # Without a tolerance, all of the samples are drawn.
+    statistics = mc_exposure_model_with_distributions.adaptive_statistics(
+        quantities, relative_tolerance=0., max_size=2500, batch_size=1000,
+    )
+    assert statistics['probability'].count == 2500
+
+    # Quantities which needn't converge are accumulated over the same samples.
+    statistics = mc_exposure_model_with_distributions.adaptive_statistics(
+        dict(quantities, noise=lambda model: np.random.normal(size=1000)),
+        relative_tolerance=0.05, max_size=100_000, batch_size=1000,
+        converged_quantities=['probability'],
+    )
+    assert statistics['noise'].count == statistics['probability'].count < 100_000
+
+    # The standard error is estimated from the means of (at least) the
+    # minimum number of batches.
+    statistics = mc_exposure_model_with_distributions.adaptive_statistics(
+        quantities, relative_tolerance=1., max_size=100_000, batch_size=1000, min_batches=3,
+    )
+    assert statistics['probability'].count == 3000
+    assert statistics['probability'].chunk_count == 3
+
+
+@pytest.mark.parametrize("sampling", ['random', 'sobol'])
+def test_build_model_seed(mc_exposure_model_with_distributions, sampling):
+    def samples(seed):
+        model = mc_exposure_model_with_distributions.build_model(512, sampling=sampling, seed=seed)
+        return (
+            model.concentration_model.infected.virus.viral_load_in_sputum,
+            model.concentration_model.infected.activity.exhalation_rate,
+        )
+
+    random_state = np.random.get_state()
+    viral_load, exhalation_rate = samples(42)
+    np.testing.assert_array_equal(samples(np.random.SeedSequence(42)), [viral_load, exhalation_rate])
+    assert not np.array_equal(samples(43)[0], viral_load)
+    # The global random state is left untouched.
+    np.testing.assert_array_equal(np.random.get_state()[1], random_state[1])
+
+    # Successive uses of a generator give different (but reproducible) samples.
+    rng = np.random.default_rng(42)
+    first, second = samples(rng)[0], samples(rng)[0]
+    assert not np.array_equal(first, second)
+    rng = np.random.default_rng(42)
+    np.testing.assert_array_equal(samples(rng)[0], first)
+    np.testing.assert_array_equal(samples(rng)[0], second)
+
+
+def test_build_model_seed_per_distribution(mc_exposure_model_with_distributions):
+    # The samples of a distribution don't depend on the other distributions.
+    model = mc_exposure_model_with_distributions.build_model(100, seed=1)
+    other_model = nested_replace(
+        mc_exposure_model_with_distributions, {'concentration_model.infected.virus.infectious_dose': 50.},
+    ).build_model(100, seed=1)
+    np.testing.assert_array_equal(
+        other_model.concentration_model.infected.virus.viral_load_in_sputum,
+        model.concentration_model.infected.virus.viral_load_in_sputum,
+    )
+
+
+def test_chunked_statistics_seed(mc_exposure_model_with_distributions):
+    def mean_probability():
+        statistics = mc_exposure_model_with_distributions.chunked_statistics(
+            3000, {'probability': lambda model: model.infection_probability()}, chunk_size=1000, seed=7,
+        )
+        return statistics['probability'].mean
+
+    assert mean_probability() == mean_probability()
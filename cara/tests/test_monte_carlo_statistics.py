@@ -0,0 +1,74 @@
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from cara.monte_carlo.statistics import RunningStatistics
+
+
+@pytest.mark.parametrize(
+    "chunk_sizes", [
+        [1000],
+        [300, 300, 300, 100],
+        [1, 999],
+    ]
+)
+def test_running_statistics(chunk_sizes):
+    samples = np.random.lognormal(0., 1., size=(3, sum(chunk_sizes))).astype(np.float32)
+    bins = np.array([0., 0.5, 1., 2., 4.])
+    statistics = RunningStatistics(bins)
+    for chunk in np.split(samples, np.cumsum(chunk_sizes)[:-1], axis=-1):
+        statistics.update(chunk, chunk.shape[-1])
+
+    assert statistics.count == 1000
+    npt.assert_allclose(statistics.mean, samples.mean(axis=-1, dtype=np.float64), rtol=1e-12)
+    npt.assert_allclose(statistics.variance, samples.var(axis=-1, dtype=np.float64), rtol=1e-10)
+    npt.assert_allclose(statistics.standard_deviation, samples.std(axis=-1, dtype=np.float64), rtol=1e-10)
+    npt.assert_array_equal(
+        statistics.histogram, [np.histogram(row, bins)[0] for row in samples],
+    )
+
+
+def test_running_statistics_unvectorised_values():
+    statistics = RunningStatistics(np.linspace(0., 10., 6))
+    statistics.update(4., 10)
+    statistics.update(np.full(30, 6.), 30)
+    assert statistics.count == 40
+    npt.assert_allclose(statistics.mean, 5.5)
+    npt.assert_allclose(statistics.variance, 0.75)
+    npt.assert_array_equal(statistics.histogram, [0, 0, 10, 30, 0])
+
+
+def test_running_statistics_no_bins():
+    statistics = RunningStatistics()
+    statistics.update(np.arange(4.), 4)
+    with pytest.raises(ValueError, match='No bins'):
+        statistics.histogram
+
+
+def test_running_statistics_confidence_interval():
+    statistics = RunningStatistics()
+    statistics.update(np.tile([1., 3.], 50), 100)
+    # The standard deviation is 1.
+    npt.assert_allclose(statistics.standard_error, 0.1)
+    npt.assert_allclose(statistics.confidence_interval(), [2. - 0.195996, 2. + 0.195996], rtol=1e-5)
+    npt.assert_allclose(statistics.confidence_interval(0.5), [2. - 0.067449, 2. + 0.067449], rtol=1e-5)
+
+
+def test_running_statistics_batch_means():
+    statistics = RunningStatistics(batch_means=True)
+    # A noise shared by the samples of each chunk, which the spread of the
+    # samples doesn't show.
+    chunk_means = np.array([1., 1.2, 0.9, 0.9])
+    statistics.update(np.full(100, chunk_means[0]), 100)
+    assert statistics.standard_error == np.inf
+    assert statistics.confidence_interval() == (-np.inf, np.inf)
+    for chunk_mean in chunk_means[1:]:
+        statistics.update(np.full(100, chunk_mean), 100)
+
+    assert statistics.chunk_count == 4
+    npt.assert_allclose(statistics.mean, 1.)
+    npt.assert_allclose(statistics.standard_error, chunk_means.std(ddof=1) / 2.)
+    # From the Student t distribution with 3 degrees of freedom.
+    npt.assert_allclose(
+        statistics.confidence_interval(), [1. - 3.182446 * 0.070711, 1. + 3.182446 * 0.070711], rtol=1e-5,
+    )
@@ -2,7 +2,9 @@ import numpy as np
 import numpy.testing as npt
 import pytest
 
-from cara.monte_carlo.data import activity_distributions, virus_distributions
+import cara.monte_carlo.data
+from cara.monte_carlo import sampleable
+from cara.monte_carlo.data import activity_distributions, build_sample_banks, virus_distributions
 
 
 # Mean & std deviations from https://doi.org/10.1101/2021.10.14.21264988 (Table 3)
@@ -42,3 +44,41 @@ def test_viral_load_logdistribution(distribution, mean, std):
     virus = virus_distributions[distribution].build_model(size=1000000)
     npt.assert_allclose(np.log10(virus.viral_load_in_sputum).mean(), mean, atol=0.01)
     npt.assert_allclose(np.log10(virus.viral_load_in_sputum).std(), std, atol=0.01)
+
+
+def test_predefined_distribution_sample_banks():
+    # The viral load distribution is common to the virus variants, and has a single bank.
+    viral_load = virus_distributions['SARS_CoV_2'].viral_load_in_sputum
+    assert isinstance(viral_load, sampleable.SampleBank)
+    assert virus_distributions['SARS_CoV_2_DELTA'].viral_load_in_sputum is viral_load
+    assert viral_load.name == 'virus.SARS_CoV_2.viral_load_in_sputum'
+    # The distributions which are cheap to sample have no bank.
+    assert isinstance(virus_distributions['SARS_CoV_2'].infectious_dose, sampleable.Uniform)
+    assert isinstance(activity_distributions['Seated'].inhalation_rate, sampleable.LogNormal)
+
+
+def test_build_sample_banks(tmp_path, monkeypatch):
+    built_banks = []
+    monkeypatch.setattr(
+        sampleable.SampleBank, '_load_bank', lambda bank, directory: built_banks.append((bank.name, directory)),
+    )
+    build_sample_banks(str(tmp_path))
+    names = [name for name, _ in built_banks]
+    assert len(set(names)) == len(names)
+    assert {'virus.SARS_CoV_2.viral_load_in_sputum', 'short_range_distances'} <= set(names)
+    assert {directory for _, directory in built_banks} == {tmp_path}
+
+    monkeypatch.delenv('CARA_SAMPLE_BANK_DIR', raising=False)
+    with pytest.raises(ValueError, match="CARA_SAMPLE_BANK_DIR"):
+        build_sample_banks()
+
+
+def test_short_range_distances_bank_path(tmp_path, monkeypatch):
+    # The distances are read by the distribution from the module level table,
+    # which is part of the digest of the bank.
+    bank = cara.monte_carlo.data.short_range_distances
+    path = bank._bank_path(tmp_path)
+    monkeypatch.setattr(cara.monte_carlo.data, 'frequencies', cara.monte_carlo.data.frequencies[::-1])
+    assert bank._bank_path(tmp_path) != path
+    monkeypatch.undo()
+    assert bank._bank_path(tmp_path) == path
@@ -1,6 +1,9 @@
+import pickle
+
 import numpy as np
 import numpy.testing as npt
 import pytest
+import scipy.stats
 from retry import retry
 
 from cara.monte_carlo import sampleable
@@ -109,3 +112,170 @@ def test_logcustomkernel():
     correct_dist = function(np.array(selected_bins))
     assert len(samples) == sample_size
     npt.assert_allclose(selected_histogram, correct_dist, rtol=0.05)
+
+
+@pytest.mark.parametrize(
+    "sample_size", [48, 1000, 250_001],
+)
+def test_log_custom_quadrature(sample_size):
+    # The weighted mean over the samples of a function of the random
+    # variable is its expectation value, here computed for a lognormal
+    # distribution (truncated far in its tails).
+    mean_gaussian, std_gaussian = 1., 0.5
+    quadrature = sampleable.LogCustomQuadrature(
+        (-2., 3.),
+        lambda x: np.exp(-((x*np.log(10)-mean_gaussian)/std_gaussian)**2/2),
+        nodes=48,
+    )
+    samples = quadrature.generate_samples(sample_size)
+    weights = quadrature.sample_weights.generate_samples(sample_size)
+
+    assert samples.shape == weights.shape == (sample_size, )
+    assert np.all(np.diff(samples) >= 0)
+    npt.assert_allclose(np.mean(weights), 1.)
+    npt.assert_allclose(np.mean(weights * samples),
+                        np.exp(mean_gaussian + std_gaussian**2/2), rtol=1e-10)
+
+
+def test_quadrature_sample_size_too_small():
+    quadrature = sampleable.Quadrature([1., 2., 3.], [1., 2., 1.])
+    with pytest.raises(ValueError, match='at least the number of nodes'):
+        quadrature.generate_samples(2)
+
+
+@pytest.mark.parametrize(
+    "distribution, scipy_distribution", [
+        [sampleable.Normal(1., 0.5), scipy.stats.norm(1., 0.5)],
+        [sampleable.Uniform(2., 5.), scipy.stats.uniform(2., 3.)],
+        [sampleable.LogNormal(-0.69, 0.1), scipy.stats.lognorm(0.1, scale=np.exp(-0.69))],
+    ]
+)
+def test_inverse_cdf(distribution, scipy_distribution):
+    quantiles = np.linspace(0.01, 0.99, 99)
+    npt.assert_allclose(distribution.inverse_cdf(quantiles), scipy_distribution.ppf(quantiles))
+
+
+def test_empirical_inverse_cdf():
+    # Without an analytical inverse CDF, the quantiles of the distribution are
+    # those of random samples.
+    class Exponential(sampleable.SampleableDistribution):
+        def generate_samples(self, size, rng=None):
+            return np.random.exponential(size=size)
+
+    quantiles = (np.arange(200_000) + 0.5) / 200_000
+    samples = Exponential().inverse_cdf(quantiles)
+    assert np.all(np.diff(samples) >= 0)
+    npt.assert_allclose(samples[[50_000, 100_000, 150_000]], np.log([4 / 3, 2., 4.]), atol=0.02)
+
+
+@pytest.mark.parametrize("log", [False, True])
+def test_custom_inverse_cdf(log):
+    # The CDF of the distribution is (15 x**2 - x**3) / 500.
+    function = lambda x: (-(5 - x)**2 + 25)/(500/3.)
+    if log:
+        distribution = sampleable.LogCustom((0, 10), function, 0.15)
+    else:
+        distribution = sampleable.Custom((0, 10), function, 0.15)
+    samples = distribution.inverse_cdf(np.array([0., 0.25, 0.5, 0.75, 1.]))
+    if log:
+        samples = np.log10(samples)
+    npt.assert_allclose(samples, [0., 3.26352, 5., 6.73648, 10.], atol=1e-5)
+
+
+@pytest.mark.parametrize(
+    "distribution", [
+        sampleable.Normal(1., 0.5),
+        sampleable.LogCustom((0, 3), lambda x: x * (3 - x), 2.5),
+        sampleable.LogCustomKernel(np.linspace(0., 3., 10), np.ones(10), 0.1),
+    ]
+)
+def test_generate_samples_with_generator(distribution):
+    samples = distribution.generate_samples(100, np.random.default_rng(3))
+    npt.assert_array_equal(distribution.generate_samples(100, np.random.default_rng(3)), samples)
+    assert not np.array_equal(distribution.generate_samples(100, np.random.default_rng(4)), samples)
+
+
+def test_custom_kernel_inverse_cdf():
+    # A single kernel is a normal distribution (the tabulated inverse CDF
+    # being accurate to about a hundredth of the bandwidth).
+    distribution = sampleable.CustomKernel(np.array([2.]), np.array([1.]), kernel_bandwidth=0.5)
+    quantiles = np.linspace(0.001, 0.999, 99)
+    npt.assert_allclose(distribution.inverse_cdf(quantiles), scipy.stats.norm(2., 0.5).ppf(quantiles), atol=5e-3)
+
+
+def test_logcustomkernel_inverse_cdf():
+    distribution = sampleable.LogCustomKernel(
+        np.linspace(2, 10, 30), np.sin(np.linspace(0.1, 3, 30)), kernel_bandwidth=0.1,
+    )
+    quantiles = np.linspace(0.05, 0.95, 19)
+    samples = distribution.generate_samples(1_000_000, np.random.default_rng(1))
+    npt.assert_allclose(
+        np.log10(distribution.inverse_cdf(quantiles)), np.log10(np.quantile(samples, quantiles)), atol=0.01,
+    )
+
+
+def test_sample_bank(tmp_path, monkeypatch):
+    monkeypatch.setenv('CARA_SAMPLE_BANK_DIR', str(tmp_path))
+    bank = sampleable.SampleBank('normal', sampleable.Normal(1., 0.5), bank_size=10_000, seed=3)
+    samples = bank.generate_samples(1000, np.random.default_rng(1))
+
+    [bank_path] = tmp_path.glob('*.npy')
+    assert bank_path.name.isascii()
+    bank_samples = np.load(bank_path)
+    npt.assert_array_equal(bank_samples, sampleable.Normal(1., 0.5).generate_samples(10_000, np.random.default_rng(3)))
+    # The samples are a window of the (memory-mapped) bank.
+    start = np.flatnonzero(bank_samples == samples[0])[0]
+    npt.assert_array_equal(samples, bank_samples[start:start + 1000])
+    assert isinstance(samples.base, np.memmap)
+    assert not samples.flags.writeable
+    npt.assert_array_equal(bank.generate_samples(1000, np.random.default_rng(1)), samples)
+
+    # The bank isn't copied along with the distribution.
+    assert pickle.loads(pickle.dumps(bank))._bank is None
+    # More samples than in the bank are drawn from the distribution.
+    assert bank.generate_samples(20_000).shape == (20_000, )
+
+
+def test_sample_bank_parameters(tmp_path, monkeypatch):
+    # A bank is only reused for a distribution with the same parameters.
+    monkeypatch.setenv('CARA_SAMPLE_BANK_DIR', str(tmp_path))
+
+    def custom(frequencies):
+        return sampleable.Custom(
+            bounds=(0., 2.), function=lambda x: np.interp(x, [0., 1., 2.], frequencies), max_function=1.,
+        )
+
+    for distribution in [
+        sampleable.Normal(1., 0.5), sampleable.Normal(1., 0.5), sampleable.Normal(1., 0.6),
+        custom([0., 1., 0.]), custom([0., 1., 0.]), custom([1., 1., 0.]),
+    ]:
+        sampleable.SampleBank('bank', distribution, bank_size=1000).generate_samples(10)
+    assert len(list(tmp_path.glob('*.npy'))) == 4
+
+
+def test_sample_bank_seed(tmp_path, monkeypatch):
+    # Without a seed, banks of the same family of distributions are drawn
+    # from different streams of random numbers.
+    monkeypatch.setenv('CARA_SAMPLE_BANK_DIR', str(tmp_path))
+    banks = [
+        sampleable.SampleBank('normal', sampleable.Normal(0., 1.), bank_size=1000),
+        sampleable.SampleBank('normal', sampleable.Normal(1., 2.), bank_size=1000),
+        sampleable.SampleBank('other_normal', sampleable.Normal(0., 1.), bank_size=1000),
+    ]
+    standardised = [
+        np.asarray(banks[0].generate_samples(1000)),
+        (np.asarray(banks[1].generate_samples(1000)) - 1.) / 2.,
+        np.asarray(banks[2].generate_samples(1000)),
+    ]
+    assert not np.allclose(standardised[0], standardised[1])
+    assert not np.allclose(standardised[0], standardised[2])
+    assert len(list(tmp_path.glob('*.npy'))) == 3
+
+
+def test_sample_bank_disabled(monkeypatch):
+    monkeypatch.delenv('CARA_SAMPLE_BANK_DIR', raising=False)
+    bank = sampleable.SampleBank('normal', sampleable.Normal(1., 0.5))
+    npt.assert_array_equal(
+        bank.generate_samples(100, np.random.default_rng(1)),
+        sampleable.Normal(1., 0.5).generate_samples(100, np.random.default_rng(1)),
+    )
@@ -0,0 +1,70 @@
+import concurrent.futures
+from dataclasses import dataclass
+
+import numpy as np
+
+from cara.utils import method_cache, method_cache_info
+
+
+@dataclass(frozen=True)
+class Squarer:
+    offset: float
+
+    @method_cache
+    def square(self, value, power=2):
+        return (value + self.offset) ** power
+
+    @method_cache(maxsize=2)
+    def cube(self, value):
+        return (value + self.offset) ** 3
+
+
+def test_method_cache_hits_and_misses():
+    Squarer.square.cache_clear()
+    squarer = Squarer(np.array([1., 2.]))
+    np.testing.assert_array_equal(squarer.square(1.), [4., 9.])
+    np.testing.assert_array_equal(squarer.square(1.), [4., 9.])
+    np.testing.assert_array_equal(squarer.square(1., power=3), [8., 27.])
+    info = Squarer.square.cache_info()
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (1, 2, None, 2)
+
+
+def test_method_cache_per_instance():
+    assert Squarer(1.).square(1.) == 4.
+    assert Squarer(2.).square(1.) == 9.
+
+
+def test_method_cache_keys_are_not_hashes():
+    # -1 and -2 have the same hash in CPython.
+    assert hash(-1) == hash(-2)
+    squarer = Squarer(0.)
+    assert squarer.square(-1) == 1
+    assert squarer.square(-2) == 4
+
+
+def test_method_cache_lru_eviction():
+    Squarer.cube.cache_clear()
+    squarer = Squarer(0.)
+    squarer.cube(1.)
+    squarer.cube(2.)
+    squarer.cube(1.)  # 1. is now more recently used than 2.
+    squarer.cube(3.)
+    assert list(squarer._cache_cube) == [(1., ), (3., )]
+    info = Squarer.cube.cache_info()
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (1, 3, 2, 2)
+
+
+def test_method_cache_threaded():
+    Squarer.square.cache_clear()
+    squarer = Squarer(0.)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda i: squarer.square(i % 10), range(2000)))
+    assert results == [(i % 10) ** 2 for i in range(2000)]
+    assert Squarer.square.cache_info().currsize == 10
+
+
+def test_method_cache_info():
+    Squarer(0.).square(1.)
+    info = method_cache_info()
+    assert 'cara.tests.test_utils.Squarer.square' in info
+    assert 'cara.models.ConcentrationModel.state_change_times' in info
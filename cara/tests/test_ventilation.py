@@ -135,3 +135,44 @@ def test_multiple_vectorisation():
     r = models.MultipleVentilation([v2, v3]).air_exchange(room, t_active)
     assert isinstance(r, np.ndarray)
     np.testing.assert_array_equal(r, [10, 11, 12, 13, 14])
+
+
+def test_air_exchange_vectorised_in_time(baseline_slidingwindow, baseline_hingedwindow):
+    room = models.Room(
+        volume=np.array([50., 75., 100.]),
+        inside_temp=models.PiecewiseConstant((0, 6, 24), (288, 293)),
+    )
+    hinged_window = dataclasses.replace(
+        baseline_hingedwindow,
+        outside_temp=models.PeriodicPiecewiseConstant((0., 3., 7.), (285., 290., 283.)),
+    )
+    ventilation = models.MultipleVentilation((
+        baseline_slidingwindow,
+        hinged_window,
+        models.HEPAFilter(active=models.SpecificInterval(((2, 6), )), q_air_mech=np.array([400., 500., 600.])),
+        models.AirChange(active=models.PeriodicInterval(period=120, duration=60), air_exch=0.25),
+    ))
+    times = np.array(sorted(ventilation.transition_times(room) | {1.5, 4.5, 8.5, 10.}))
+    air_exchange = ventilation.air_exchange(room, times)
+    assert air_exchange.shape == (len(times), 3)
+    npt.assert_allclose(
+        air_exchange,
+        [np.broadcast_to(ventilation.air_exchange(room, float(time)), (3, )) for time in times],
+        rtol=1e-14,
+    )
+
+
+def test_air_exchange_vectorised_in_time_inactive(baseline_slidingwindow):
+    room = models.Room(volume=75, inside_temp=models.PiecewiseConstant((0, 24), (293,)))
+    times = np.array([4.5, 9.5, 10.])
+    npt.assert_array_equal(baseline_slidingwindow.air_exchange(room, times), [0., 0., 0.])
+
+
+def test_hinged_window_multi_dimensional(baseline_hingedwindow):
+    window_widths = np.array([[0.5, 1.], [2., 4.]])
+    hinged_window = dataclasses.replace(baseline_hingedwindow, window_width=window_widths)
+    npt.assert_allclose(
+        hinged_window.discharge_coefficient,
+        [[dataclasses.replace(baseline_hingedwindow, window_width=width).discharge_coefficient
+          for width in row] for row in window_widths],
+    )
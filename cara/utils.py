@@ -1,7 +1,32 @@
+import collections
 import functools
+import threading
+import typing
+import weakref
 
 
-def method_cache(fn):
+class CacheInfo(typing.NamedTuple):
+    #: The number of calls which were served from the cache.
+    hits: int
+
+    #: The number of calls which had to be computed.
+    misses: int
+
+    #: The maximum number of entries held per instance (None if unbounded).
+    maxsize: typing.Optional[int]
+
+    #: The total number of entries currently held, across all live instances.
+    currsize: int
+
+
+#: All of the methods decorated with :func:`method_cache`, by qualified name.
+_CACHED_METHODS: typing.Dict[str, typing.Any] = {}
+
+# A marker separating the positional from the keyword arguments in cache keys.
+_KWARGS_MARK = object()
+
+
+def method_cache(fn=None, *, maxsize: typing.Optional[int] = None):
     """
     A decorator for instance based caching.
 
@@ -9,19 +34,99 @@ def method_cache(fn):
     instance itself be hashable - only the arguments must be so.
 
     The cache is stored as a dictionary in a private attribute on the instance
-    with the name ``_cache_{func_name}``.
+    with the name ``_cache_{func_name}``, keyed on the arguments themselves.
+    If ``maxsize`` is given, each instance holds at most that many entries,
+    and the least recently used ones are evicted first.
+
+    Cache lookups are lock-free; only the insertion of new entries is
+    serialised, which makes the cached methods safe to use from multiple
+    threads (a value may occasionally be computed twice, but only the first
+    one is ever returned). The hit/miss counters (shared by all instances,
+    and approximate under concurrent use) and the current size are available
+    through the ``cache_info()`` attribute of the decorated method, or for all
+    of the decorated methods via :func:`method_cache_info`.
 
     """
+    if fn is None:
+        return functools.partial(method_cache, maxsize=maxsize)
+
     cache_name = f'_cache_{fn.__name__}'
+    lock = threading.Lock()
+    # The instances which hold a cache for this method, by id.
+    instances: typing.MutableMapping[int, typing.Any] = weakref.WeakValueDictionary()
+    counters = {'hits': 0, 'misses': 0}
+    missing = object()
+
+    def get_cache(self) -> dict:
+        cache = self.__dict__.get(cache_name)
+        if cache is None:
+            with lock:
+                cache = self.__dict__.get(cache_name)
+                if cache is None:
+                    cache = {} if maxsize is None else collections.OrderedDict()
+                    object.__setattr__(self, cache_name, cache)
+                    try:
+                        instances[id(self)] = self
+                    except TypeError:
+                        # Not weak-referenceable, so can't be counted in currsize.
+                        pass
+        return cache
 
     @functools.wraps(fn)
     def cached_method(self, *args, **kwargs):
-        cache = getattr(self, cache_name, None)
-        if cache is None:
-            cache = {}
-            object.__setattr__(self, cache_name, cache)
-        cache_key = hash(args + tuple(kwargs.items()))
-        if cache_key not in cache:
-            cache[cache_key] = fn(self, *args, **kwargs)
-        return cache[cache_key]
+        cache = get_cache(self)
+        cache_key = args + (_KWARGS_MARK, ) + tuple(kwargs.items()) if kwargs else args
+        result = cache.get(cache_key, missing)
+        if result is not missing:
+            counters['hits'] += 1
+            if maxsize is not None:
+                try:
+                    cache.move_to_end(cache_key)
+                except KeyError:
+                    # Evicted by another thread in the meantime.
+                    pass
+            return result
+
+        # The computation itself is done without holding the lock, as cached
+        # methods routinely call other (or the same) cached methods.
+        result = fn(self, *args, **kwargs)
+        with lock:
+            counters['misses'] += 1
+            result = cache.setdefault(cache_key, result)
+            if maxsize is not None:
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+        return result
+
+    def cache_info() -> CacheInfo:
+        with lock:
+            currsize = sum(
+                len(instance.__dict__.get(cache_name, ()))
+                for instance in list(instances.values())
+            )
+            return CacheInfo(counters['hits'], counters['misses'], maxsize, currsize)
+
+    def cache_clear() -> None:
+        """Clear the caches of all live instances, and reset the counters."""
+        with lock:
+            for instance in list(instances.values()):
+                instance.__dict__.get(cache_name, {}).clear()
+            counters['hits'] = counters['misses'] = 0
+
+    cached_method.cache_info = cache_info  # type: ignore
+    cached_method.cache_clear = cache_clear  # type: ignore
+    _CACHED_METHODS[f'{fn.__module__}.{fn.__qualname__}'] = cached_method
     return cached_method
+
+
+def method_cache_info() -> typing.Dict[str, CacheInfo]:
+    """
+    The :class:`CacheInfo` of each of the methods decorated with
+    :func:`method_cache`, by fully qualified method name (e.g.
+    ``'cara.models.ConcentrationModel.state_change_times'``).
+
+    """
+    return {
+        name: cached_method.cache_info()
+        for name, cached_method in sorted(_CACHED_METHODS.items())
+    }
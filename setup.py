@@ -25,14 +25,12 @@ REQUIREMENTS: dict = {
         'Jinja2',
         'loky',
         'matplotlib',
-        'memoization',
         'mistune',
         'numpy',
         'psutil',
         'python-dateutil',
         'retry',
         'scipy',
-        'sklearn',
         'timezonefinder',
         'tornado',
         'types-retry',
@@ -89,6 +87,7 @@ setup(
         'apps/*/*/*/*',
         'apps/*/*/*/*/*',
         'data/*.json',
+        'data/*.npy',
         'data/*.txt',
     ]},
 )